@@ -0,0 +1,200 @@
+"""
+Two-way chat between Minecraft and a Discord channel (chat_bridge_channel_id config, set with ?chatbridge).
+
+Minecraft to Discord: chat lines (and joins, deaths, etc if chat_bridge_events) come from the game event bus, so nothing
+is re-read from latest.log. Lines are queued and sent every chat_bridge_interval seconds as one message, or added to the
+bridge's last message by editing it if it's still the latest message in the channel and has room.
+So a busy chat is at most one Discord request per interval, instead of one per line.
+
+Discord to Minecraft: messages in the channel (that aren't bot commands) are queued and sent every interval as
+tellraw commands, several messages per command.
+
+Both queues hold at most chat_bridge_queue_size lines. If Discord or the server can't keep up (rate limited, unreachable),
+lines wait in the queue, and once it's full the oldest are dropped and a note says how many were skipped.
+"""
+
+import json
+import asyncio
+from collections import deque
+from typing import List
+
+import discord
+
+from bot_files import server_events
+from bot_files.server_events import Game_Event
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint
+
+
+class Chat_Bridge:
+    max_message_length = 2000  # Discord message limit.
+    max_command_length = 1000  # Leaves room under RCON's 1446 byte limit for multi-byte characters.
+    max_discord_message_length = 256  # Longer Discord messages are cut off before being sent to Minecraft.
+
+    def __init__(self, backend):
+        """
+        Args:
+            backend Backend: For Discord bot, event bus, and sending commands.
+        """
+
+        self.backend = backend
+        self.to_discord = deque()  # Lines waiting to be sent to Discord.
+        self.to_game = deque()  # (Discord name, message) waiting to be sent to Minecraft.
+        self.skipped_discord = self.skipped_game = 0  # Lines dropped because queue was full.
+        self.last_message = None  # Bridge's last Discord message, edited to add lines while it has room.
+        self._task = None
+
+    @property
+    def channel_id(self) -> int:
+        return config.get_config('chat_bridge_channel_id') or 0
+
+    def start(self) -> None:
+        """Subscribes to game events and starts sending queued lines. Needs a running event loop."""
+
+        event_types = [server_events.CHAT]
+        if config.get_config('chat_bridge_events'):
+            event_types += [server_events.PLAYER_JOIN, server_events.PLAYER_LEAVE, server_events.DEATH, server_events.ADVANCEMENT]
+        self.backend.events.subscribe(event_types, self._on_event)
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self.backend.events.unsubscribe(self._on_event)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _queue(self, queue: deque, item) -> bool:
+        """Adds item to queue, drops oldest item if full. Returns False if an item was dropped."""
+
+        queue.append(item)
+        if len(queue) > config.get_config('chat_bridge_queue_size'):
+            queue.popleft()
+            return False
+        return True
+
+    def _on_event(self, event: Game_Event) -> None:
+        # Only selected server, other subprocess servers can be running at the same time.
+        if not self.channel_id or event.server != config.server_name:
+            return
+
+        player = discord.utils.escape_markdown(event.player or '')
+        if event.type == server_events.CHAT:
+            text = discord.utils.escape_markdown(event.data['text'])
+            line = f"**{player}**: {text}"
+        else:
+            emoji = {server_events.PLAYER_JOIN: ':arrow_right:', server_events.PLAYER_LEAVE: ':arrow_left:',
+                     server_events.DEATH: ':skull:', server_events.ADVANCEMENT: ':trophy:'}.get(event.type, '')
+            line = f"{emoji} {discord.utils.escape_markdown(event.message)}"
+
+        if not self._queue(self.to_discord, line):
+            self.skipped_discord += 1
+
+    def relay_from_discord(self, message: discord.Message) -> bool:
+        """
+        Queues Discord message to be sent to Minecraft, if it's in the bridge channel. Used by on_message listener.
+
+        Returns:
+            bool: If message was queued.
+        """
+
+        if not self.channel_id or message.channel.id != self.channel_id or message.author.bot:
+            return False
+        if not (text := message.clean_content.strip()) or text.startswith(config.get_config('command_prefix')):
+            return False
+
+        if len(text) > self.max_discord_message_length:
+            text = text[:self.max_discord_message_length] + '...'
+        if not self._queue(self.to_game, (message.author.display_name, text)):
+            self.skipped_game += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(config.get_config('chat_bridge_interval'))
+            try:
+                await self.flush_discord()
+                await self.flush_game()
+            except Exception as e:
+                lprint(f"ERROR: Chat bridge: {e}")
+
+    async def flush_discord(self) -> bool:
+        """
+        Sends queued lines to Discord. Lines stay queued if sending fails, and get tried again next interval.
+
+        Returns:
+            bool: If there was nothing to send or it was sent.
+        """
+
+        if not self.to_discord or not self.backend.bot:
+            return True
+        if not (channel := self.backend.bot.get_channel(self.channel_id)):
+            return False
+
+        lines = list(self.to_discord)
+        if self.skipped_discord:
+            lines.insert(0, f"*({self.skipped_discord} older lines skipped)*")
+        sent_count = len(self.to_discord)
+        try:
+            # Adds to last message if nothing else was posted after it, instead of sending a new one.
+            remaining = list(lines)
+            if self.last_message and channel.last_message_id == self.last_message.id:
+                text = self.last_message.content
+                while remaining and len(text) + len(remaining[0]) + 1 <= self.max_message_length:
+                    text += '\n' + remaining.pop(0)
+                if len(remaining) < len(lines):
+                    self.last_message = await self.last_message.edit(content=text, allowed_mentions=discord.AllowedMentions.none())
+
+            for text in self._join(remaining, self.max_message_length, '\n'):
+                self.last_message = await channel.send(text, allowed_mentions=discord.AllowedMentions.none())
+        except discord.HTTPException as e:
+            lprint(f"ERROR: Chat bridge couldn't send to Discord: {e}")
+            return False
+
+        # New lines might've been queued while sending.
+        for _ in range(min(sent_count, len(self.to_discord))):
+            self.to_discord.popleft()
+        self.skipped_discord = 0
+        return True
+
+    async def flush_game(self) -> bool:
+        """
+        Sends queued Discord messages to Minecraft using tellraw, multiple messages per command.
+
+        Returns:
+            bool: If there was nothing to send or it was sent.
+        """
+
+        if not self.to_game:
+            return True
+
+        messages = list(self.to_game)
+        components = [json.dumps([{'text': '[Discord] ', 'color': 'blue'}, {'text': f"<{name}> {text}", 'color': 'white'}])
+                      for name, text in messages]
+        if self.skipped_game:
+            components.insert(0, json.dumps({'text': f"[Discord] ({self.skipped_game} older messages skipped)", 'color': 'gray'}))
+
+        # Each part is a JSON array, joined with newlines into one tellraw: ["", part1, "\n", part2, ...]
+        commands = [f'tellraw @a ["",{i}]' for i in self._join(components, self.max_command_length - 15, ',"\\n",')]
+        results = await self.backend.send_commands(commands)
+        if not results or not any(results):
+            return False
+
+        for _ in range(min(len(messages), len(self.to_game))):
+            self.to_game.popleft()
+        self.skipped_game = 0
+        return True
+
+    @staticmethod
+    def _join(items: List[str], max_length: int, separator: str) -> List[str]:
+        """Joins items with separator into as few strings as possible, each at most max_length (unless one item is already longer)."""
+
+        joined, current = [], ''
+        for item in items:
+            if current and len(current) + len(separator) + len(item) > max_length:
+                joined.append(current)
+                current = ''
+            current = current + separator + item if current else item
+        if current:
+            joined.append(current)
+        return joined
@@ -0,0 +1,211 @@
+"""
+Sends text and log files as Discord attachments without writing temp files or loading the whole file into memory.
+
+Data is read a chunk at a time (decompressing .gz files as it goes) and put into parts of at most discord_upload_limit bytes,
+each part is uploaded and dropped before the one after next is built. So memory use stays around two parts no matter how
+big the log is. Parts are cut on line breaks, so each part is a readable file by itself.
+
+If the data would need more than discord_upload_max_parts parts as plain text, each part is gzip compressed instead
+(every part is its own .gz file). If it still doesn't fit, it stops after the last part and says so.
+"""
+
+import io
+import os
+import gzip
+import zlib
+import asyncio
+from typing import Union, List, Iterable, Iterator
+
+import discord
+
+from bot_files.slime_backend import backend
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint
+
+
+chunk_size = 64 * 1024
+# Compressor can hold some data that isn't written to the part yet, so gzip parts are closed a bit before the limit.
+gzip_margin = 256 * 1024
+
+
+def _read_chunks(file_path: str) -> Iterator[bytes]:
+    """Yields file data in chunks, decompressed if it's a .gz file."""
+
+    with (gzip.open if file_path.endswith('.gz') else open)(file_path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def _get_data_size(file_path: str) -> int:
+    """File size, or decompressed size if .gz file (read from the gzip trailer, doesn't decompress the file)."""
+
+    if not file_path.endswith('.gz'):
+        return os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        file.seek(-4, os.SEEK_END)
+        # Size is stored mod 2^32, compressed size is a lower limit for logs over 4GB.
+        return max(int.from_bytes(file.read(4), 'little'), os.path.getsize(file_path))
+
+
+def _build_parts(chunks: Iterable[bytes], limit: int, compress: bool = False) -> Iterator[bytes]:
+    """
+    Splits data into parts of at most limit bytes, on line breaks. Only one part is kept in memory at a time.
+
+    Args:
+        chunks: Data chunks.
+        limit int: Max bytes per part.
+        compress bool(False): Gzip each part, limit is for compressed size.
+
+    Yields:
+        bytes: Part data.
+    """
+
+    buffer = io.BytesIO()
+    compressor = None
+    data_in_part = 0
+    part_limit = max(limit - gzip_margin, limit // 2) if compress else limit
+
+    def write(data: bytes) -> None:
+        nonlocal compressor, data_in_part
+        if compress:
+            if compressor is None:
+                compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip header and trailer.
+            buffer.write(compressor.compress(data))
+        else: buffer.write(data)
+        data_in_part += len(data)
+
+    def finish_part() -> bytes:
+        nonlocal buffer, compressor, data_in_part
+        if compressor:
+            buffer.write(compressor.flush())
+        part = buffer.getvalue()
+        buffer, compressor, data_in_part = io.BytesIO(), None, 0
+        return part
+
+    def add(data: bytes) -> Iterator[bytes]:
+        while data:
+            if compress:
+                write(data)
+                if buffer.tell() >= part_limit:
+                    yield finish_part()
+                return
+
+            if len(data) <= (room := part_limit - data_in_part):
+                write(data)
+                return
+            # Fills part up to the last line break that fits. Starts a new part if not even one line fits,
+            # and if a single line is bigger than a whole part, it gets cut.
+            if (cut := data.rfind(b'\n', 0, room) + 1) == 0:
+                if data_in_part:
+                    yield finish_part()
+                    continue
+                cut = room
+            write(data[:cut])
+            data = data[cut:]
+            yield finish_part()
+
+    pending = b''  # Data of a line that hasn't ended yet.
+    for chunk in chunks:
+        data = pending + chunk
+        # Only whole lines are added, so lines don't get cut in half between parts.
+        line_end = data.rfind(b'\n') + 1
+        data, pending = data[:line_end], data[line_end:]
+        yield from add(data)
+
+    yield from add(pending)
+    if data_in_part:
+        yield finish_part()
+
+
+def _part_name(filename: str, index: int, single: bool, compress: bool) -> str:
+    """latest.log -> latest.log, or latest.part1.log, latest.part2.log, ... (.gz added if compressed)"""
+
+    name, extension = os.path.splitext(filename)
+    extension = (extension or '.txt') + ('.gz' if compress else '')
+    return name + extension if single else f"{name}.part{index}{extension}"
+
+
+async def send_chunks(chunks: Iterable[bytes], filename: str, data_size: int = None) -> Union[int, bool]:
+    """
+    Uploads data to Discord as file attachment(s), split into parts if bigger than discord_upload_limit.
+
+    Args:
+        chunks: Data to send, read in a separate thread so file reading/decompressing doesn't block the bot.
+        filename str: Attachment name, e.g. 'server.log'.
+        data_size int(None): Total size if known, used to decide if parts need to be compressed to fit in discord_upload_max_parts.
+
+    Returns:
+        int, bool: Number of parts sent, or False if there was a problem.
+    """
+
+    limit = config.get_config('discord_upload_limit')
+    max_parts = config.get_config('discord_upload_max_parts')
+    compress = data_size is not None and data_size > limit * max_parts
+
+    parts = _build_parts(chunks, limit, compress)
+    sent = 0
+    try:
+        # Builds next part before sending current one, so a file that fits in one part doesn't get named 'part1'.
+        part = await asyncio.to_thread(next, parts, None)
+        while part is not None:
+            if sent >= max_parts:
+                await backend.send_msg(f"**NOTE:** Only sent first {sent} parts of `{filename}`, file is too big.")
+                break
+            next_part = await asyncio.to_thread(next, parts, None)
+            name = _part_name(filename, sent + 1, not sent and next_part is None, compress)
+            await backend.send_msg(file=discord.File(io.BytesIO(part), name))
+            part, sent = next_part, sent + 1
+    except Exception as e:
+        lprint(f"ERROR: Problem sending file {filename}: {e}")
+        return False
+    finally:
+        parts.close()
+
+    return sent
+
+
+async def send_lines(lines: List[str], filename: str) -> Union[int, bool]:
+    """
+    Sends lines as a text file attachment, split into parts if needed.
+    Lines are encoded one at a time instead of joining them into one big string first.
+
+    Args:
+        lines list: Lines to send, without line breaks.
+        filename str: Attachment name.
+
+    Returns:
+        int, bool: Number of parts sent, or False if there was a problem.
+    """
+
+    def chunks() -> Iterator[bytes]:
+        batch, batch_size = [], 0
+        for line in lines:
+            batch.append(data := (line + '\n').encode('utf-8', errors='replace'))
+            if (batch_size := batch_size + len(data)) >= chunk_size:
+                yield b''.join(batch)
+                batch, batch_size = [], 0
+        if batch:
+            yield b''.join(batch)
+
+    return await send_chunks(chunks(), filename)
+
+
+async def send_file(file_path: str, filename: str = None) -> Union[int, bool]:
+    """
+    Sends a file as attachment(s), .gz files are decompressed while sending.
+
+    Args:
+        file_path str: File to send.
+        filename str(None): Attachment name, defaults to file name (without .gz).
+
+    Returns:
+        int, bool: Number of parts sent, or False if file can't be read or there was a problem.
+    """
+
+    try: data_size = _get_data_size(file_path)
+    except OSError as e:
+        lprint(f"ERROR: Unable to read file {file_path}: {e}")
+        return False
+
+    filename = filename or os.path.basename(file_path).removesuffix('.gz')
+    return await send_chunks(_read_chunks(file_path), filename, data_size)
@@ -0,0 +1,77 @@
+"""
+Online player list kept up to date from join/leave game events, so Backend.get_players() doesn't have to send 'list'
+and parse its output every time a panel or status page is opened.
+
+Roster is only trusted once it's been synced with a 'list' command (or server was seen starting, which means nobody is on),
+and gets synced again every player_roster_sync_time seconds in case an event was missed (e.g. bot was restarted).
+If server API can't give game events (no console output and no server files access), get_players() always uses 'list'.
+"""
+
+import re
+import time
+from typing import Union, List, Tuple
+
+from bot_files import server_events
+from bot_files.server_events import Game_Event
+
+
+class Player_Roster:
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.players = {}  # Lowercase name: Name, in order they joined.
+        self.max_players = None  # From last 'list' output.
+        self.live = False  # Server API is giving game events, see Server_API.add_line_listener().
+        self.synced_at = None  # time.monotonic() of last sync, None if roster isn't known.
+
+    def is_current(self, sync_time: float) -> bool:
+        """
+        Args:
+            sync_time float: Max seconds since last sync.
+
+        Returns:
+            bool: Roster can be used without sending 'list'.
+        """
+
+        return self.live and self.synced_at is not None and time.monotonic() - self.synced_at < sync_time
+
+    def on_event(self, event: Game_Event) -> None:
+        """Updates roster from game event."""
+
+        if event.type == server_events.PLAYER_JOIN:
+            self.players[event.player.lower()] = event.player
+        elif event.type == server_events.PLAYER_LEAVE:
+            self.players.pop(event.player.lower(), None)
+        elif event.type == server_events.SERVER_STARTED:
+            # Nobody can be on a server that just finished starting.
+            self.players, self.synced_at = {}, time.monotonic()
+        elif event.type == server_events.SERVER_STOPPING:
+            self.players, self.synced_at = {}, None
+
+    def sync(self, player_names: List[str], text: str) -> None:
+        """
+        Replaces roster with players from 'list' output.
+
+        Args:
+            player_names list: Names from utils.parse_players_output().
+            text str: 'There are 2 of a max of 20 players online' part of output.
+        """
+
+        self.players = {i.strip().lower(): i.strip() for i in player_names if i.strip()}
+        # 'There are 2 of a max of 20 players online', or 'There are 2/20 players online' in 1.12 and lower.
+        if match := re.search(r'max of (\d+)|\d+/(\d+)', text or ''):
+            self.max_players = int(match.group(1) or match.group(2))
+        self.synced_at = time.monotonic()
+
+    def get_players(self) -> Union[Tuple[List[str], str], None]:
+        """
+        Same format as utils.parse_players_output().
+
+        Returns:
+            tuple, None: Player names and 'There are X of a max of X players online' text, or None if no players online.
+        """
+
+        if not self.players:
+            return None
+        text = f"There are {len(self.players)} of a max of {self.max_players} players online" if self.max_players \
+            else f"There are {len(self.players)} players online"
+        return list(self.players.values()), text
@@ -5,8 +5,8 @@ Inside Backend object there is the _change_server_api() function,
 For example, if the 'bot_use_tmux' config is True, _change_server_api() will use a new instance of 'Server_API_Tmux'.
 I'm using Python class inheritance, it works by override certain functions in base 'Server_API' class.
 Each Server_API_X class should have its own send_command() with its own way to interact with the server.
-For example, in Server_API_Tmux it uses os.system() to send commands to a tmux pane containing the server console,
-  and in Server_API_Rcon, it uses the mctools module to send the command using RCON.
+For example, in Server_API_Tmux it uses a tmux control mode client to send commands to a tmux pane containing the server console,
+  and in Server_API_Rcon, it uses a pool of persistent RCON connections (server_rcon.py) to send the command.
 The functions starting with '_' are expected to be overridden in the inheritance of Server_API.
 
 Following functions must be async:
@@ -17,17 +17,20 @@ Following functions must be async:
 
 import os
 import json
+import time
+import shlex
 import aiohttp
 import asyncio
 import requests
-import subprocess
 from collections import deque
 from typing import Union, Any, Callable, Tuple, List
 
-import mctools
-
 from bot_files.slime_config import config
-from bot_files.slime_utils import lprint, utils, file_utils
+from bot_files.server_rcon import Rcon_Pool
+from bot_files.server_queue import Command_Queue
+from bot_files.server_console import Console_Stream, Tmux_Control, Screen_Control
+from bot_files.server_log import Log_Tailer, Log_Index, search_logs
+from bot_files.slime_utils import lprint, utils, file_utils, Keyword_Matcher
 
 
 class Server_Update:
@@ -157,6 +160,67 @@ class Server_Update:
     def get_bukkit_url(self): pass
 
 
+class Server_Reachability:
+    """
+    Remembers if server console was reachable, so check_before_command doesn't send a check command before every command.
+    Reachable is trusted for 'reachable_cache_time' seconds after a successful check,
+      and stays trusted while the server keeps printing to console or latest.log (passive check, no command needed).
+    After 'reachable_fail_threshold' failed checks in a row, it fails fast without checking for 'reachable_retry_time' seconds,
+      then lets one check through to see if server is back. New server output also lets a check through early.
+    """
+
+    def __init__(self, cache_time: float = 30, fail_threshold: int = 2, retry_time: float = 30):
+        self.cache_time = cache_time
+        self.fail_threshold = max(1, fail_threshold)
+        self.retry_time = retry_time
+
+        self.state = 'unknown'  # unknown, reachable, unreachable.
+        self.checked_at = 0  # time.monotonic() of last successful check.
+        self.failures = 0  # Failed checks in a row.
+        self.opened_at = 0  # When it became unreachable.
+        self.retry_at = 0  # While unreachable, don't check again until after this time.
+
+    def get_status(self, output_age: float = None) -> Union[bool, None]:
+        """
+        Gets reachable status without sending anything to server.
+
+        Args:
+            output_age float(None): Seconds since server last printed something, None if unknown.
+
+        Returns:
+            bool, None: Cached status, or None if server needs to be checked.
+        """
+
+        now = time.monotonic()
+        if self.state == 'reachable':
+            if now - self.checked_at < self.cache_time or (output_age is not None and output_age < self.cache_time):
+                return True
+        elif self.state == 'unreachable' and now < self.retry_at:
+            # Unless server printed something since it became unreachable, it might be back up.
+            if output_age is None or now - output_age <= self.opened_at:
+                return False
+
+        return None
+
+    def record(self, reachable: bool) -> None:
+        """Updates state with result from server_console_reachable() or a failed send_command()."""
+
+        if reachable:
+            self.state, self.checked_at, self.failures = 'reachable', time.monotonic(), 0
+            return
+
+        self.failures += 1
+        if self.failures >= self.fail_threshold:
+            self.state, self.opened_at = 'unreachable', time.monotonic()
+            self.retry_at = self.opened_at + self.retry_time
+        else: self.state = 'unknown'
+
+    def reset(self) -> None:
+        """Forget state, e.g. when server is stopped or started."""
+
+        self.state, self.checked_at, self.failures, self.opened_at, self.retry_at = 'unknown', 0, 0, 0, 0
+
+
 class Server_API(Server_Update):
     """
     Depending on configs, using class inheritance relevant functions will be updated.
@@ -173,6 +237,22 @@ class Server_API(Server_Update):
         self.last_check_number = ''
         self.last_command_sent = ''
         self.last_command_output = ''
+        self.server_subprocess = None  # asyncio Process, if server was started as subprocess of bot.
+        self.subprocess_readers = []
+        # If API can capture server console output, command output can be found in memory instead of server log.
+        self.console = None  # Console_Stream
+        self.console_mark = 0  # console.line_count from before the last command was sent.
+        self.reachability = Server_Reachability(config.get_config('reachable_cache_time'),
+                                                config.get_config('reachable_fail_threshold'),
+                                                config.get_config('reachable_retry_time'))
+        self._reachable_lock = asyncio.Lock()  # Only one reachable check at a time, others use its result.
+        # Commands from Backend go through this queue, so they're sent one at a time, see server_queue.py.
+        self.command_queue = Command_Queue(config.get_config('commands_per_second'))
+
+        # Recent latest.log lines kept in memory for read_server_log(), started on first use.
+        self.server_log_filepath = config.get_config('server_log_filepath')
+        self.log_tailer = None
+        self.log_index = None
 
         # Set server launch path depending on config.
         self.launch_path = config.get_config('server_path')
@@ -197,6 +277,62 @@ class Server_API(Server_Update):
 
         return False
 
+    async def send_batch(self, commands: List[str], keywords: List[str] = None) -> List[Union[str, bool]]:
+        """
+        Send multiple commands in one go, then gets all their outputs from console or server log in a single pass.
+
+        Args:
+            commands list: Commands to send.
+            keywords list(None): Keyword for each command to find its output line in log, use None to skip a command.
+
+        Returns:
+            list: Result for each command. Output line if keyword was given and found, else bool if sent.
+        """
+
+        batch_mark = self.console.line_count if self.console else 0
+        results = [bool(await self.send_command(command)) for command in commands]
+        if not keywords or not any(results):
+            return results
+
+        search = [i for i in keywords if i]
+        if self.console:
+            # Waits for each command's output line at the same time, all share the same timeout.
+            await asyncio.gather(*[self.console.wait_for(i, after=batch_mark, timeout=config.get_config('command_buffer_time')) for i in search])
+            log_data = self.console.search(search, after=batch_mark, find_all=True)
+        elif config.get_config('server_files_access'):
+            await asyncio.sleep(config.get_config('command_buffer_time'))
+            log_data = await self.read_server_log(search=search, lines=config.get_config('log_lines_limit'),
+                                                  find_all=True, stopgap_str=self.last_check_number or None)
+        else: return results
+
+        # Uses most recent matching line for each command.
+        for line in reversed(log_data or []):
+            for index, keyword in enumerate(keywords):
+                if keyword and results[index] is True and keyword.lower() in line.lower():
+                    results[index] = line
+                    break
+
+        return results
+
+    async def send_command_output(self, command: str, keyword: Union[str, List] = None, extra_lines: int = 0,
+                                  all_lines: bool = False) -> Union[List, bool]:
+        """
+        Sends command and gets its output. Should run as one Command_Queue job, so no other command is sent before output is read.
+
+        Args:
+            command str: Command to send.
+            keyword str, list(None): Keyword(s) to find output line, see get_command_output().
+            extra_lines int(0): Also get X lines after match, for multi-lined outputs.
+            all_lines bool(False): Get all matching lines instead of only the first.
+
+        Returns:
+            list, bool: Output lines (empty if none found), or False if command couldn't be sent.
+        """
+
+        if not await self.send_command(command):
+            return False
+        return await self.get_command_output(keyword, extra_lines, all_lines=all_lines) or []
+
     # Check if server console is reachable.
     async def server_console_reachable(self) -> Union[bool, None]:
         """
@@ -206,7 +342,16 @@ class Server_API(Server_Update):
             bool: Console reachable.
         """
 
-        if config.get_config('server_files_access'):
+        if self.console:
+            check_command, unique_number = utils.get_check_command()
+            mark = self.console.line_count
+            if await self.send_command(check_command):
+                # Tmux and screen also capture the typed command, which has the number too, even if server isn't running.
+                # Server's reply to it (e.g. '[12:34:56] [Server thread/INFO]: xp 0.123<--[HERE]') is a logged line.
+                if await self.wait_console_output(unique_number, mark, server_only=True) is not False:
+                    self.last_check_number = unique_number
+                    return True
+        elif config.get_config('server_files_access'):
             check_command, unique_number = utils.get_check_command()  # Custom command to send with unique number.
             if await self.send_command(check_command):
                 if await self.get_command_output(unique_number, check_number=unique_number) is not False:  # Check logs for unique number.
@@ -216,15 +361,58 @@ class Server_API(Server_Update):
 
         return False
 
+    async def check_console_reachable(self, force: bool = False) -> Union[bool, None]:
+        """
+        Same as server_console_reachable(), but uses cached status from self.reachability when it can.
+
+        Args:
+            force bool(False): Always send check command, ignoring cached status.
+
+        Returns:
+            bool, None: Console reachable, None if unable to check.
+        """
+
+        async with self._reachable_lock:
+            if not force and (status := self.reachability.get_status(self.server_output_age())) is not None:
+                return status
+
+            # Check command and reading its output is one job, so other commands can't get sent in between.
+            status = await self.command_queue.submit(self.server_console_reachable, Command_Queue.STATUS, key='server_console_reachable')
+            if status is not None:
+                self.reachability.record(status)
+            return status
+
+    def server_output_age(self) -> Union[float, None]:
+        """
+        Seconds since server last printed something to console, or wrote to latest.log.
+
+        Returns:
+            float, None: Seconds, or None if unknown.
+        """
+
+        if self.console:
+            if self.console.last_server_line_time:
+                return time.monotonic() - self.console.last_server_line_time
+        elif config.get_config('server_files_access'):
+            try: return time.time() - os.path.getmtime(self.server_log_filepath)
+            except OSError: pass
+
+        return None
+
     # Get output from the last issued command.
-    async def get_command_output(self, keyword: str = None, extra_lines: int = 0, check_number: str = None, all_lines=False) -> Union[str, bool]:
+    async def get_command_output(self, keyword: Union[str, List] = None, extra_lines: int = 0, check_number: str = None, all_lines=False) -> Union[str, bool]:
         """
         Gets response from last command.
+        keyword can be a list of keywords, lines matching any of them are returned (see Keyword_Matcher).
 
         Returns:
             str: Response from last command issued.
         """
 
+        # Waits for output in captured console lines that came after the command was sent.
+        if self.console:
+            return await self.wait_console_output(keyword, self.console_mark, extra_lines=extra_lines, find_all=all_lines)
+
         # Can only get command output from server log if there's a check number (e.g. xp 0.45151...).
         # If there's no unique number to use as a stopgap the bot might return the output from a prior command.
         if not check_number and not self.last_check_number:
@@ -237,6 +425,34 @@ class Server_API(Server_Update):
 
         return False
 
+    async def wait_console_output(self, search: Union[str, List, None], after: int, extra_lines: int = 0,
+                                  find_all: bool = False, timeout: float = None, server_only: bool = False) -> Union[List, bool]:
+        """
+        Returns as soon as a matching line shows up in console, instead of always waiting command_buffer_time.
+
+        Args:
+            search str, list: Keyword(s) to find.
+            after int: console.line_count from before the command was sent.
+            extra_lines int(0): Also wait for and return X lines after the match, for multi-lined outputs.
+            find_all bool(False): Return all matches, waits until console goes quiet after the first one.
+            timeout float(None): Max seconds to wait, defaults to command_buffer_time config.
+            server_only bool(False): Only match lines logged by server, not echoed input.
+
+        Returns:
+            list, bool: Matched lines, or False if nothing matched before timeout.
+        """
+
+        timeout = config.get_config('command_buffer_time') if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if await self.console.wait_for(search, after=after, timeout=timeout, server_only=server_only) is False:
+            return False
+
+        # Rest of a multi-lined output usually comes right after the first line.
+        if extra_lines or find_all:
+            await self.console.wait_quiet(timeout=max(0, deadline - time.monotonic()))
+
+        return self.console.search(search, after=after, extra_lines=extra_lines, find_all=find_all, server_only=server_only) or False
+
     # ===== Server Files
     async def read_server_log(self, search: str = None, lines: int = 15, extra_lines: int = 0,
                               find_all: bool = False, stopgap_str: str = None,
@@ -261,7 +477,12 @@ class Server_API(Server_Update):
 
         if not isinstance(search, list): search = [search]
 
-        file_path = config.get_config('server_log_filepath')  # server.properties file as default file.
+        # Most lookups can be answered from lines already in memory.
+        if not top_down_mode and (log_tailer := self.get_log_tailer()):
+            if (matched_lines := log_tailer.query(search, lines, extra_lines, find_all, stopgap_str)) is not None:
+                return matched_lines
+
+        file_path = self.server_log_filepath
         if not file_utils.test_file(file_path):
             return False
 
@@ -269,11 +490,17 @@ class Server_API(Server_Update):
         matched_lines = []
 
         # Changes function to read file if reading bottom up or top down.
-        read_log_lines = file_utils.read_file_generator if top_down_mode else file_utils.read_file_reverse_generator
+        if top_down_mode:
+            log_lines = file_utils.read_file_generator(file_path)
+        # Reverse reader can skip lines that don't match, unless extra lines are needed.
+        elif search[0] is not None and not extra_lines:
+            log_lines = file_utils.read_file_reverse_generator(file_path, search=search, stopgap_str=stopgap_str)
+        else: log_lines = file_utils.read_file_reverse_generator(file_path)
         _extra_lines = deque(maxlen=extra_lines + 1)
-        for line in read_log_lines(file_path):
+        matcher = Keyword_Matcher.get(search)
+        for line in log_lines:
             # If None search, will return all lines. Else, checks if line matches any of search keywords.
-            if search[0] is None or any([str(s).lower() in line.lower() for s in search]):
+            if matcher.search(line):
                 matched_lines.append(line)
                 if not find_all:
                     break  # find_all = True means find all occurrences in file.
@@ -287,31 +514,132 @@ class Server_API(Server_Update):
 
         return list(reversed(matched_lines + list(_extra_lines)))
 
-    async def server_subprocess_start(self) -> bool:
+    async def read_log_category(self, category: str, lines: int = 20) -> Union[List, bool]:
+        """
+        Gets most recent latest.log lines of a category, using Log_Index instead of searching whole file.
+
+        Args:
+            category str: chat, connections, commands, warnings, or errors.
+            lines int(20): Max number of lines.
+
+        Returns:
+            list, bool: Lines oldest first, or False if no server files access or unable to read file.
+        """
+
+        if not config.get_config('server_files_access'):
+            return False
+
+        if self.log_index is None:
+            self.log_index = Log_Index(self.server_log_filepath)
+        # First time indexes whole file, so don't block bot while it does.
+        return await asyncio.to_thread(self.log_index.get_lines, category, lines)
+
+    async def search_all_logs(self, search: Union[str, List], lines: int = 20, match_all: bool = False) -> Union[List, bool]:
+        """
+        Like read_server_log(), but also searches older logs (logs/*.log.gz), newest first until it finds enough lines.
+
+        Args:
+            search str, list: Keyword(s) to find.
+            lines int(20): Number of most recent matching lines to return.
+            match_all bool(False): Line must contain all keywords, instead of any.
+
+        Returns:
+            list, bool: Matched lines oldest first, each file's lines start with a '=== file name' line. False if no server files access.
+        """
+
+        if not config.get_config('server_files_access'):
+            return False
+        if not isinstance(search, list): search = [search]
+
+        found = []  # Lines from each file, newest file first.
+        remaining = lines
+        async for file_name, file_lines in search_logs(os.path.dirname(self.server_log_filepath), search, lines, match_all):
+            if not file_lines:
+                continue
+            file_lines = file_lines[-remaining:]
+            found.append([f"=== {file_name}"] + file_lines)
+            if (remaining := remaining - len(file_lines)) <= 0:
+                break  # Other files get canceled.
+
+        return [line for file_lines in reversed(found) for line in file_lines]
+
+    def add_line_listener(self, listener: Callable[[str], None]) -> bool:
+        """
+        Calls listener with every new server output line, e.g. Event_Bus feeder for game events.
+        Uses captured console output if API has it, else follows latest.log. Only one of them, so lines aren't seen twice.
+
+        Args:
+            listener: Function that takes a line. Adding the same function again does nothing.
+
+        Returns:
+            bool: False if API has no console output and no server files access.
+        """
+
+        if self.console is not None:
+            console = self.console
+        elif log_tailer := self.get_log_tailer():
+            console = log_tailer.console
+        else: return False
+
+        if listener not in console.listeners:
+            console.listeners.append(listener)
+        return True
+
+    def get_log_tailer(self) -> Union[Log_Tailer, None]:
         """
+        Gets Log_Tailer for server's latest.log, starts it if not already. Needs running event loop.
 
         Returns:
+            Log_Tailer, None: None if no server files access, or disabled by log_buffer_lines config.
+        """
+
+        if not config.get_config('server_files_access') or not config.get_config('log_buffer_lines'):
+            return None
 
+        if self.log_tailer is None:
+            self.log_tailer = Log_Tailer(self.server_log_filepath, config.get_config('log_buffer_lines'))
+        self.log_tailer.start()
+        return self.log_tailer
+
+    async def server_subprocess_start(self) -> bool:
+        """
+        Runs Minecraft server as an asyncio subprocess. Note, If this bot stops, the server will stop.
+        Server's stdout and stderr are continuously read in the background into self.console.
+
+        Returns:
+            bool: If subprocess started.
         """
 
-        os.chdir(self.launch_path)
-        # Runs MC server as subprocess. Note, If this script stops, the server will stop.
+        if self.server_subprocess and self.server_subprocess.returncode is None:
+            lprint("INFO: Server subprocess already running.")
+            return True
+
+        if self.console is None:
+            self.console = Console_Stream(config.get_config('console_buffer_lines'))
+
+        pipes = {'stdin': asyncio.subprocess.PIPE, 'stdout': asyncio.subprocess.PIPE, 'stderr': asyncio.subprocess.PIPE}
         try:
             if config.get_config('windows_compatibility'):
-                self.server_subprocess = subprocess.Popen(self.launch_command, shell=True)
+                self.server_subprocess = await asyncio.create_subprocess_shell(self.launch_command, cwd=self.launch_path, **pipes)
             else:
-                self.server_subprocess = subprocess.Popen(
-                    self.launch_command.split(),
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-        except: lprint("ERROR: Problem starting server subprocess")
-
-        if isinstance(self.server_subprocess, subprocess.Popen):
-            return True
+                self.server_subprocess = await asyncio.create_subprocess_exec(*shlex.split(self.launch_command), cwd=self.launch_path, **pipes)
+        except (OSError, ValueError):
+            lprint("ERROR: Problem starting server subprocess")
+            return False
 
-        return False
+        self.subprocess_readers = [asyncio.create_task(self._read_subprocess_output(i))
+                                   for i in (self.server_subprocess.stdout, self.server_subprocess.stderr)]
+        return True
+
+    async def _read_subprocess_output(self, stream: asyncio.StreamReader) -> None:
+        """Feeds server subprocess output into self.console until subprocess exits."""
+
+        while True:
+            try: line = await stream.readline()
+            except ValueError: continue  # Line longer than stream buffer limit, gets discarded.
+            if not line:
+                break
+            self.console.feed(line.decode('utf-8', errors='replace'))
 
     async def server_start(self) -> bool:
         """
@@ -331,8 +659,16 @@ class Server_API(Server_Update):
             bool: Sent stop command (Not same as successful stopped).
         """
 
+        self.reachability.reset()
         return await self.send_command('stop')
 
+    async def close(self) -> None:
+        """Cleans up open connections or tasks when switching to a different server API. Does not stop the server."""
+
+        await self.command_queue.close()
+        if self.log_tailer:
+            self.log_tailer.stop()
+
 
 class Server_API_Tmux(Server_API):
     def __init__(self):
@@ -340,6 +676,9 @@ class Server_API_Tmux(Server_API):
 
         self.current_api = 'Tmux'
         self.tmux = f"{config.get_config('server_tmux_name')}:{config.get_config('server_tmux_pane')}"
+        # Persistent tmux control mode client, also captures server pane output so it doesn't need latest.log.
+        self.console = Console_Stream(config.get_config('console_buffer_lines'))
+        self.tmux_control = Tmux_Control(config.get_config('server_tmux_name'), self.tmux, self.console)
 
     async def send_command(self, command: str) -> bool:
         """
@@ -349,10 +688,11 @@ class Server_API_Tmux(Server_API):
             command: Command to send.
 
         Returns:
-            bool: If os.system() command was successful (not if MC command was successful).
+            bool: If tmux accepted the keys (not if MC command was successful).
         """
 
-        if os.system(f"tmux send-keys -t {self.tmux} '{command}' ENTER"):
+        self.console_mark = self.console.line_count
+        if not await self.tmux_control.send_keys(command):
             lprint(f"ERROR: Problem sending command to Tmux: {self.tmux} > {command}")
             return False
 
@@ -363,25 +703,29 @@ class Server_API_Tmux(Server_API):
         Start server in specified Tmux pane.
 
         Returns:
-            bool: If os.system() was successful.
+            bool: If tmux accepted the keys.
         """
 
         if utils.start_tmux_session(config.get_config('server_tmux_name')) is False:
             return False
 
         # If failed to change current working directory.
-        if os.system(f"tmux send-keys -t {self.tmux} 'cd {self.launch_path}' ENTER"):
+        if not await self.tmux_control.send_keys(f"cd {self.launch_path}"):
             lprint(f"ERROR: Unable to change to server launch path with Tmux {self.tmux} > {self.launch_path}")
             return False
 
         # Starts server in tmux pane.
-        if os.system(f"tmux send-keys -t {self.tmux} '{self.launch_command}' ENTER"):
+        if not await self.tmux_control.send_keys(self.launch_command):
             lprint(f"ERROR: Problem launching server with Tmux: {self.tmux} > {self.launch_command}")
             return False
 
         lprint(f"INFO: Started Minecraft in Tmux session: {self.tmux} > {self.launch_command}")
         return True
 
+    async def close(self) -> None:
+        await super().close()
+        await self.tmux_control.close()
+
 
 class Server_API_Screen(Server_API):
     def __init__(self):
@@ -389,6 +733,9 @@ class Server_API_Screen(Server_API):
 
         self.current_api = 'Screen'
         self.screen_name = config.get_config('server_screen_name')
+        # Captures server console output using screen's logfile, so it doesn't need latest.log.
+        self.console = Console_Stream(config.get_config('console_buffer_lines'))
+        self.screen_control = Screen_Control(self.screen_name, config.get_config('server_screen_log_filepath'), self.console)
 
     async def send_command(self, command: str) -> bool:
         """
@@ -398,10 +745,11 @@ class Server_API_Screen(Server_API):
             command: Command to send.
 
         Returns:
-            bool: If os.system() command was successful (not if MC command was successful).
+            bool: If screen command was successful (not if MC command was successful).
         """
 
-        if os.system(f"screen -S {self.screen_name} -X stuff '{command}^M'"):
+        self.console_mark = self.console.line_count
+        if not await self.screen_control.stuff(command):
             lprint(f"ERROR: Problem sending command to screen: {self.screen_name} > {command}")
             return False
 
@@ -412,23 +760,35 @@ class Server_API_Screen(Server_API):
         Start server in specified screen session.
 
         Returns:
-            bool: If os.system() was successful.
+            bool: If screen session was started.
         """
 
-        os.chdir(self.launch_path)
-        if os.system(f"screen -dmS '{self.screen_name}' {self.launch_command}"):
+        try:
+            proc = await asyncio.create_subprocess_exec('screen', '-dmS', self.screen_name, *shlex.split(self.launch_command), cwd=self.launch_path)
+            if await proc.wait():
+                raise OSError
+        except OSError:
             lprint(f"ERROR: Could not start server with screen: {self.screen_name} > {self.launch_command}")
             return False
 
+        await self.screen_control.start_logging()
         lprint(f"INFO: Started Minecraft in screen session: {self.screen_name} > {self.launch_command}")
         return True
 
+    async def close(self) -> None:
+        await super().close()
+        await self.screen_control.close()
+
 
 class Server_API_Rcon(Server_API):
     def __init__(self):
         super().__init__()
 
         self.current_api = 'RCON'
+        # Keeps RCON connections open between commands, instead of reconnecting and logging in every time.
+        self.rcon_pool = Rcon_Pool(config.get_config('server_address'), config.get_config('rcon_port'), config.get_config('rcon_pass'),
+                                   size=config.get_config('rcon_pool_size'), timeout=config.get_config('rcon_timeout'),
+                                   keepalive_interval=config.get_config('rcon_keepalive_interval'))
 
     async def send_command(self, command: str) -> Union[str, bool]:
         """
@@ -441,22 +801,29 @@ class Server_API_Rcon(Server_API):
             str, bool: Output from RCON or False if error.
         """
 
-        rcon_data = f"address: {config.get_config('server_address')}, port: {config.get_config('rcon_port')}, pass: {config.get_config('rcon_pass')}"
-        # TODO possibly add persistent connection
-        server_rcon_client = mctools.RCONClient(config.get_config('server_address'), port=config.get_config('rcon_port'))
-        try:
-            server_rcon_client.login(config.get_config('rcon_pass'))  # Connect to server
-            self.last_command_output = server_rcon_client.command(command)  # Send command and get output.
-        except ConnectionError:
-            lprint(f"ERROR: Unable to connect with RCON: {rcon_data}")
+        response = await self.rcon_pool.command(command)
+        if response is False:
             return False
-        except mctools.mclient.RCONAuthenticationError:
-            lprint(f"ERROR: RCON Authentication error: {rcon_data}")
-        except:
-            lprint(f"ERROR: Unknown RCON issue: {rcon_data}")
-        else:
-            server_rcon_client.stop()  # Disconnect.
-            return self.last_command_output
+
+        self.last_command_output = response
+        return self.last_command_output
+
+    async def send_batch(self, commands: List[str], keywords: List[str] = None) -> List[Union[str, bool]]:
+        """
+        Pipelines commands over one RCON connection, RCON returns output directly so keywords aren't needed.
+
+        Args:
+            commands list: Commands to send.
+            keywords list(None): Not used.
+
+        Returns:
+            list: Output for each command, or False if error.
+        """
+
+        responses = await self.rcon_pool.commands(commands)
+        if responses and responses[-1] is not False:
+            self.last_command_output = responses[-1]
+        return responses
 
     async def get_command_output(self, keyword: str = None, extra_lines: int = 0, check_number: str = None, all_lines=False) -> Union[List, bool]:
         """
@@ -493,35 +860,86 @@ class Server_API_Rcon(Server_API):
     async def server_start(self):
         return await self.server_subprocess_start()
 
+    async def close(self) -> None:
+        await super().close()
+        await self.rcon_pool.close()
+
 
 class Server_API_Subprocess(Server_API):
-    def __init__(self):
+    def __init__(self, server_name: str = None):
+        """
+        Args:
+            server_name str(None): Server to run, defaults to selected server. Each server gets its own instance (see Server_Supervisor).
+        """
+
         super().__init__()
 
         self.current_api = 'Subprocess'
-        self.server_subprocess = None
+        self.server_name = server_name or config.server_name
+        self.console = Console_Stream(config.get_config('console_buffer_lines'))
+        self.stop_requested = False  # So Server_Supervisor knows the server exiting wasn't a crash.
+        self.on_exit = None  # Async callback, called with this object after server subprocess exits.
+        self.exit_watcher = None
+        self.started_at = 0  # time.time() subprocess was last started.
+
+        # Uses its own server configs, so it can be started without being the selected server.
+        server_configs = config.servers.get(self.server_name, config.server_configs)
+        self.launch_path = server_configs.get('server_launch_path') or server_configs['server_path']
+        self.launch_command = server_configs['server_launch_command']
+        self.server_log_filepath = server_configs['server_log_filepath']
+        if config.get_config('windows_compatibility'):
+            self.launch_command = f"{config.get_config('windows_cmdline_start')} {self.launch_command}"
+
+    async def send_command(self, command: str) -> bool:
+        """
+        Writes command to server subprocess stdin. Output is read from self.console by get_command_output().
+
+        Args:
+            command str: Command to send.
+
+        Returns:
+            bool: If command was written to stdin (not if MC command was successful).
+        """
 
-    # TODO be able to have multiple subprocess servers running and switch between them
-    async def send_command(self, command):
-        if not self.server_subprocess:
+        if not self.server_subprocess or self.server_subprocess.returncode is not None:
             return False
 
+        self.console_mark = self.console.line_count
         try:
             self.server_subprocess.stdin.write(bytes(command + '\n', 'utf-8'))
-            self.server_subprocess.stdin.flush()
-        except:
+            await self.server_subprocess.stdin.drain()
+        except (ConnectionError, RuntimeError):
+            lprint(f"ERROR: Problem sending command to server subprocess: {command}")
             return False
-        else:
-            self.last_command_output = self.server_subprocess.stdout.readline().decode('utf-8')
-            self.server_subprocess.wait()
 
         return True
 
     async def server_start(self) -> bool:
         """
+        Start server as subprocess of bot.
 
         Returns:
-
+            bool: If subprocess started (not same as successful startup).
         """
 
-        return await self.server_subprocess_start()
+        already_running = self.server_subprocess and self.server_subprocess.returncode is None
+        if not await self.server_subprocess_start():
+            return False
+
+        if not already_running:
+            self.stop_requested, self.started_at = False, time.time()
+            self.exit_watcher = asyncio.create_task(self._watch_subprocess(self.server_subprocess))
+        return True
+
+    async def server_stop(self) -> bool:
+        self.stop_requested = True
+        return await super().server_stop()
+
+    async def _watch_subprocess(self, process: asyncio.subprocess.Process) -> None:
+        """Waits for server subprocess to exit and finish printing, then calls on_exit callback."""
+
+        await process.wait()
+        await asyncio.gather(*self.subprocess_readers, return_exceptions=True)
+        lprint(f"INFO: Server subprocess exited ({self.server_name}): {process.returncode}")
+        if self.on_exit:
+            await self.on_exit(self)
@@ -0,0 +1,447 @@
+"""
+Ways to send input to, and capture output from, the Minecraft server console without going through latest.log.
+Console_Stream holds the most recent console lines, so command outputs can be looked up from memory.
+Each transport (e.g. Tmux_Control, Screen_Control) feeds the lines it captures into a Console_Stream.
+
+Tmux_Control keeps one 'tmux -C' (control mode) client attached to the server's tmux session.
+Commands are sent over that client instead of forking a new tmux process each time,
+and tmux sends back '%output' notifications with whatever gets printed to the server pane.
+
+Screen_Control sends commands with 'screen -X stuff' (without a shell), and has screen write the session output
+to a log file which File_Follower reads as it gets written to.
+"""
+
+import os
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Union, List
+
+from bot_files.slime_utils import lprint, utils, Keyword_Matcher
+
+
+class Console_Stream:
+    server_line_pattern = re.compile(r'\[\d{1,2}:\d{2}:\d{2}')
+
+    def __init__(self, maxlen: int = 1000):
+        self.lines = deque(maxlen=maxlen)
+        self.line_count = 0  # Total lines received, used to mark where a command's output starts.
+        self.last_line_time = 0  # time.monotonic() of last received line.
+        self.last_server_line_time = 0  # Same, but only for lines logged by the server, e.g. '[12:34:56 INFO]: ...'.
+        self._waiters = []  # [future, Keyword_Matcher, server_only] for wait_for().
+        self.listeners = []  # Functions called with every new line, e.g. Event_Bus feeder.
+
+    def feed(self, line: str) -> None:
+        """
+        Adds new console line, and hands it to any waiter looking for it.
+
+        Args:
+            line str: Console line, ANSI escape characters will be removed.
+        """
+
+        line = utils.remove_ansi(line).rstrip('\r\n')
+        # Console redrawing its prompt (e.g. '> \r[12:34:56 INFO]: ...' in screen's logfile), only what's after the last \r shows.
+        line = line.rsplit('\r', 1)[-1]
+        self.lines.append(line)
+        self.line_count += 1
+        self.last_line_time = time.monotonic()
+        # Shell echoes (e.g. tmux pane after server stopped) don't count as server activity.
+        if is_server_line := bool(self.server_line_pattern.match(line)):
+            self.last_server_line_time = self.last_line_time
+
+        for listener in self.listeners:
+            try: listener(line)
+            except Exception as e: lprint(f"ERROR: Console line listener: {e}")
+
+        if self._waiters:
+            for future, matcher, server_only in self._waiters:
+                if not future.done() and (is_server_line or not server_only) and matcher.search(line):
+                    future.set_result(line)
+
+    async def wait_for(self, search: Union[str, List, None] = None, after: int = None, timeout: float = None,
+                       server_only: bool = False) -> Union[str, bool]:
+        """
+        Wait for a line containing keyword(s).
+
+        Args:
+            search str, list(None): Keyword(s) to wait for. None for any line.
+            after int(None): Also check lines already received after this line_count.
+            timeout float(None): Seconds to wait before giving up.
+            server_only bool(False): Only match lines logged by server, not echoed input (e.g. the typed command in tmux/screen).
+
+        Returns:
+            str, bool: Matched line, or False if timed out.
+        """
+
+        if after is not None and (matched := self.search(search, after=after, server_only=server_only)):
+            return matched[0]
+
+        waiter = [asyncio.get_running_loop().create_future(), Keyword_Matcher.get(search), server_only]
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter[0], timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.remove(waiter)
+
+    async def wait_quiet(self, quiet_time: float = 0.1, timeout: float = 1) -> None:
+        """
+        Waits until no new lines have come in for quiet_time seconds, or until timeout.
+        Used to collect the rest of a multi-lined output.
+
+        Args:
+            quiet_time float(0.1): Seconds without new lines.
+            timeout float(1): Max seconds to wait.
+        """
+
+        deadline = time.monotonic() + timeout
+        while (now := time.monotonic()) < deadline:
+            since_last_line = now - self.last_line_time
+            if since_last_line >= quiet_time:
+                break
+            await asyncio.sleep(min(quiet_time - since_last_line, deadline - now))
+
+    def get_lines(self, after: int = 0) -> List[str]:
+        """
+        Get lines received after a certain point.
+
+        Args:
+            after int(0): Value of line_count to get lines after. E.g. line_count from before a command was sent.
+
+        Returns:
+            list: Lines, oldest first.
+        """
+
+        new_lines = self.line_count - after
+        if new_lines <= 0:
+            return []
+        return list(self.lines)[-new_lines:]
+
+    def search(self, search: Union[str, List, None] = None, after: int = 0, extra_lines: int = 0, find_all: bool = False,
+               server_only: bool = False) -> List[str]:
+        """
+        Find matching lines received after a certain point. Similar to read_server_log() but from memory.
+
+        Args:
+            search str, list(None): Keyword(s) to find. None returns all lines.
+            after int(0): Only check lines received after this line_count.
+            extra_lines int(0): Also return X lines that came after a match, for multi-lined outputs.
+            find_all bool(False): Return all matches instead of only the first.
+            server_only bool(False): Only match lines logged by server, see wait_for().
+
+        Returns:
+            list: Matched lines, oldest first.
+        """
+
+        matcher = Keyword_Matcher.get(search)
+        lines = self.get_lines(after)
+        matched_lines = []
+        index = 0
+        while index < len(lines):
+            if (not server_only or self.server_line_pattern.match(lines[index])) and matcher.search(lines[index]):
+                matched_lines += lines[index:index + extra_lines + 1]
+                if not find_all:
+                    break
+                index += extra_lines
+            index += 1
+
+        return matched_lines
+
+
+class Tmux_Control:
+    def __init__(self, session: str, target: str, console: Console_Stream):
+        """
+        Args:
+            session str: Tmux session name to attach to.
+            target str: Server console pane, e.g. 'slime_server:0.1'.
+            console Console_Stream: Where to put output from target pane.
+        """
+
+        self.session = session
+        self.target = target
+        self.console = console
+
+        self._proc = None
+        self._read_task = None
+        self._pane_id = None  # Tmux's unique pane ID (e.g. %3), used in %output notifications.
+        self._partial_line = b''
+        self._replies = deque()  # Futures for sent tmux commands, tmux replies to them in order.
+
+    @property
+    def connected(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None and self._read_task is not None and not self._read_task.done()
+
+    async def start(self) -> bool:
+        """
+        Attaches tmux control mode client to session.
+
+        Returns:
+            bool: If successfully attached.
+        """
+
+        if self.connected:
+            return True
+
+        try:
+            proc = await asyncio.create_subprocess_exec('tmux', 'display-message', '-p', '-t', self.target, '#{pane_id}',
+                                                        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+            self._pane_id = (await proc.communicate())[0].decode().strip()
+            if proc.returncode or not self._pane_id:
+                return False
+
+            self._proc = await asyncio.create_subprocess_exec('tmux', '-C', 'attach-session', '-t', self.session,
+                                                              stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                                                              stderr=asyncio.subprocess.DEVNULL)
+        except OSError:
+            lprint(f"ERROR: Unable to run tmux control mode: {self.target}")
+            return False
+
+        # Control mode wraps the reply to the initial attach-session in a %begin/%end block too.
+        attached = asyncio.get_running_loop().create_future()
+        self._replies.append(attached)
+        self._read_task = asyncio.create_task(self._read_loop())
+        try:
+            if await asyncio.wait_for(attached, timeout=5):
+                return True
+        except asyncio.TimeoutError: pass
+
+        await self.close()
+        return False
+
+    async def send_keys(self, text: str, enter: bool = True) -> bool:
+        """
+        Types text into target pane.
+
+        Args:
+            text str: Text to send, sent literally so quotes and special characters are safe.
+            enter bool(True): Also press enter.
+
+        Returns:
+            bool: If tmux accepted the command, False if text has a line break.
+        """
+
+        # A line break ends the command in control mode, the rest would run as another tmux command.
+        if '\n' in text or '\r' in text:
+            lprint(f"ERROR: Not sending text with line break to tmux: {text!r}")
+            return False
+
+        if not await self.start():
+            return False
+
+        commands = [f"send-keys -t {self.target} -l -- {self._quote(text)}"]
+        if enter: commands.append(f"send-keys -t {self.target} Enter")
+
+        loop = asyncio.get_running_loop()
+        replies = []
+        for command in commands:
+            replies.append(loop.create_future())
+            self._replies.append(replies[-1])
+            self._proc.stdin.write(command.encode('utf-8') + b'\n')
+
+        try:
+            await self._proc.stdin.drain()
+            return all(await asyncio.wait_for(asyncio.gather(*replies), timeout=5))
+        except (asyncio.TimeoutError, ConnectionError):
+            return False
+
+    async def close(self) -> None:
+        """Detaches control mode client. Does not affect tmux session or server."""
+
+        if self._read_task:
+            self._read_task.cancel()
+        if self._proc and self._proc.returncode is None:
+            try:
+                self._proc.stdin.close()
+                await asyncio.wait_for(self._proc.wait(), timeout=2)
+            except Exception:
+                self._proc.kill()
+        self._fail_replies()
+
+    def _quote(self, text: str) -> str:
+        """Quotes text to be used as an argument in tmux command."""
+
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('$', '\\$') + '"'
+
+    async def _read_loop(self) -> None:
+        """Handles tmux control mode notifications, and replies to sent commands."""
+
+        reply_ok = True
+        try:
+            while line := await self._proc.stdout.readline():
+                line = line.rstrip(b'\n')
+                if line.startswith(b'%output '):
+                    pane_id, _, data = line[8:].partition(b' ')
+                    if pane_id.decode() == self._pane_id:
+                        self._add_output(data)
+                elif line.startswith(b'%begin'):
+                    reply_ok = True
+                elif line.startswith(b'%error'):
+                    reply_ok = False
+                    lprint(f"ERROR: Tmux control mode: {self.target}")
+                elif line.startswith(b'%end') and self._replies:
+                    if not (reply := self._replies.popleft()).done():
+                        reply.set_result(reply_ok)
+                elif line.startswith(b'%exit'):
+                    break
+        finally:
+            self._fail_replies()
+
+    def _add_output(self, data: bytes) -> None:
+        """Unescapes %output data (characters below 32 and backslash are sent as octal, e.g. \\012), and feeds complete lines."""
+
+        data = self._partial_line + re.sub(rb'\\([0-7]{3})', lambda m: bytes([int(m.group(1), 8)]), data)
+        *lines, self._partial_line = data.split(b'\n')
+        for line in lines:
+            self.console.feed(line.decode('utf-8', errors='replace'))
+
+    def _fail_replies(self) -> None:
+        while self._replies:
+            if not (reply := self._replies.popleft()).done():
+                reply.set_result(False)
+
+
+class File_Follower:
+    def __init__(self, file_path: str, console: Console_Stream, poll_interval: float = 0.2):
+        """
+        Follows a file as it gets appended to (like 'tail -f'), and feeds new lines to a Console_Stream.
+
+        Args:
+            file_path str: File to follow.
+            console Console_Stream: Where to put new lines.
+            poll_interval float(0.2): Seconds between checking file for new data.
+        """
+
+        self.file_path = file_path
+        self.console = console
+        self.poll_interval = poll_interval
+
+        self._task = None
+        self._offset = None  # Byte position read up to. None means start from end of file.
+        self._inode = None
+        self._partial_line = b''
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self.read_new_data()
+            await asyncio.sleep(self.poll_interval)
+
+    def on_reset(self) -> None:
+        """Called when file was truncated or replaced (e.g. log rotated), before reading it from the top."""
+
+        pass
+
+    def read_new_data(self) -> None:
+        """Reads anything appended since last read. Starts from the top again if file was truncated or replaced."""
+
+        try: stat = os.stat(self.file_path)
+        except OSError: return
+
+        if self._offset is None:
+            self._offset = stat.st_size
+        elif stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._offset, self._partial_line = 0, b''
+            self.on_reset()
+        self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(self._offset)
+            data = self._partial_line + file.read(stat.st_size - self._offset)
+        self._offset = stat.st_size
+
+        *lines, self._partial_line = data.split(b'\n')
+        for line in lines:
+            self.console.feed(line.decode('utf-8', errors='replace'))
+
+
+class Screen_Control:
+    def __init__(self, screen_name: str, log_filepath: str, console: Console_Stream):
+        """
+        Sends input to a GNU screen session, and captures its output using screen's logfile feature.
+        Screen doesn't have a persistent control connection like tmux, so each command runs 'screen -X' directly (no shell),
+        with commands sent one at a time so they arrive in order.
+
+        Args:
+            screen_name str: Screen session name.
+            log_filepath str: Where screen will write session output.
+            console Console_Stream: Where to put captured output.
+        """
+
+        self.screen_name = screen_name
+        self.log_filepath = log_filepath
+        self.console = console
+
+        self._lock = asyncio.Lock()
+        self._logging = False
+        self.follower = File_Follower(log_filepath, console)
+
+    async def screen_command(self, *args: str) -> bool:
+        """
+        Runs screen command on session, e.g. screen_command('stuff', 'say hi').
+
+        Returns:
+            bool: If screen command was successful.
+        """
+
+        async with self._lock:
+            try:
+                proc = await asyncio.create_subprocess_exec('screen', '-S', self.screen_name, '-p', '0', '-X', *args,
+                                                            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+                return await proc.wait() == 0
+            except OSError:
+                return False
+
+    async def start_logging(self) -> bool:
+        """
+        Makes screen write session output to log_filepath (flushed immediately), and starts following it.
+
+        Returns:
+            bool: If logging enabled.
+        """
+
+        if not self._logging:
+            self._logging = all([await self.screen_command('logfile', self.log_filepath),
+                                 await self.screen_command('logfile', 'flush', '0'),
+                                 await self.screen_command('log', 'on')])
+        if self._logging:
+            self.follower.start()
+        return self._logging
+
+    async def stuff(self, text: str, enter: bool = True) -> bool:
+        """
+        Types text into screen session.
+
+        Args:
+            text str: Text to send. Backslashes, ^ and $ are escaped so screen doesn't interpret them.
+            enter bool(True): Also press enter.
+
+        Returns:
+            bool: If screen command was successful.
+        """
+
+        if not self._logging:
+            await self.start_logging()
+
+        text = text.replace('\\', '\\\\').replace('^', '\\^').replace('$', '\\$')
+        return await self.screen_command('stuff', text + ('\r' if enter else ''))
+
+    async def close(self) -> None:
+        """Stops following screen's log file. Does not affect screen session or server."""
+
+        self.follower.stop()
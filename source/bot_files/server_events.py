@@ -0,0 +1,161 @@
+"""
+Game events (player joined, chat message, death, etc) parsed from server output as it comes in, so the bot can react to
+them right away instead of sending commands like 'list' or re-reading latest.log to find out what happened.
+
+Lines come from the server API's Console_Stream (tmux, screen, subprocess), or the Log_Tailer following latest.log if the
+API can't capture console output, see Server_API.add_line_listener(). Each line is parsed into a Log_Record,
+and if it matches an event pattern a Game_Event is published to everything subscribed to that event type.
+
+Usage:
+    backend.events.subscribe(server_events.PLAYER_JOIN, on_join)  # on_join(event) can be a normal or async function.
+    backend.events.unsubscribe(on_join)
+"""
+
+import re
+import asyncio
+import inspect
+from typing import Union, List, Dict, Callable, Tuple
+
+from bot_files.server_log_record import Log_Record, parse_log_line
+from bot_files.slime_utils import lprint
+
+PLAYER_JOIN = 'player_join'
+PLAYER_LEAVE = 'player_leave'
+CHAT = 'chat'
+DEATH = 'death'
+ADVANCEMENT = 'advancement'
+SERVER_STARTED = 'server_started'
+SERVER_STOPPING = 'server_stopping'
+SERVER_LAG = 'server_lag'
+event_types = (PLAYER_JOIN, PLAYER_LEAVE, CHAT, DEATH, ADVANCEMENT, SERVER_STARTED, SERVER_STOPPING, SERVER_LAG)
+
+_name = r'(?P<player>[A-Za-z0-9_.]{1,16})'  # '.' for Bedrock players with Geyser/Floodgate.
+# Death messages start with player name followed by one of these, e.g. 'Steve was slain by Zombie', 'Steve fell from a high place'.
+_death_phrases = ('was slain', 'was shot', 'was killed', 'was blown up', 'was fireballed', 'was pummeled', 'was pricked',
+                  'was squashed', 'was squished', 'was impaled', 'was stung', 'was struck by lightning', 'was frozen',
+                  'was poked', 'was skewered', 'was obliterated', 'was roasted', 'was doomed', 'was burnt', 'was burned',
+                  'was speared', 'drowned', 'died', 'blew up', 'burned to death', 'fell ', 'hit the ground', 'experienced kinetic energy',
+                  'went up in flames', 'walked into', 'tried to swim in lava', 'discovered the floor was lava', 'suffocated',
+                  'starved to death', 'withered away', 'froze to death', 'left the confines', "didn't want to live",
+                  'went off with a bang', 'was too soft')
+# (Event type, pattern). Checked in order, patterns match the message part of the log line (without time and thread).
+_event_patterns = (
+    (CHAT, re.compile(r'(?:\[Not Secure\] )?<' + _name + r'> (?P<text>.*)')),
+    (PLAYER_JOIN, re.compile(_name + r' joined the game$')),
+    (PLAYER_LEAVE, re.compile(_name + r' left the game$')),
+    (ADVANCEMENT, re.compile(_name + r' has (?:made the advancement|completed the challenge|reached the goal) \[(?P<advancement>.+)\]$')),
+    (DEATH, re.compile(_name + ' (?:' + '|'.join(re.escape(i) for i in _death_phrases) + ')')),
+    (SERVER_STARTED, re.compile(r'Done \((?P<startup_time>[\d.,]+)s\)!')),
+    (SERVER_STOPPING, re.compile(r'Stopping (?:the )?server')),
+    (SERVER_LAG, re.compile(r"Can't keep up! .*?Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")),
+)
+
+
+class Game_Event:
+    __slots__ = ('type', 'server', 'player', 'data', 'record')
+
+    def __init__(self, event_type: str, server: str, record: Log_Record, player: str = None, data: Dict = None):
+        self.type = event_type  # One of event_types.
+        self.server = server  # Server name the event came from.
+        self.player = player  # Player name, None for server events.
+        self.data = data or {}  # Extra info, e.g. {'text': ...} for chat, {'advancement': ...}, {'ms': ..., 'ticks': ...} for lag.
+        self.record = record  # Parsed log line.
+
+    @property
+    def message(self) -> str:
+        return self.record.message
+
+    def __repr__(self) -> str:
+        return f"Game_Event({self.type!r}, {self.server!r}, {self.player!r}, {self.message!r})"
+
+
+def parse_event(line: Union[str, Log_Record], server: str = None) -> Union[Game_Event, None]:
+    """
+    Checks if log line is a game event.
+
+    Args:
+        line str, Log_Record: Log or console line.
+        server str(None): Server name to put in event.
+
+    Returns:
+        Game_Event, None: Event, or None if line isn't one.
+    """
+
+    record = line if isinstance(line, Log_Record) else parse_log_line(line)
+    # Only lines logged by server, not stack traces, shell echoes, or RCON responses.
+    if record.time is None or record.level not in ('INFO', 'WARN'):
+        return None
+
+    message = record.message
+    for event_type, pattern in _event_patterns:
+        if match := pattern.match(message):
+            data = match.groupdict()
+            player = data.pop('player', None)
+            return Game_Event(event_type, server, record, player, data)
+
+    return None
+
+
+class Event_Bus:
+    def __init__(self):
+        self.subscribers = {}  # Event type ('*' for all): List of callbacks.
+        self._feeders = {}  # Server name: line listener function, see get_feeder().
+        self._tasks = set()  # Running async callbacks, keeps reference so they don't get garbage collected.
+
+    def subscribe(self, event_types: Union[str, List, Tuple], callback: Callable[[Game_Event], None]) -> Callable:
+        """
+        Calls callback whenever one of the event types is published.
+
+        Args:
+            event_types str, list: Event type(s), or '*' for all events.
+            callback: Function or async function, gets Game_Event as only argument.
+
+        Returns:
+            callback: So it can be used as a decorator.
+        """
+
+        if isinstance(event_types, str): event_types = [event_types]
+        for event_type in event_types:
+            if callback not in (subscribers := self.subscribers.setdefault(event_type, [])):
+                subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable) -> None:
+        for subscribers in self.subscribers.values():
+            if callback in subscribers:
+                subscribers.remove(callback)
+
+    def publish(self, event: Game_Event) -> None:
+        """Hands event to subscribers. Async callbacks run as tasks, so a slow subscriber doesn't hold up the rest."""
+
+        for callback in self.subscribers.get(event.type, []) + self.subscribers.get('*', []):
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._task_done)
+            except Exception as e:
+                lprint(f"ERROR: Problem handling {event.type} event: {e}")
+
+    def _task_done(self, task: asyncio.Future) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and (error := task.exception()):
+            lprint(f"ERROR: Problem handling event: {error}")
+
+    def feed_line(self, line: str, server: str = None) -> Union[Game_Event, None]:
+        """Publishes event if line is one."""
+
+        if event := parse_event(line, server):
+            self.publish(event)
+        return event
+
+    def get_feeder(self, server: str) -> Callable[[str], None]:
+        """
+        Line listener for a server, to be added to its Console_Stream. Always returns the same function for the same server,
+        so adding it again doesn't publish events twice.
+        """
+
+        if server not in self._feeders:
+            self._feeders[server] = lambda line: self.feed_line(line, server)
+        return self._feeders[server]
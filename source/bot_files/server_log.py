@@ -0,0 +1,415 @@
+"""
+Keeps the most recent lines of the server's latest.log in memory, so read_server_log() doesn't have to reopen and
+reverse scan the file for every command output lookup, status check, chat log, etc.
+
+Log_Tailer loads the last X lines when started, then follows the file as the server writes to it.
+On Linux it uses inotify to know when the logs folder changes, otherwise (or if inotify isn't available) it checks the file
+every second. Lookups also check for new data first, so they never miss the latest lines.
+If latest.log is rotated (server restart) or truncated, it starts reading the new file from the top.
+
+Log_Index sorts each latest.log line into categories (chat, connections, etc) as it's read, and saves where in the file the line is.
+So getting the last 50 chat lines only reads those 50 lines, instead of going through the whole file looking for them.
+Only reads what was added since last time, and starts over if file was rotated.
+
+search_logs() searches latest.log and all the older logs/*.log.gz files. Files are searched in a process pool (decompressing is
+CPU heavy), and results are given back newest file first, so it can stop early once it has enough matching lines.
+Pool uses forkserver (or spawn) processes, since forking the bot copies its threads' locks. Call close_search_pool() when bot stops.
+"""
+
+import os
+import re
+import gzip
+import asyncio
+import multiprocessing
+import ctypes
+import ctypes.util
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union, List, Callable, AsyncGenerator, Tuple
+
+from bot_files.server_console import Console_Stream, File_Follower
+from bot_files.slime_utils import lprint, Keyword_Matcher
+
+
+class Inotify_Watch:
+    IN_MODIFY = 0x2
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, dir_path: str, callback: Callable[[], None]):
+        """
+        Calls callback when files in a folder are written to, created, moved, or deleted. Linux only.
+
+        Args:
+            dir_path str: Folder to watch. Watches folder instead of file, so it also catches file being rotated.
+            callback: Function to call (no arguments), from event loop.
+
+        Raises:
+            OSError: inotify not available.
+        """
+
+        self.callback = callback
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found.")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify not available.")
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+        mask = self.IN_MODIFY | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(dir_path), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed: {dir_path}")
+
+        asyncio.get_running_loop().add_reader(self.fd, self._on_events)
+
+    def _on_events(self) -> None:
+        # Don't need to know which file changed, just empty the queue and let callback check.
+        try:
+            while os.read(self.fd, 4096): pass
+        except BlockingIOError: pass
+        self.callback()
+
+    def close(self) -> None:
+        try: asyncio.get_running_loop().remove_reader(self.fd)
+        except RuntimeError: pass
+        os.close(self.fd)
+
+
+class Log_Tailer(File_Follower):
+    fallback_poll_interval = 1  # Seconds between checking file when not using inotify.
+    inotify_poll_interval = 10  # Still checks every now and then with inotify, in case an event was missed.
+
+    def __init__(self, file_path: str, maxlen: int = 5000):
+        """
+        Args:
+            file_path str: Log file to follow, usually latest.log.
+            maxlen int(5000): Max number of lines kept in memory.
+        """
+
+        super().__init__(file_path, Console_Stream(maxlen), poll_interval=self.fallback_poll_interval)
+        self.maxlen = maxlen
+        self._file_start = None  # console.line_count at start of current file, None if file has more lines than were loaded.
+        self._changed = asyncio.Event()
+        self._inotify = None
+
+    @property
+    def lines(self) -> deque:
+        return self.console.lines
+
+    def start(self) -> None:
+        """Loads last lines of file, then follows it in background. Needs a running event loop."""
+
+        if self.running:
+            return
+
+        self._load_tail()
+        try:
+            self._inotify = Inotify_Watch(os.path.dirname(self.file_path), self._changed.set)
+            self.poll_interval = self.inotify_poll_interval
+        except (OSError, AttributeError) as e:
+            lprint(f"INFO: Using polling to follow server log ({e})")
+        super().start()
+
+    def stop(self) -> None:
+        super().stop()
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    async def _run(self) -> None:
+        while True:
+            self.read_new_data()
+            self._changed.clear()
+            try: await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError: pass
+
+    def on_reset(self) -> None:
+        self._file_start = self.console.line_count
+
+    def _load_tail(self) -> None:
+        """Reads last maxlen lines of file, reading backwards in blocks until there's enough lines."""
+
+        try: stat = os.stat(self.file_path)
+        except OSError:
+            self._offset, self._file_start = 0, self.console.line_count  # Doesn't exist yet, read from top once it does.
+            return
+
+        block_size = 65536
+        with open(self.file_path, 'rb') as file:
+            data, position = b'', stat.st_size
+            while position > 0 and data.count(b'\n') <= self.maxlen:
+                read_size = min(block_size, position)
+                position -= read_size
+                file.seek(position)
+                data = file.read(read_size) + data
+
+        *lines, self._partial_line = data.split(b'\n')
+        if position > 0:
+            lines = lines[1:]  # First line might be cut off.
+        self._file_start = self.console.line_count if position == 0 and len(lines) <= self.maxlen else None
+        for line in lines[-self.maxlen:]:
+            self.console.feed(line.decode('utf-8', errors='replace'))
+        self._offset, self._inode = stat.st_size, stat.st_ino
+
+    def query(self, search: Union[str, List, None] = None, lines: int = 15, extra_lines: int = 0,
+              find_all: bool = False, stopgap_str: str = None) -> Union[List, None]:
+        """
+        Same as Server_API.read_server_log() (bottom up), but from memory.
+
+        Returns:
+            list, None: Matched lines, oldest first. None if not enough lines in memory to know, so file needs to be read instead.
+        """
+
+        self.read_new_data()
+
+        matcher = Keyword_Matcher.get(search)
+
+        # If all lines of current file are in memory, only look at those (older lines are from before log was rotated).
+        complete = self._file_start is not None and self.console.line_count - self._file_start <= self.maxlen
+        log_lines = self.console.get_lines(self._file_start) if complete else list(self.console.lines)
+        matched_lines = []
+        _extra_lines = deque(maxlen=extra_lines + 1)
+        for line in reversed(log_lines):
+            if not line:
+                continue
+            if matcher.search(line):
+                matched_lines.append(line)
+                if not find_all:
+                    break
+
+            if extra_lines: _extra_lines.append(line)
+
+            if (stopgap_str and stopgap_str in line) or len(matched_lines) >= lines:
+                break
+        else:
+            # Went through all lines in memory without finishing, but file has older lines that aren't in memory.
+            if not complete:
+                return None
+
+        return list(reversed(matched_lines + list(_extra_lines)))
+
+
+class Log_Index:
+    # Category: Lowercase byte strings, line goes in category if it contains any of them.
+    categories = {
+        'chat': (b']: <',),
+        'connections': (b'joined the game', b'logged in with entity id', b'left the game', b'lost connection:', b'kicked by an operator'),
+        'commands': (b'there are ', b'was banned by', b'whitelist', b'banned ', b'unbanned ', b'server operator',
+                     b'has the following entity data', b'game mode', b'teleported ', b'killed ', b'gave ', b'[server:', b'[rcon:'),
+        'warnings': (b'/warn]', b' warn]'),
+        'errors': (b'/error]', b' error]', b'exception'),
+    }
+
+    chunk_size = 4 * 1024 * 1024
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.offsets = {}  # Category: array of byte offsets where each matching line starts.
+        self._offset = 0  # Indexed up to here.
+        self._inode = None
+        self._lock = threading.Lock()  # get_lines() is run in a thread.
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offsets = {i: array('Q') for i in self.categories}
+        self._offset = 0
+
+    def update(self) -> bool:
+        """
+        Indexes lines added since last update. First update goes through whole file.
+
+        Returns:
+            bool: If file could be read.
+        """
+
+        try: stat = os.stat(self.file_path)
+        except OSError: return False
+
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+        self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return True
+
+        position = self._offset
+        with open(self.file_path, 'rb') as file:
+            file.seek(position)
+            while chunk := file.read(self.chunk_size):
+                # Only complete lines, a line the server is still writing gets indexed next time.
+                if (end := chunk.rfind(b'\n') + 1) == 0:
+                    break
+                self._index_chunk(chunk[:end].lower(), position)
+                position += end
+                file.seek(position)
+        self._offset = position
+        return True
+
+    def _index_chunk(self, chunk: bytes, chunk_offset: int) -> None:
+        """Finds each keyword with bytes.find() over whole chunk, instead of checking line by line."""
+
+        for category, keywords in self.categories.items():
+            line_starts = set()  # Same line can match more than once.
+            for keyword in keywords:
+                index = chunk.find(keyword)
+                while index != -1:
+                    line_start = chunk.rfind(b'\n', 0, index) + 1
+                    line_starts.add(line_start)
+                    # Skip to next line, already know this one matches.
+                    if (index := chunk.find(b'\n', index)) == -1:
+                        break
+                    index = chunk.find(keyword, index)
+            self.offsets[category].extend(sorted(chunk_offset + i for i in line_starts))
+
+    def get_lines(self, category: str, lines: int = 20) -> Union[List[str], bool]:
+        """
+        Gets most recent lines in category.
+
+        Args:
+            category str: Category from Log_Index.categories, e.g. 'chat'.
+            lines int(20): Max number of lines.
+
+        Returns:
+            list, bool: Lines oldest first, False if file not readable or unknown category.
+        """
+
+        if category not in self.categories:
+            return False
+
+        with self._lock:
+            if not self.update():
+                return False
+
+            found = []
+            with open(self.file_path, 'rb') as file:
+                for offset in self.offsets[category][-lines:] if lines > 0 else []:
+                    file.seek(offset)
+                    found.append(file.readline().decode('utf-8', errors='replace').rstrip('\r\n'))
+            return found
+
+_search_pool = None
+rotated_log_pattern = re.compile(r'(\d{4}-\d{2}-\d{2})-(\d+)\.log\.gz$')
+
+
+def get_log_files(logs_path: str) -> List[str]:
+    """
+    Gets latest.log and rotated logs (e.g. 2023-01-31-2.log.gz) in folder.
+
+    Returns:
+        list: File paths, newest first.
+    """
+
+    try: file_names = os.listdir(logs_path)
+    except OSError: return []
+
+    rotated = sorted([(match.group(1), int(match.group(2)), name) for name in file_names if (match := rotated_log_pattern.match(name))], reverse=True)
+    file_paths = [os.path.join(logs_path, i[2]) for i in rotated]
+    if 'latest.log' in file_names:
+        file_paths.insert(0, os.path.join(logs_path, 'latest.log'))
+    return file_paths
+
+
+def search_log_file(file_path: str, search: List[str], lines: int, match_all: bool = False) -> List[str]:
+    """
+    Finds last matching lines in a log file, decompresses .gz files while reading. Runs in a separate process.
+
+    Args:
+        file_path str: Log file.
+        search list: Keywords, not case sensitive.
+        lines int: Max number of matching lines to return, most recent ones are kept.
+        match_all bool(False): Line must contain all keywords instead of any.
+
+    Returns:
+        list: Matched lines, oldest first.
+    """
+
+    # bytes.lower() only lowercases ASCII, so non-ASCII keywords are matched on decoded lines instead (slower).
+    str_search = [i.lower() for i in search]
+    decode_search = not all(i.isascii() for i in str_search)
+    search = [i.encode('utf-8') for i in str_search]
+    check = all if match_all else any
+    matched_lines = deque(maxlen=lines)
+    opener = gzip.open if file_path.endswith('.gz') else open
+    try:
+        with opener(file_path, 'rb') as file:
+            leftover = b''
+            while chunk := file.read(4 * 1024 * 1024):
+                chunk = leftover + chunk
+                end = chunk.rfind(b'\n') + 1
+                chunk, leftover = chunk[:end], chunk[end:]
+                if decode_search:
+                    matched_lines.extend(i for i in chunk.split(b'\n') if check(k in i.decode('utf-8', errors='replace').lower() for k in str_search))
+                    continue
+                lower_chunk = chunk.lower()
+                # Finds keywords in whole chunk with bytes.find(), then only checks those lines.
+                line_starts = set()
+                for keyword in search[:1] if match_all else search:
+                    index = lower_chunk.find(keyword)
+                    while index != -1:
+                        line_starts.add(lower_chunk.rfind(b'\n', 0, index) + 1)
+                        if (index := lower_chunk.find(b'\n', index)) == -1:
+                            break
+                        index = lower_chunk.find(keyword, index)
+                for line_start in sorted(line_starts):
+                    line_end = chunk.find(b'\n', line_start)
+                    if not match_all or check(i in lower_chunk[line_start:line_end] for i in search):
+                        matched_lines.append(chunk[line_start:line_end])
+            if leftover and (check(i in leftover.decode('utf-8', errors='replace').lower() for i in str_search) if decode_search
+                             else check(i in leftover.lower() for i in search)):
+                matched_lines.append(leftover)
+    except (OSError, EOFError):
+        pass  # Unreadable or incomplete .gz file, use what was found.
+
+    return [i.decode('utf-8', errors='replace').rstrip('\r\n') for i in matched_lines]
+
+
+async def search_logs(logs_path: str, search: List[str], lines: int = 20, match_all: bool = False,
+                      workers: int = None) -> AsyncGenerator[Tuple[str, List[str]], None]:
+    """
+    Searches all logs in folder in parallel, and yields results newest file first.
+    Stop iterating once you have enough lines, files that haven't been searched yet get canceled.
+
+    Args:
+        logs_path str: Server logs folder.
+        search list: Keywords, not case sensitive.
+        lines int(20): Max matching lines per file.
+        match_all bool(False): Line must contain all keywords instead of any.
+        workers int(None): Number of processes, defaults to CPU count.
+
+    Yields:
+        tuple: File name, matched lines (oldest first).
+    """
+
+    global _search_pool
+    if _search_pool is None:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _search_pool = ProcessPoolExecutor(max_workers=workers or None, mp_context=multiprocessing.get_context(method))
+
+    loop = asyncio.get_running_loop()
+    file_paths = get_log_files(logs_path)
+    futures = [loop.run_in_executor(_search_pool, search_log_file, i, search, lines, match_all) for i in file_paths]
+    try:
+        for file_path, future in zip(file_paths, futures):
+            yield os.path.basename(file_path), await future
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def close_search_pool() -> None:
+    """Stops search_logs() worker processes, canceling searches that haven't started. Pool is made again if needed."""
+
+    global _search_pool
+    if _search_pool is not None:
+        _search_pool.shutdown(wait=False, cancel_futures=True)
+        _search_pool = None
@@ -0,0 +1,123 @@
+"""
+Parses Minecraft server log/console lines into Log_Record objects, so code doesn't have to split lines on ':' and '['
+to get the message, which breaks when the message itself has those characters.
+
+Handles the different line formats, with or without ANSI color codes:
+    Vanilla:        [12:34:56] [Server thread/INFO]: There are 0 of a max of 20 players online:
+    Paper/Spigot:   [12:34:56 INFO]: There are 0 of a max of 20 players online:
+    Forge:          [12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: There are 0 of a max of 20 players online:
+    Newer Forge:    [18Oct2026 12:34:56.789] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: There are...
+Lines without a prefix (e.g. RCON responses, stack traces) become a record with only a message.
+"""
+
+import re
+from typing import Union, List, Iterable, Tuple
+
+_ansi_pattern = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')  # Same as utils.remove_ansi().
+# Groups: hour, minute, second, level (Paper), thread, level (Vanilla/Forge), source (Forge).
+_line_pattern = re.compile(r'\[(?:[^\]\s]*\s)?(\d{1,2}):(\d{2}):(\d{2})(?:\.\d+)?(?:\s+(\w+))?\]\s*'
+                           r'(?:\[([^\]]*)/(\w+)\]\s*)?(?:\[([^\]]*)\]\s*)?:\s?')
+
+
+class Log_Record:
+    __slots__ = ('line', 'time', 'thread', 'level', 'source', 'offset')
+
+    def __init__(self, line: str, time: int = None, thread: str = None, level: str = None, source: str = None, offset: int = 0):
+        self.line = line  # Line without ANSI codes or line break.
+        self.time = time  # Seconds since midnight, logs don't have the date. None if line has no time.
+        self.thread = thread  # E.g. 'Server thread', None for Paper/Spigot lines.
+        self.level = level  # E.g. 'INFO', 'WARN', 'ERROR'.
+        self.source = source  # Forge logger name, e.g. 'minecraft/DedicatedServer'.
+        self.offset = offset  # Where message starts in line.
+
+    @property
+    def message(self) -> str:
+        """Log message, e.g. 'R3diculous joined the game'."""
+
+        return self.line[self.offset:]
+
+    @property
+    def time_str(self) -> str:
+        return '' if self.time is None else f"{self.time // 3600:02d}:{self.time // 60 % 60:02d}:{self.time % 60:02d}"
+
+    def __repr__(self) -> str:
+        return f"Log_Record({self.time_str!r}, {self.thread!r}, {self.level!r}, {self.message!r})"
+
+
+def parse_log_line(line: str) -> Log_Record:
+    """
+    Parses log line.
+
+    Args:
+        line str: Log or console line.
+
+    Returns:
+        Log_Record: Parsed line. If it doesn't have a log prefix, whole line is the message.
+    """
+
+    if '\x1b' in line:
+        line = _ansi_pattern.sub('', line)
+    line = line.rstrip('\r\n')
+    if not (match := _line_pattern.match(line)):
+        return Log_Record(line)
+
+    hour, minute, second, paper_level, thread, level, source = match.groups()
+    return Log_Record(line, int(hour) * 3600 + int(minute) * 60 + int(second), thread,
+                      (level or paper_level or '').upper() or None, source, match.end())
+
+
+def parse_log_lines(lines: Iterable[str]) -> List[Log_Record]:
+    """Parses multiple log lines, see parse_log_line()."""
+
+    return [parse_log_line(i) for i in lines]
+
+
+def parse_time(time_str: str) -> Union[int, None]:
+    """
+    Args:
+        time_str str: Time like '13:05' or '13:05:30'.
+
+    Returns:
+        int, None: Seconds since midnight, or None if not a valid time.
+    """
+
+    try: parts = [int(i) for i in time_str.split(':')]
+    except (ValueError, AttributeError): return None
+    if not 2 <= len(parts) <= 3:
+        return None
+    parts += [0] * (3 - len(parts))
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def filter_records(records: Iterable[Log_Record], levels: Union[str, List, Tuple] = None,
+                   after: Union[int, str] = None, before: Union[int, str] = None) -> List[Log_Record]:
+    """
+    Filter records by log level and/or time. Records without time or level (e.g. stack trace lines) are skipped by those filters.
+
+    Args:
+        levels str, list(None): Log level(s) to keep, e.g. 'WARN' or ['WARN', 'ERROR'].
+        after int, str(None): Keep records at or after this time, seconds since midnight or 'HH:MM[:SS]'.
+        before int, str(None): Keep records at or before this time.
+
+    Returns:
+        list: Matching records.
+    """
+
+    if isinstance(levels, str): levels = [levels]
+    levels = {i.upper() for i in levels} if levels else None
+    if isinstance(after, str): after = parse_time(after)
+    if isinstance(before, str): before = parse_time(before)
+
+    filtered = []
+    for record in records:
+        if levels and record.level not in levels:
+            continue
+        if (after is not None or before is not None) and record.time is None:
+            continue
+        if after is not None and record.time < after:
+            continue
+        if before is not None and record.time > before:
+            continue
+        filtered.append(record)
+
+    return filtered
@@ -0,0 +1,347 @@
+"""
+Java Edition Server List Ping (what the multiplayer server list uses), done with asyncio streams so it never blocks the bot.
+Gets MOTD, version, player counts and sample, and latency measured to the game port (not ICMP or port 80).
+
+Protocol: https://wiki.vg/Server_List_Ping
+    Handshake (next state 1), Status Request -> Status Response (JSON), Ping (long) -> Pong (same long).
+Server closes the connection after the pong, so extra latency samples each use a new connection with just Handshake and Ping.
+
+If server_port is the default (25565), the server address is checked for a '_minecraft._tcp' SRV record first, like the
+Minecraft client does. Results (including no record found) are cached, so DNS isn't asked on every ping.
+Nameserver comes from /etc/resolv.conf, or the registry on Windows. Truncated UDP answers are asked again over TCP.
+If no nameserver is found, SRV lookup is skipped (logged once) and the address is used as is.
+"""
+
+import json
+import time
+import platform
+import random
+import struct
+import socket
+import asyncio
+import statistics
+from typing import Union, Dict, Tuple, List
+
+from bot_files.slime_utils import lprint
+
+default_port = 25565
+protocol_version = -1  # -1 is allowed for status pings, server replies with its own version.
+
+
+def _pack_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    data = b''
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            data += bytes([byte | 0x80])
+        else: return data + bytes([byte])
+
+
+def _pack_packet(packet_id: int, payload: bytes = b'') -> bytes:
+    data = _pack_varint(packet_id) + payload
+    return _pack_varint(len(data)) + data
+
+
+def _unpack_varint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """Returns (value, offset after varint)."""
+
+    value = 0
+    for index in range(5):
+        byte = data[offset + index]
+        value |= (byte & 0x7F) << (7 * index)
+        if not byte & 0x80:
+            return value, offset + index + 1
+    raise ValueError("VarInt too big.")
+
+
+async def _read_varint(reader: asyncio.StreamReader) -> int:
+    value = 0
+    for index in range(5):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << (7 * index)
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt too big.")
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Returns (packet id, payload)."""
+
+    data = await reader.readexactly(await _read_varint(reader))
+    packet_id, offset = _unpack_varint(data)
+    return packet_id, data[offset:]
+
+
+def _get_text(component: Union[str, Dict, List]) -> str:
+    """Flattens chat component (MOTD can be a string, or dict with 'text' and 'extra') to plain text."""
+
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return ''.join(_get_text(i) for i in component)
+    if isinstance(component, dict):
+        return _get_text(component.get('text', '')) + ''.join(_get_text(i) for i in component.get('extra', []))
+    return ''
+
+
+class _Dns_Protocol(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class Server_Ping:
+    srv_cache_min = 60  # Seconds to cache SRV records for, at least, even if DNS TTL is lower.
+    srv_cache_max = 3600
+    srv_cache_missing = 300  # Seconds to remember that an address has no SRV record.
+    dns_port = 53
+
+    def __init__(self, timeout: float = 2, samples: int = 3):
+        """
+        Args:
+            timeout float(2): Seconds for each connection (connect, status, ping) before giving up.
+            samples int(3): Number of latency measurements, median is used.
+        """
+
+        self.timeout = timeout
+        self.samples = max(1, samples)
+        self.srv_cache = {}  # Host: (time.monotonic() expire time, (target host, port) or None).
+        self._no_nameserver_logged = False
+
+    async def query(self, host: str, port: int = default_port, log_errors: bool = True) -> Union[Dict, bool]:
+        """
+        Gets server status.
+
+        Args:
+            host str: Server address.
+            port int(25565): Server port.
+            log_errors bool(True): Log if server didn't respond.
+
+        Returns:
+            dict, bool: Same format as server's status JSON ('version', 'players', 'description', 'favicon'), plus
+                'motd' (description as plain text), 'latency' (median ms), 'latency_samples' (ms list), and 'time' (seconds),
+                or False if server didn't respond.
+        """
+
+        connect_host, connect_port = host, port
+        if port == default_port and (srv := await self.resolve_srv(host)):
+            connect_host, connect_port = srv
+
+        try: status, latency = await asyncio.wait_for(self._status(host, port, connect_host, connect_port), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            if log_errors:
+                lprint(f"ERROR: Server list ping failed: {host}:{port} ({e or type(e).__name__})")
+            return False
+
+        samples = [latency]
+        for _ in range(self.samples - 1):
+            try: samples.append(await asyncio.wait_for(self._ping(host, port, connect_host, connect_port), self.timeout))
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                break
+
+        status['motd'] = _get_text(status.get('description', ''))
+        status['latency_samples'] = [round(i, 2) for i in samples]
+        status['latency'] = round(statistics.median(samples), 2)
+        status['time'] = status['latency'] / 1000  # Seconds, same as mctools had.
+        return status
+
+    def _handshake(self, host: str, port: int) -> bytes:
+        host_data = host.encode('utf-8')
+        return _pack_packet(0x00, _pack_varint(protocol_version) + _pack_varint(len(host_data)) + host_data +
+                            struct.pack('>H', port) + _pack_varint(1))
+
+    async def _send_ping(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> float:
+        """Sends ping packet and waits for pong, returns round trip time in ms."""
+
+        payload = random.getrandbits(63)
+        start = time.perf_counter()
+        writer.write(_pack_packet(0x01, struct.pack('>q', payload)))
+        await writer.drain()
+        packet_id, data = await _read_packet(reader)
+        latency = (time.perf_counter() - start) * 1000
+        if packet_id != 0x01 or struct.unpack('>q', data[:8])[0] != payload:
+            raise ValueError("Bad pong packet.")
+        return latency
+
+    async def _status(self, host: str, port: int, connect_host: str, connect_port: int) -> Tuple[Dict, float]:
+        reader, writer = await asyncio.open_connection(connect_host, connect_port)
+        try:
+            writer.write(self._handshake(host, port) + _pack_packet(0x00))
+            await writer.drain()
+            packet_id, data = await _read_packet(reader)
+            if packet_id != 0x00:
+                raise ValueError(f"Unexpected packet: {packet_id}")
+            length, offset = _unpack_varint(data)
+            status = json.loads(data[offset:offset + length].decode('utf-8'))
+            return status, await self._send_ping(reader, writer)
+        finally:
+            writer.close()
+
+    async def _ping(self, host: str, port: int, connect_host: str, connect_port: int) -> float:
+        reader, writer = await asyncio.open_connection(connect_host, connect_port)
+        try:
+            writer.write(self._handshake(host, port))
+            return await self._send_ping(reader, writer)
+        finally:
+            writer.close()
+
+    # ===== SRV record
+    async def resolve_srv(self, host: str) -> Union[Tuple[str, int], None]:
+        """
+        Looks up '_minecraft._tcp.<host>' SRV record, cached.
+
+        Returns:
+            tuple, None: (target host, port), or None if host is an IP, has no record, or DNS couldn't be asked.
+        """
+
+        try:
+            socket.inet_pton(socket.AF_INET6 if ':' in host else socket.AF_INET, host)
+            return None  # IP address.
+        except OSError: pass
+
+        now = time.monotonic()
+        if (cached := self.srv_cache.get(host)) and cached[0] > now:
+            return cached[1]
+
+        record, ttl = None, self.srv_cache_missing
+        if not (nameserver := self._get_nameserver()) and not self._no_nameserver_logged:
+            lprint("INFO: No DNS server found, skipping SRV record lookup for server address.")
+            self._no_nameserver_logged = True
+        if nameserver:
+            try:
+                if result := await asyncio.wait_for(self._query_srv(f"_minecraft._tcp.{host}", nameserver), self.timeout):
+                    record, ttl = result[0], min(max(result[1], self.srv_cache_min), self.srv_cache_max)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError, struct.error):
+                ttl = self.srv_cache_min  # DNS problem, try again sooner.
+
+        self.srv_cache[host] = (now + ttl, record)
+        return record
+
+    @staticmethod
+    def _get_nameserver() -> Union[str, None]:
+        """First nameserver in /etc/resolv.conf, or from network interfaces in registry on Windows. None if not found."""
+
+        if platform.system() == 'Windows':
+            return Server_Ping._get_windows_nameserver()
+
+        try:
+            with open('/etc/resolv.conf') as file:
+                for line in file:
+                    if (parts := line.split()) and parts[0] == 'nameserver' and len(parts) > 1:
+                        return parts[1].split('%')[0]
+        except OSError: pass
+        return None
+
+    @staticmethod
+    def _get_windows_nameserver() -> Union[str, None]:
+        """First static or DHCP DNS server set on a network interface."""
+
+        try: import winreg
+        except ImportError: return None
+
+        path = r'SYSTEM\CurrentControlSet\Services\Tcpip\Parameters\Interfaces'
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as interfaces:
+                for index in range(winreg.QueryInfoKey(interfaces)[0]):
+                    with winreg.OpenKey(interfaces, winreg.EnumKey(interfaces, index)) as interface:
+                        for value_name in ('NameServer', 'DhcpNameServer'):
+                            try: servers = winreg.QueryValueEx(interface, value_name)[0]
+                            except OSError: continue
+                            # Comma or space separated.
+                            if servers := servers.replace(',', ' ').split():
+                                return servers[0]
+        except OSError: pass
+        return None
+
+    async def _query_srv(self, name: str, nameserver: str) -> Union[Tuple[Tuple[str, int], int], None]:
+        """
+        Sends DNS SRV query over UDP, asks again over TCP if answer was truncated.
+
+        Returns:
+            tuple, None: ((target, port), ttl) of best record (lowest priority, then highest weight), or None if no record.
+        """
+
+        query_id = random.getrandbits(16)
+        question = b''.join(bytes([len(i)]) + i.encode('idna') for i in name.rstrip('.').split('.')) + b'\x00'
+        packet = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + question + struct.pack('>HH', 33, 1)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(lambda: _Dns_Protocol(future), remote_addr=(nameserver, self.dns_port))
+        try:
+            transport.sendto(packet)
+            data = await future
+        finally:
+            transport.close()
+
+        response_id, flags = struct.unpack('>HH', data[:4])
+        if response_id != query_id:
+            raise ValueError("DNS response ID doesn't match.")
+        if flags & 0x0200:  # TC, answer didn't fit in UDP packet.
+            data = await self._query_tcp(packet, nameserver)
+            response_id, flags = struct.unpack('>HH', data[:4])
+            if response_id != query_id:
+                raise ValueError("DNS response ID doesn't match.")
+
+        question_count, answer_count = struct.unpack('>HH', data[4:8])
+        if flags & 0xF:  # NXDOMAIN, etc.
+            return None
+
+        offset = 12
+        for _ in range(question_count):
+            offset = self._read_name(data, offset)[1] + 4
+
+        records = []
+        for _ in range(answer_count):
+            offset = self._read_name(data, offset)[1]
+            record_type, _, ttl, length = struct.unpack('>HHIH', data[offset:offset + 10])
+            offset += 10
+            if record_type == 33:
+                priority, weight, port = struct.unpack('>HHH', data[offset:offset + 6])
+                records.append((priority, -weight, self._read_name(data, offset + 6)[0], port, ttl))
+            offset += length
+
+        if not records:
+            return None
+        priority, weight, target, port, ttl = min(records)
+        return (target, port), ttl
+
+    async def _query_tcp(self, packet: bytes, nameserver: str) -> bytes:
+        """Same query over TCP, messages have a 2 byte length prefix."""
+
+        reader, writer = await asyncio.open_connection(nameserver, self.dns_port)
+        try:
+            writer.write(struct.pack('>H', len(packet)) + packet)
+            await writer.drain()
+            length, = struct.unpack('>H', await reader.readexactly(2))
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+        """Reads DNS name (with compression pointers), returns (name, offset after name)."""
+
+        labels, end = [], None
+        for _ in range(128):  # Stops looping pointers.
+            length = data[offset]
+            if length & 0xC0 == 0xC0:
+                if end is None:
+                    end = offset + 2
+                offset = ((length & 0x3F) << 8) | data[offset + 1]
+                continue
+            offset += 1
+            if not length:
+                return '.'.join(labels), end if end is not None else offset
+            labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+            offset += length
+        raise ValueError("DNS name too long.")
@@ -0,0 +1,183 @@
+"""
+Minecraft query protocol (GameSpy4 over UDP), needs 'enable-query=true' in server.properties.
+Gets MOTD, map name, version, plugins and the full player list straight from the server, without sending console commands.
+
+Protocol: https://wiki.vg/Query
+    Handshake: FE FD 09 <session id> -> 09 <session id> <challenge token as ASCII string>
+    Basic stat: FE FD 00 <session id> <token> -> MOTD, game type, map, players online/max, host port/IP.
+    Full stat: FE FD 00 <session id> <token> 00 00 00 00 -> Key/value pairs (version, plugins, etc), then player names.
+
+Server gives out a new challenge token every 30 seconds, tied to the client's IP and port, so one UDP socket is kept open
+and its token reused for a while. Stats are cached for cache_time seconds, and callers asking at the same time share one request.
+"""
+
+import time
+import random
+import struct
+import asyncio
+from typing import Union, Dict, List
+
+from bot_files.slime_utils import lprint
+
+_magic = b'\xFE\xFD'
+_handshake_type = 0x09
+_stat_type = 0x00
+_full_stat_padding = b'\x00\x00\x00\x00'
+_full_stat_header = b'splitnum\x00\x80\x00'
+_players_header = b'\x01player_\x00\x00'
+
+
+def _split_strings(data: bytes) -> List[str]:
+    return [i.decode('utf-8', errors='replace') for i in data.split(b'\x00')]
+
+
+class _Query_Protocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.waiting = {}  # (Packet type, session ID): Future.
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 5:
+            return
+        key = (data[0], struct.unpack('>i', data[1:5])[0])
+        if (future := self.waiting.pop(key, None)) and not future.done():
+            future.set_result(data[5:])
+
+    def error_received(self, exc: Exception) -> None:
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.waiting.clear()
+
+    def connection_lost(self, exc: Exception) -> None:
+        self.error_received(exc or ConnectionError("Query socket closed."))
+
+
+class Server_Query:
+    token_time = 25  # Seconds to reuse challenge token for, server replaces it every 30.
+
+    def __init__(self, host: str, port: int = 25565, timeout: float = 2, cache_time: float = 10):
+        """
+        Args:
+            host str: Server address.
+            port int(25565): Query port, query.port in server.properties.
+            timeout float(2): Seconds to wait for each response.
+            cache_time float(10): Seconds to reuse stats for.
+        """
+
+        self.host, self.port = host, port
+        self.timeout = timeout
+        self.cache_time = cache_time
+        self.session_id = random.getrandbits(32) & 0x0F0F0F0F  # Server ignores the high bits of each byte.
+        self.protocol = None
+        self.token = None
+        self.token_expires = 0
+        self.cache = {}  # 'basic'/'full': (time.monotonic() expire time, stats).
+        self._requests = {}  # 'basic'/'full': Running request task, so callers share it.
+        self._lock = asyncio.Lock()
+
+    def close(self) -> None:
+        if self.protocol and self.protocol.transport:
+            self.protocol.transport.close()
+        self.protocol, self.token = None, None
+
+    async def basic_stat(self, use_cache: bool = True) -> Union[Dict, bool]:
+        """
+        Returns:
+            dict, bool: 'motd', 'gametype', 'map', 'players' ({'online', 'max'}), 'host_port', 'host_ip',
+                or False if server didn't respond.
+        """
+
+        return await self._get_stat('basic', use_cache)
+
+    async def full_stat(self, use_cache: bool = True) -> Union[Dict, bool]:
+        """
+        Returns:
+            dict, bool: Same as basic_stat() plus 'version', 'server_mod' (e.g. 'Paper on 1.20.1'), 'plugins' (list),
+                'game_id', and players['names'] with all online player names, or False if server didn't respond.
+        """
+
+        return await self._get_stat('full', use_cache)
+
+    async def _get_stat(self, kind: str, use_cache: bool) -> Union[Dict, bool]:
+        if use_cache and (cached := self.cache.get(kind)) and cached[0] > time.monotonic():
+            return cached[1]
+
+        if not (task := self._requests.get(kind)) or task.done():
+            task = self._requests[kind] = asyncio.ensure_future(self._request_stat(kind))
+        try:
+            stats = await asyncio.shield(task)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError, struct.error) as e:
+            lprint(f"ERROR: Server query failed: {self.host}:{self.port} ({e or type(e).__name__})")
+            return False
+
+        self.cache[kind] = (time.monotonic() + self.cache_time, stats)
+        if kind == 'full':  # Full stat has everything basic stat does.
+            self.cache['basic'] = self.cache[kind]
+        return stats
+
+    async def _request_stat(self, kind: str) -> Dict:
+        async with self._lock:
+            # Token might've just been replaced by server, so gets a new one and tries again once.
+            for attempt in range(2):
+                token = await self._get_token(renew=attempt > 0)
+                payload = struct.pack('>i', token) + (_full_stat_padding if kind == 'full' else b'')
+                try:
+                    data = await self._send(_stat_type, payload)
+                except asyncio.TimeoutError:
+                    if attempt: raise
+                    continue
+                return self._parse_full_stat(data) if kind == 'full' else self._parse_basic_stat(data)
+
+    async def _get_token(self, renew: bool = False) -> int:
+        if renew or self.token is None or time.monotonic() > self.token_expires:
+            data = await self._send(_handshake_type)
+            self.token = int(data.split(b'\x00')[0])
+            self.token_expires = time.monotonic() + self.token_time
+        return self.token
+
+    async def _send(self, packet_type: int, payload: bytes = b'') -> bytes:
+        if not self.protocol or not self.protocol.transport or self.protocol.transport.is_closing():
+            loop = asyncio.get_running_loop()
+            _, self.protocol = await loop.create_datagram_endpoint(_Query_Protocol, remote_addr=(self.host, self.port))
+            self.token = None
+
+        future = asyncio.get_running_loop().create_future()
+        self.protocol.waiting[(packet_type, self.session_id)] = future
+        self.protocol.transport.sendto(_magic + bytes([packet_type]) + struct.pack('>i', self.session_id) + payload)
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self.protocol.waiting.pop((packet_type, self.session_id), None)
+
+    @staticmethod
+    def _parse_basic_stat(data: bytes) -> Dict:
+        motd, gametype, map_name, online, max_players, rest = data.split(b'\x00', 5)
+        return {'motd': motd.decode('utf-8', errors='replace'), 'gametype': gametype.decode(), 'map': map_name.decode('utf-8', errors='replace'),
+                'players': {'online': int(online), 'max': int(max_players)},
+                'host_port': struct.unpack('<H', rest[:2])[0], 'host_ip': rest[2:].split(b'\x00')[0].decode()}
+
+    @staticmethod
+    def _parse_full_stat(data: bytes) -> Dict:
+        if not data.startswith(_full_stat_header):
+            raise ValueError("Bad full stat response.")
+        info_data, _, player_data = data[len(_full_stat_header):].partition(_players_header)
+
+        # Key/value pairs end with an empty key.
+        values = _split_strings(info_data)
+        info = {}
+        for key, value in zip(values[::2], values[1::2]):
+            if not key: break
+            info[key] = value
+
+        # 'Paper on 1.20.1: WorldEdit 7.2.15; EssentialsX 2.20.0', or '' on vanilla.
+        server_mod, _, plugins = info.get('plugins', '').partition(': ')
+        return {'motd': info.get('hostname', ''), 'gametype': info.get('gametype', ''), 'game_id': info.get('game_id', ''),
+                'version': info.get('version', ''), 'server_mod': server_mod,
+                'plugins': [i.strip() for i in plugins.split(';') if i.strip()], 'map': info.get('map', ''),
+                'players': {'online': int(info.get('numplayers', 0)), 'max': int(info.get('maxplayers', 0)),
+                            'names': [i for i in _split_strings(player_data) if i]},
+                'host_port': int(info.get('hostport', 0) or 0), 'host_ip': info.get('hostip', '')}
@@ -0,0 +1,112 @@
+"""
+Per-server command queue, so multiple things sending commands at the same time (Discord commands, panel buttons,
+custom_status_task, autosave_task, etc) take turns instead of racing each other on the same server console.
+Each Server_API has its own Command_Queue. Jobs run one at a time, highest priority first (then first come first served):
+    ADMIN: stop, save-all, etc.
+    PLAYER: Most commands.
+    STATUS: Status checks, e.g. check command sent by server_console_reachable().
+A job can be a whole send-and-read-output sequence, so no other command gets sent in between.
+Jobs with the same key waiting in queue get merged, e.g. multiple status checks only get sent once and share the result.
+'commands_per_second' config limits how fast commands get sent to server (0 to disable).
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Callable, Awaitable
+
+from bot_files.slime_utils import lprint
+
+
+class Command_Queue:
+    ADMIN, PLAYER, STATUS = 0, 1, 2
+    admin_commands = ('stop', 'save-all', 'save-on', 'save-off', 'reload', 'restart')
+
+    def __init__(self, commands_per_second: float = 0):
+        self.commands_per_second = commands_per_second
+        self._queue = []  # Heap of (priority, order, key, job function, cost, future).
+        self._order = itertools.count()
+        self._keyed = {}  # Key: future, for jobs waiting in queue that can be merged.
+        self._new_job = asyncio.Event()
+        self._worker = None
+        self._next_send = 0  # time.monotonic() when next command is allowed to be sent.
+
+    def __len__(self):
+        return len(self._queue)
+
+    @classmethod
+    def get_priority(cls, command: str) -> int:
+        """Priority of a command based on what it is, ADMIN or PLAYER."""
+
+        return cls.ADMIN if command.strip().lstrip('/').split(' ', 1)[0].lower() in cls.admin_commands else cls.PLAYER
+
+    async def submit(self, job: Callable[[], Awaitable], priority: int = PLAYER, key: str = None, cost: int = 1) -> Any:
+        """
+        Add job to queue and waits for it to run.
+
+        Args:
+            job: Async function (no arguments) to run, e.g. lambda: server_api.send_command('list').
+            priority int(PLAYER): Command_Queue.ADMIN, PLAYER, or STATUS.
+            key str(None): Jobs with same key waiting in queue are only run once, and share the result.
+            cost int(1): Number of commands job sends, for commands_per_second limit.
+
+        Returns:
+            Any: What job returned, or False if job raised an error.
+        """
+
+        if key is not None and key in self._keyed:
+            return await asyncio.shield(self._keyed[key])
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), key, job, cost, future))
+        if key is not None:
+            self._keyed[key] = future
+        self._new_job.set()
+        self._start_worker()
+        return await asyncio.shield(future)
+
+    def _start_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Runs jobs one at a time."""
+
+        while True:
+            if not self._queue:
+                self._new_job.clear()
+                await self._new_job.wait()
+                continue
+
+            # Waits before popping, so a higher priority job added during the wait can still go first.
+            if (wait := self._next_send - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            priority, _, key, job, cost, future = heapq.heappop(self._queue)
+            if key is not None:
+                self._keyed.pop(key, None)
+            if self.commands_per_second:
+                self._next_send = time.monotonic() + cost / self.commands_per_second
+
+            try: result = await job()
+            except asyncio.CancelledError:
+                if not future.done(): future.set_result(False)
+                raise
+            except Exception as e:
+                lprint(f"ERROR: Problem running queued command: {e}")
+                result = False
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Stops worker, jobs still waiting get False."""
+
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+        while self._queue:
+            if not (future := heapq.heappop(self._queue)[-1]).done():
+                future.set_result(False)
+        self._keyed.clear()
@@ -0,0 +1,342 @@
+"""
+Asyncio RCON client, and persistent RCON connections for Server_API_Rcon.
+Instead of connecting, logging in, and disconnecting for every command, Rcon_Pool keeps a few logged in
+Rcon_Client sessions open and reuses them. Rcon_Client talks the Source RCON protocol directly with asyncio streams,
+so a slow or unreachable server doesn't stall the Discord bot while waiting for a response.
+
+RCON packet: length (int32), request id (int32), type (int32), payload (null terminated), one null pad byte. Little-endian.
+Minecraft splits responses larger than 4096 bytes into multiple packets with the same request id,
+but doesn't say which one is the last. So after each command, an extra 'end' packet with an invalid type is sent;
+the server answers requests in order, so once its reply to the 'end' packet arrives, the command's response is complete.
+Multiple commands can be pipelined on one connection, since each response is matched back to its command by request id.
+
+If the server is unreachable, reconnect attempts back off (2s, 4s, 8s... up to 60s), during which commands fail fast
+instead of each one waiting on a connection timeout.
+"""
+
+import re
+import time
+import struct
+import asyncio
+from collections import deque
+from typing import Union, List
+
+from bot_files.slime_utils import lprint
+
+
+class Rcon_Error(Exception): pass
+class Rcon_Auth_Error(Rcon_Error): pass
+class Rcon_Not_Sent_Error(Rcon_Error): pass  # Connection was dead before commands were sent, safe to send them again.
+
+
+class Rcon_Client:
+    # Packet types.
+    SERVERDATA_AUTH = 3
+    SERVERDATA_AUTH_RESPONSE = 2
+    SERVERDATA_EXECCOMMAND = 2
+    SERVERDATA_RESPONSE_VALUE = 0
+    max_payload_length = 1446  # Max length of packet payload Minecraft server will accept.
+
+    def __init__(self, address: str, port: int, password: str, timeout: int = 5):
+        self.address = address
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+
+        self._reader = self._writer = None
+        self._read_task = None
+        self._request_id = 0
+        self._fragments = {}  # Request id: Payloads received so far for that request.
+        self._pending = {}  # 'End' packet request id: (command request id, future to set with full response).
+
+    @property
+    def connected(self) -> bool:
+        return self._read_task is not None and not self._read_task.done()
+
+    async def connect(self) -> None:
+        """
+        Opens connection and logs in.
+
+        Raises:
+            Rcon_Auth_Error: Wrong RCON password.
+            OSError, asyncio.TimeoutError: Unable to connect.
+        """
+
+        self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(self.address, self.port), self.timeout)
+
+        auth_id = self._next_id()
+        self._write_packet(auth_id, self.SERVERDATA_AUTH, self.password)
+        await self._writer.drain()
+        # Some servers send an empty SERVERDATA_RESPONSE_VALUE packet before the auth response.
+        while True:
+            response_id, packet_type, _ = await asyncio.wait_for(self._read_packet(), self.timeout)
+            if packet_type == self.SERVERDATA_AUTH_RESPONSE:
+                break
+        if response_id != auth_id:  # Server replies with request id -1 if auth failed.
+            await self.close()
+            raise Rcon_Auth_Error(f"RCON authentication failed: {self.address}:{self.port}")
+
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def command(self, command: str) -> str:
+        """
+        Send command and wait for its full response.
+
+        Args:
+            command str: Minecraft server command.
+
+        Returns:
+            str: Command output, with Minecraft formatting codes (e.g. §a) removed.
+
+        Raises:
+            Rcon_Error: Not connected, command too long, or connection lost.
+        """
+
+        return (await self.commands([command]))[0]
+
+    async def commands(self, commands: List[str]) -> List[str]:
+        """
+        Pipelines multiple commands, sends them all at once then waits for all responses.
+        Responses are matched back to their command by request id.
+
+        Args:
+            commands list: Minecraft server commands.
+
+        Returns:
+            list: Output for each command, in same order as commands.
+
+        Raises:
+            Rcon_Not_Sent_Error: Connection was already closed, commands weren't sent.
+            Rcon_Error: A command too long, or connection lost after sending (server might've run them).
+        """
+
+        if not self.connected or self._writer.is_closing():
+            raise Rcon_Not_Sent_Error("RCON not connected.")
+        if any(len(i.encode('utf-8')) > self.max_payload_length for i in commands):
+            raise Rcon_Error(f"RCON command longer than {self.max_payload_length} bytes.")
+
+        loop = asyncio.get_running_loop()
+        requests = []  # (command request id, 'end' packet request id, future)
+        for command in commands:
+            request_id, end_id = self._next_id(), self._next_id()
+            future = loop.create_future()
+            self._fragments[request_id] = []
+            self._pending[end_id] = (request_id, future)
+            self._write_packet(request_id, self.SERVERDATA_EXECCOMMAND, command)
+            self._write_packet(end_id, self.SERVERDATA_RESPONSE_VALUE, '')
+            requests.append((request_id, end_id, future))
+
+        try:
+            try: await self._writer.drain()
+            except OSError as e:
+                raise Rcon_Not_Sent_Error(f"RCON connection lost before sending: {e}")
+            return list(await asyncio.gather(*[i[2] for i in requests]))
+        finally:
+            for request_id, end_id, _ in requests:
+                self._pending.pop(end_id, None)
+                self._fragments.pop(request_id, None)
+
+    async def ping(self) -> None:
+        """Sends only an 'end' packet, used to check if connection is still alive without running a command."""
+
+        end_id = self._next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._fragments[end_id] = []
+        self._pending[end_id] = (end_id, future)
+        self._write_packet(end_id, self.SERVERDATA_RESPONSE_VALUE, '')
+        try:
+            await self._writer.drain()
+            await future
+        finally:
+            self._pending.pop(end_id, None)
+            self._fragments.pop(end_id, None)
+
+    async def close(self) -> None:
+        if self._read_task:
+            self._read_task.cancel()
+        if self._writer:
+            self._writer.close()
+            try: await self._writer.wait_closed()
+            except Exception: pass
+        self._fail_pending(Rcon_Error("RCON connection closed."))
+
+    def _next_id(self) -> int:
+        self._request_id = self._request_id % 0x7FFFFFFF + 1
+        return self._request_id
+
+    def _write_packet(self, request_id: int, packet_type: int, payload: str) -> None:
+        data = struct.pack('<ii', request_id, packet_type) + payload.encode('utf-8') + b'\x00\x00'
+        self._writer.write(struct.pack('<i', len(data)) + data)
+
+    async def _read_packet(self) -> tuple:
+        """
+        Reads one packet.
+
+        Returns:
+            tuple: Request id, packet type, payload.
+        """
+
+        length, = struct.unpack('<i', await self._reader.readexactly(4))
+        data = await self._reader.readexactly(length)
+        request_id, packet_type = struct.unpack('<ii', data[:8])
+        return request_id, packet_type, data[8:-2].decode('utf-8', errors='replace')
+
+    async def _read_loop(self) -> None:
+        """Routes received packets to waiting commands by request id."""
+
+        try:
+            while True:
+                request_id, packet_type, payload = await self._read_packet()
+                if request_id == -1:
+                    raise Rcon_Auth_Error("RCON not authenticated.")
+                if request_id in self._pending:
+                    command_id, future = self._pending.pop(request_id)
+                    if not future.done():
+                        future.set_result(re.sub('§.', '', ''.join(self._fragments.pop(command_id, []))))
+                elif request_id in self._fragments:
+                    self._fragments[request_id].append(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._fail_pending(e if isinstance(e, Rcon_Error) else Rcon_Error(f"RCON connection lost: {e}"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+        self._fragments.clear()
+
+
+class Rcon_Pool:
+    max_backoff = 60
+
+    def __init__(self, address: str, port: int, password: str, size: int = 2, timeout: int = 5, keepalive_interval: int = 60):
+        self.address = address
+        self.port = port
+        self.password = password
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+
+        self._idle = deque()  # Logged in connections ready to use.
+        self._slots = asyncio.Semaphore(self.size)  # Limits how many connections can be open at once.
+        self._failed_connects = 0
+        self._retry_at = 0  # Don't try connecting again until after this time (time.monotonic()).
+        self._keepalive_task = None
+
+    def __repr__(self):
+        return f"address: {self.address}, port: {self.port}"
+
+    async def command(self, command: str) -> Union[str, bool]:
+        """
+        Send command using a pooled RCON connection. Connects if there's no idle connection.
+
+        Args:
+            command str: Minecraft server command.
+
+        Returns:
+            str, bool: Output from RCON or False if error.
+        """
+
+        return (await self.commands([command]))[0]
+
+    async def commands(self, commands: List[str]) -> List[Union[str, bool]]:
+        """
+        Pipelines multiple commands over one pooled RCON connection.
+
+        Args:
+            commands list: Minecraft server commands.
+
+        Returns:
+            list: Output for each command, or all False if error.
+        """
+
+        self._start_keepalive()
+        async with self._slots:
+            # If a pooled connection went stale (server restarted, etc) before anything was sent, retry once on a fresh connection.
+            for _ in range(2):
+                if not (client := await self._get_client()):
+                    return [False] * len(commands)
+
+                try:
+                    responses = await asyncio.wait_for(client.commands(commands), self.timeout)
+                except Rcon_Auth_Error:
+                    lprint(f"ERROR: RCON Authentication error: {self}")
+                    await client.close()
+                    return [False] * len(commands)
+                except Rcon_Not_Sent_Error:
+                    await client.close()
+                    continue
+                except (Rcon_Error, OSError, asyncio.TimeoutError):
+                    # Commands were sent and server might've run them, sending again could run 'give', 'op', etc twice.
+                    lprint(f"ERROR: No RCON response, commands not sent again: {self}")
+                    await client.close()
+                    return [False] * len(commands)
+
+                self._idle.append(client)
+                return responses
+
+        lprint(f"ERROR: Unknown RCON issue: {self}")
+        return [False] * len(commands)
+
+    async def _get_client(self) -> Union[Rcon_Client, bool]:
+        """Gets an idle connection that's still open, or opens a new one."""
+
+        while self._idle:
+            if (client := self._idle.pop()).connected:
+                return client
+        return await self._connect()
+
+    async def _connect(self) -> Union[Rcon_Client, bool]:
+        """
+        Opens and logs in a new RCON connection, unless still backing off from previous failures.
+
+        Returns:
+            Rcon_Client, bool: Logged in client, or False.
+        """
+
+        if time.monotonic() < self._retry_at:
+            return False
+
+        client = Rcon_Client(self.address, self.port, self.password, timeout=self.timeout)
+        try:
+            await client.connect()
+        except Rcon_Auth_Error:
+            lprint(f"ERROR: RCON Authentication error: {self}")
+            return False
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            self._failed_connects += 1
+            self._retry_at = time.monotonic() + min(2 ** self._failed_connects, self.max_backoff)
+            lprint(f"ERROR: Unable to connect with RCON: {self}")
+            await client.close()
+            return False
+
+        self._failed_connects = self._retry_at = 0
+        return client
+
+    def _start_keepalive(self) -> None:
+        """Starts keepalive task if not already running. Needs a running event loop."""
+
+        if self.keepalive_interval and (self._keepalive_task is None or self._keepalive_task.done()):
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+
+    async def _keepalive(self) -> None:
+        """Pings idle connections every X seconds, dropping any that stopped responding."""
+
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            for _ in range(len(self._idle)):
+                client = self._idle.popleft()
+                try: await asyncio.wait_for(client.ping(), self.timeout)
+                except (Rcon_Error, OSError, asyncio.TimeoutError): await client.close()
+                else: self._idle.append(client)
+
+    async def close(self) -> None:
+        """Stops keepalive task and disconnects all pooled connections."""
+
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        while self._idle:
+            await self._idle.pop().close()
@@ -0,0 +1,196 @@
+"""
+Server status (online, ping, players, version, MOTD) refreshed in the background, so commands, panels and the custom status
+don't each ping the server, check the console, or re-read the version. They get the last snapshot right away instead.
+
+Status comes from Server List Ping (doesn't use the console), and only falls back to checking the console if ping fails,
+at most once every status_console_check_interval seconds.
+Refreshes every status_refresh_interval seconds, or every status_refresh_fast_interval seconds for status_fast_time
+seconds after server starts/stops or its status changes. Player count is also kept current from join/leave events.
+
+Usage:
+    snapshot = backend.status.get()  # Doesn't wait, check snapshot.age if it matters how old it is.
+    snapshot = await backend.status.get_fresh(10)  # Refreshes first if snapshot is older than 10 seconds.
+"""
+
+import re
+import time
+import asyncio
+
+from bot_files import server_events
+from bot_files.server_events import Game_Event
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint, utils
+
+
+class Status_Snapshot:
+    __slots__ = ('server', 'online', 'latency', 'players_online', 'players_max', 'version', 'motd', 'source', 'checked_at')
+
+    def __init__(self, server: str):
+        self.server = server
+        self.online = None  # bool, None if unknown.
+        self.latency = None  # ms to game port (or custom_ping_address).
+        self.players_online = self.players_max = None
+        self.version = None
+        self.motd = None
+        self.source = None  # 'ping' or 'console', what online status came from.
+        self.checked_at = None  # time.monotonic() of refresh, None if never refreshed.
+
+    @property
+    def age(self) -> float:
+        """Seconds since snapshot was refreshed, inf if never."""
+
+        return float('inf') if self.checked_at is None else time.monotonic() - self.checked_at
+
+    def age_text(self) -> str:
+        return 'never' if self.checked_at is None else f"{int(self.age)}s ago"
+
+    def __repr__(self) -> str:
+        return f"Status_Snapshot({self.server!r}, online={self.online}, latency={self.latency}, players={self.players_online}, age={self.age:.0f}s)"
+
+
+class Server_Status:
+    def __init__(self, backend):
+        """
+        Args:
+            backend Backend: For server API, ping client, rosters, and event bus.
+        """
+
+        self.backend = backend
+        self.snapshots = {}  # Server name: Status_Snapshot.
+        self.fast_until = 0  # Refresh at fast interval until this time.monotonic().
+        self._wake = None  # asyncio.Event, set to refresh before interval is up.
+        self._refresh_tasks = {}  # Server name: Running refresh, so callers share it.
+        self._console_checked = {}  # Server name: time.monotonic() of last console check.
+        self._task = None
+
+    def start(self) -> None:
+        """Starts refreshing in the background. Needs a running event loop."""
+
+        self.backend.events.subscribe([server_events.SERVER_STARTED, server_events.SERVER_STOPPING], self._on_state_event)
+        self.backend.events.subscribe([server_events.PLAYER_JOIN, server_events.PLAYER_LEAVE], self._on_player_event)
+        self._wake = asyncio.Event()
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self.backend.events.unsubscribe(self._on_state_event)
+        self.backend.events.unsubscribe(self._on_player_event)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get(self, server_name: str = None) -> Status_Snapshot:
+        """
+        Last status, doesn't wait for anything.
+
+        Args:
+            server_name str(None): Defaults to selected server.
+
+        Returns:
+            Status_Snapshot: Has online None and age inf if it hasn't been refreshed yet.
+        """
+
+        server_name = server_name or config.server_name
+        return self.snapshots.get(server_name) or Status_Snapshot(server_name)
+
+    async def get_fresh(self, max_age: float) -> Status_Snapshot:
+        """Selected server's status, refreshes first if it's older than max_age seconds."""
+
+        if (snapshot := self.get()).age <= max_age:
+            return snapshot
+        return await self.refresh()
+
+    def request_refresh(self) -> None:
+        """Refresh in background now instead of waiting for interval, e.g. after switching servers."""
+
+        if self._wake:
+            self._wake.set()
+
+    def expect_change(self) -> None:
+        """Server is starting or stopping, refresh now and then at fast interval for status_fast_time seconds."""
+
+        self.fast_until = time.monotonic() + config.get_config('status_fast_time')
+        self.request_refresh()
+
+    def _on_state_event(self, event: Game_Event) -> None:
+        if event.server == config.server_name:
+            self.expect_change()
+
+    def _on_player_event(self, event: Game_Event) -> None:
+        # Roster is already updated by backend's subscriber, since it subscribed first.
+        roster = self.backend.get_roster(event.server)
+        if (snapshot := self.snapshots.get(event.server)) and roster.is_current(config.get_config('player_roster_sync_time')):
+            snapshot.players_online = len(roster.players)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try: await self.refresh()
+            except Exception as e:
+                lprint(f"ERROR: Problem refreshing server status: {e}")
+
+            fast = time.monotonic() < self.fast_until
+            interval = config.get_config('status_refresh_fast_interval' if fast else 'status_refresh_interval')
+            try: await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError: pass
+
+    async def refresh(self) -> Status_Snapshot:
+        """Refreshes selected server's status. If a refresh is already running, waits for that one instead."""
+
+        # Keyed by server, so a refresh started before switching servers isn't returned for the new one.
+        server_name = config.server_name
+        if not (task := self._refresh_tasks.get(server_name)) or task.done():
+            task = self._refresh_tasks[server_name] = asyncio.ensure_future(self._refresh(server_name))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, server_name: str) -> Status_Snapshot:
+        previous = self.get(server_name)
+        snapshot = Status_Snapshot(server_name)
+        snapshot.version, snapshot.motd = previous.version, previous.motd
+
+        address, port = config.get_config('server_address'), config.get_config('server_port')
+        data = None
+        if address and port:
+            self.backend.pinger.timeout = config.get_config('ping_timeout')
+            self.backend.pinger.samples = max(1, config.get_config('ping_samples'))
+            # Only logs failure if server was online, so an offline server doesn't fill the log.
+            data = await self.backend.pinger.query(address, int(port), log_errors=previous.online is not False)
+
+        if data:
+            snapshot.online, snapshot.source = True, 'ping'
+            snapshot.latency = data['latency']
+            snapshot.players_online, snapshot.players_max = data['players']['online'], data['players']['max']
+            snapshot.motd = data['motd']
+            # Version name can have server type in it, e.g. 'Paper 1.20.1'.
+            if match := re.search(r'\d+\.\d+(?:\.\d+)?', data['version']['name']):
+                snapshot.version = match.group()
+        elif server_api := self.backend.get_server_api(server_name):
+            # No address or ping failed, server might still be reachable through console (e.g. RCON on another address).
+            # Rate limited since it sends a command, keeps last console result in between. Checks right away if ping just stopped working.
+            snapshot.source = 'console'
+            last_check = self._console_checked.get(server_name, float('-inf'))
+            if previous.source != 'console' or time.monotonic() - last_check >= config.get_config('status_console_check_interval'):
+                self._console_checked[server_name] = time.monotonic()
+                snapshot.online = await server_api.check_console_reachable()
+            else: snapshot.online = previous.online
+
+        if config.get_config('use_custom_ping_address') and snapshot.online:
+            if latency := await utils.ping_address(config.get_config('custom_ping_address')):
+                snapshot.latency = float(latency)
+
+        # Same server still selected, so config and server.properties belong to it.
+        if server_name == config.server_name:
+            if snapshot.version and snapshot.version != config.get_config('server_version'):
+                config.set_config('server_version', snapshot.version)
+            snapshot.version = snapshot.version or config.get_config('server_version')
+            # Read only, doesn't go through update_property() which rewrites server.properties.
+            if not snapshot.motd and (data := await self.backend.get_property('motd')):
+                snapshot.motd = data.split('=', 1)[-1]
+
+        if previous.online is not None and snapshot.online != previous.online:
+            lprint(f"INFO: Server {server_name} is now {'online' if snapshot.online else 'offline'}")
+            self.fast_until = time.monotonic() + config.get_config('status_fast_time')
+
+        snapshot.checked_at = time.monotonic()
+        self.snapshots[server_name] = snapshot
+        return snapshot
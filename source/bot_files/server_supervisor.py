@@ -0,0 +1,165 @@
+"""
+Runs multiple Minecraft servers as subprocesses of the bot at the same time.
+Each server gets its own Server_API_Subprocess (own process, stdout/stderr readers, and Console_Stream),
+so commands can be sent to any running server by name, without having to select it first.
+If 'server_restart_on_crash' is enabled for a server, it gets restarted after exiting with an error,
+up to 'server_restart_limit' times per hour.
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Any
+
+try: import psutil
+except ImportError: psutil = None
+
+from bot_files.server_api import Server_API_Subprocess
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint
+
+
+class Supervised_Server:
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.api = Server_API_Subprocess(server_name)
+        self.restarts = deque()  # time.monotonic() of automatic restarts in the last hour.
+        self.total_restarts = 0
+        self.last_exit_code = None
+        self._proc = None  # psutil.Process, reused so cpu_percent() measures since last call.
+
+    @property
+    def running(self) -> bool:
+        return bool(self.api.server_subprocess and self.api.server_subprocess.returncode is None)
+
+    def get_config(self, config_key: str, default_return: Any = None) -> Any:
+        """Gets config from this server's configs, instead of selected server's."""
+
+        return config.servers.get(self.server_name, {}).get(config_key, config.get_config(config_key, default_return))
+
+    def get_stats(self) -> Dict:
+        """
+        Resource usage and restart info. CPU and memory include child processes, and need psutil.
+
+        Returns:
+            dict: name, running, pid, uptime (seconds), cpu (percent), memory (MB), restarts, exit_code.
+        """
+
+        stats = {'name': self.server_name, 'running': self.running, 'pid': None, 'uptime': 0,
+                 'cpu': None, 'memory': None, 'restarts': self.total_restarts, 'exit_code': self.last_exit_code}
+        if not self.running:
+            return stats
+
+        stats['pid'] = pid = self.api.server_subprocess.pid
+        stats['uptime'] = int(time.time() - self.api.started_at)
+        if psutil is None:
+            return stats
+
+        try:
+            if self._proc is None or self._proc.pid != pid:
+                self._proc = psutil.Process(pid)
+            procs = [self._proc] + self._proc.children(recursive=True)
+            stats['cpu'] = round(sum(i.cpu_percent(None) for i in procs), 1)
+            stats['memory'] = round(sum(i.memory_info().rss for i in procs) / 1048576, 1)
+        except psutil.Error:
+            pass
+
+        return stats
+
+
+class Server_Supervisor:
+    def __init__(self):
+        self.servers = {}  # Server name: Supervised_Server.
+        self.event_bus = None  # Event_Bus, if set each server's console output is parsed for game events.
+
+    def get_server(self, server_name: str) -> Supervised_Server:
+        """Gets supervised server, creates it if it doesn't exist yet (does not start it)."""
+
+        if server_name not in self.servers:
+            server = self.servers[server_name] = Supervised_Server(server_name)
+            server.api.on_exit = self._on_exit
+            if self.event_bus:
+                server.api.add_line_listener(self.event_bus.get_feeder(server_name))
+        return self.servers[server_name]
+
+    def get_api(self, server_name: str) -> Server_API_Subprocess:
+        return self.get_server(server_name).api
+
+    def is_supervised(self, server_api) -> bool:
+        return any(server_api is i.api for i in self.servers.values())
+
+    def running_servers(self) -> List[str]:
+        return [name for name, server in self.servers.items() if server.running]
+
+    async def start(self, server_name: str) -> bool:
+        """
+        Starts server subprocess, does nothing if already running.
+
+        Args:
+            server_name str: Server to start, must have configs.
+
+        Returns:
+            bool: If subprocess is running (not same as successful startup).
+        """
+
+        if server_name not in config.servers:
+            lprint(f"ERROR: No configs for server: {server_name}")
+            return False
+
+        server = self.get_server(server_name)
+        if server.running:
+            return True
+        if not await server.api.server_start():
+            return False
+
+        lprint(f"INFO: Started server subprocess: {server_name}")
+        return True
+
+    async def stop(self, server_name: str) -> bool:
+        """Sends 'stop' command to server, it won't be restarted."""
+
+        if not (server := self.servers.get(server_name)) or not server.running:
+            return False
+        return await server.api.server_stop()
+
+    async def send_command(self, server_name: str, command: str) -> bool:
+        """
+        Send command to a running server, doesn't have to be the selected server.
+
+        Returns:
+            bool: If command was written to server's stdin.
+        """
+
+        if not (server := self.servers.get(server_name)):
+            return False
+        return await server.api.command_queue.submit(lambda: server.api.send_command(command), server.api.command_queue.get_priority(command))
+
+    def get_stats(self) -> List[Dict]:
+        """Gets get_stats() for all supervised servers, running ones first."""
+
+        return sorted([i.get_stats() for i in self.servers.values()], key=lambda i: not i['running'])
+
+    async def _on_exit(self, server_api: Server_API_Subprocess) -> None:
+        """Restarts server if it crashed and restart_on_crash config enabled, unless it crashed too many times recently."""
+
+        if not (server := self.servers.get(server_api.server_name)):
+            return
+
+        server.last_exit_code = server_api.server_subprocess.returncode
+        # Exit code 0 means it stopped normally, e.g. 'stop' command from in-game.
+        if server_api.stop_requested or server.last_exit_code == 0 or not server.get_config('server_restart_on_crash'):
+            return
+
+        now = time.monotonic()
+        while server.restarts and now - server.restarts[0] > 3600:
+            server.restarts.popleft()
+        if len(server.restarts) >= server.get_config('server_restart_limit'):
+            lprint(f"ERROR: Server crashed too many times in the last hour, not restarting: {server.server_name}")
+            return
+
+        server.restarts.append(now)
+        server.total_restarts += 1
+        lprint(f"INFO: Server crashed ({server.last_exit_code}), restarting in {server.get_config('server_restart_delay')}s: {server.server_name}")
+        await asyncio.sleep(server.get_config('server_restart_delay'))
+        if not server_api.stop_requested:
+            await self.start(server.server_name)
@@ -16,17 +16,26 @@ Project Structure:
 """
 
 import os
-import asyncio
 import fileinput
 from os.path import join
 from typing import Union, Dict, Tuple, List
 
 from discord.ext.commands import Bot, Context
-import mctools
 
 from bot_files.server_api import Server_API, Server_API_Screen, Server_API_Subprocess, Server_API_Rcon, Server_API_Tmux
+from bot_files.server_supervisor import Server_Supervisor
+from bot_files.server_events import Event_Bus, Game_Event
+from bot_files import server_events
+from bot_files.chat_bridge import Chat_Bridge
+from bot_files.player_roster import Player_Roster
+from bot_files.server_ping import Server_Ping
+from bot_files.server_query import Server_Query
+from bot_files.server_status import Server_Status
+from bot_files.server_queue import Command_Queue
+from bot_files.slime_timers import Timer_Store
 from bot_files.slime_config import config
 from bot_files.slime_utils import lprint, utils, file_utils
+from bot_files.server_log_record import parse_log_line
 
 class Backend:
     # The order of this dictionary determines the priority of which API to use if multiple are enabled in configs.
@@ -43,7 +52,19 @@ class Backend:
         self.messages = []
         self.last_command_channel_id = None
         self.server_api = None
-        self.subprocess_servers = {}
+        self.supervisor = Server_Supervisor()  # Servers running as subprocesses of bot, can have multiple running at once.
+        self.timers = Timer_Store()  # Delayed commands saved to disk, e.g. reverting ?gamemodetimed.
+        # Game events (joins, chat, deaths, etc) from server output, see server_events.py.
+        self.events = Event_Bus()
+        self.supervisor.event_bus = self.events
+        self.events.subscribe([server_events.SERVER_STARTED, server_events.SERVER_STOPPING], self._on_server_state_event)
+        self.chat_bridge = Chat_Bridge(self)
+        self.rosters = {}  # Server name: Player_Roster, online players from join/leave events.
+        self.events.subscribe([server_events.PLAYER_JOIN, server_events.PLAYER_LEAVE, server_events.SERVER_STARTED,
+                               server_events.SERVER_STOPPING], lambda event: self.get_roster(event.server).on_event(event))
+        self.pinger = Server_Ping()  # Server List Ping client, caches SRV records.
+        self.query_client = None  # Server_Query for selected server, see get_query_client().
+        self.status = Server_Status(self)  # Background refreshed server status, see server_status.py.
         self.discord_channel = None
         self.server_active = False
 
@@ -64,6 +85,9 @@ class Backend:
             self.set_discord_channel()
             await self.select_server(config.get_config('selected_server'))
             self.server_api.bot = bot
+            self.timers.start(self.run_timer)
+            self.chat_bridge.start()
+            self.status.start()
             return True
 
         return False
@@ -143,19 +167,19 @@ class Backend:
         if config.switch_server_configs(server_name) is False:
             return False
 
+        # Closes open connections (e.g. RCON) of previous server API.
+        if self.server_api and not self.supervisor.is_supervised(self.server_api):
+            await self.server_api.close()
+        self.server_api = None
+
         # In cases of wanting to use subprocess to run Minecraft server and have the ability to switch servers to control.
-        # This needs its own object so you can switch between them without killing the Minecraft server subprocess.
+        # Each server has its own object in supervisor, so you can switch between them without killing the Minecraft server subprocess.
         if config.get_config('server_use_subprocess'):
-            server_name = config.server_configs['server_name']
-            # Checks if a subprocess API instance for selected server already exists.
-            if config.server_configs['server_name'] in self.subprocess_servers:
-                return self.subprocess_servers[server_name]
-            else:
-                # Create new subprocess API
-                new_subprocess_server = Server_API_Subprocess()
-                self.subprocess_servers[server_name] = new_subprocess_server
-                self.server_api = new_subprocess_server
-                return True
+            self.server_api = self.supervisor.get_api(config.server_configs['server_name'])
+            self.get_roster(config.server_name).live = True  # Supervisor feeds subprocess console to event bus.
+            self.status.request_refresh()
+            lprint(f"INFO: Selected Server: {server_name}")
+            return True
 
         for config_name, api in self.server_api_types.items():
             # Checks if corresponding config is enabled to use API, e.g. use_rcon, bot_use_tmux, use_screen, etc...
@@ -165,19 +189,24 @@ class Backend:
 
         if not self.server_api:
             self.server_api = Server_API()
+        self.get_roster(config.server_name).live = self.server_api.add_line_listener(self.events.get_feeder(config.server_name))
+        self.status.request_refresh()
 
         lprint(f"INFO: Selected Server: {server_name}")
         return True
 
     # Send command to server console.
-    async def send_command(self, command: str) -> bool:
+    async def send_command(self, command: str, priority: int = None) -> bool:
         """
         Sends command to Minecraft server. Depending on whether server is a subprocess or in Tmux session or using RCON.
         Sends command to server, then reads from latest.log file for output.
         If using RCON, will only return RCON returned data, can't read from server log.
+        Command waits its turn in server's command queue, see server_queue.py.
 
         Args:
             command str: Command to send.
+            priority int(None): Command_Queue.ADMIN, PLAYER, or STATUS. Defaults to ADMIN for stop/save commands, else PLAYER.
+              Same STATUS commands waiting in queue only get sent once.
 
         Returns:
             bool: If successfully sent command to console.
@@ -185,24 +214,132 @@ class Backend:
 
         # check_before_command is False, the bot will send the server commands even if status of server status is unknown.
         # Skips this if no local file access.
+        # Uses cached reachable status if server was recently checked or is still printing output, see Server_Reachability.
+        server_api = self.server_api  # Selected server can change while command waits in queue.
         if config.get_config('check_before_command') and config.get_config('server_files_access'):
-            if not await self.server_api.server_console_reachable():
+            if not await server_api.check_console_reachable():
                 return False
 
-        if await self.server_api.send_command(command):
-            self.server_api.last_command_sent = command
+        if priority is None:
+            priority = Command_Queue.get_priority(command)
+        key = command if priority == Command_Queue.STATUS else None
+        if await server_api.command_queue.submit(lambda: server_api.send_command(command), priority, key=key):
+            server_api.last_command_sent = command
             return True
 
+        server_api.reachability.record(False)
         return False
 
-    async def get_command_output(self, keywords: str = None, extra_lines: int = 0, all_lines=False) -> Union[str, bool]:
+    async def send_commands(self, commands: List[str], keywords: List[str] = None) -> Union[List, bool]:
         """
+        Sends multiple commands in one go. Only checks if server is reachable once, instead of for every command.
+
+        Args:
+            commands list: Commands to send.
+            keywords list(None): Keyword for each command to find its output in server log, see Server_API.send_batch().
 
         Returns:
+            list, bool: Result for each command, or False if server console unreachable.
+        """
 
+        if not commands:
+            return []
+
+        server_api = self.server_api
+        if config.get_config('check_before_command') and config.get_config('server_files_access'):
+            if not await server_api.check_console_reachable():
+                return False
+
+        priority = min(Command_Queue.get_priority(i) for i in commands)
+        results = await server_api.command_queue.submit(lambda: server_api.send_batch(commands, keywords), priority, cost=len(commands))
+        server_api.last_command_sent = commands[-1]
+        return results or [False] * len(commands)
+
+    def get_server_api(self, server_name: str) -> Union[Server_API, None]:
+        """
+        Gets API for a server that's selected or running under supervisor.
+
+        Returns:
+            Server_API, None: None if server isn't selected and not a running subprocess.
+        """
+
+        if server_name == config.server_name:
+            return self.server_api
+        if server_name in self.supervisor.running_servers():
+            return self.supervisor.get_api(server_name)
+        return None
+
+    def _on_server_state_event(self, event: Game_Event) -> None:
+        """Server said it finished starting or is stopping, so reachable status is known without sending a check command."""
+
+        if not (server_api := self.get_server_api(event.server)):
+            return
+        if event.type == server_events.SERVER_STARTED:
+            server_api.reachability.record(True)
+            lprint(f"INFO: Server started: {event.server} ({event.data['startup_time']}s)")
+        else: server_api.reachability.reset()
+
+    async def run_timer(self, timer: Dict) -> bool:
+        """
+        Sends due timer's commands to its server, used by Timer_Store.
+        If timer's server isn't selected, it has to be a running subprocess server.
+
+        Args:
+            timer dict: Timer from Timer_Store.
+
+        Returns:
+            bool: If commands were sent, False to try again later.
         """
 
-        return await self.server_api.get_command_output(keywords, extra_lines, extra_lines, all_lines)
+        if timer['server'] == config.server_name:
+            results = await self.send_commands(timer['commands'])
+        elif timer['server'] in self.supervisor.running_servers():
+            server_api = self.supervisor.get_api(timer['server'])
+            results = await server_api.command_queue.submit(lambda: server_api.send_batch(timer['commands']), cost=len(timer['commands']))
+        else: results = False
+
+        if not results or not any(results):
+            lprint(f"INFO: Unable to run timer, will try again: {timer['description']}")
+            return False
+
+        if timer['message']:
+            await self.send_msg(timer['message'])
+        lprint(f"INFO: Ran timer: {timer['description']}")
+        return True
+
+    async def send_command_output(self, command: str, keywords: Union[str, List] = None, extra_lines: int = 0,
+                                  all_lines: bool = False, priority: int = None) -> Union[List, bool]:
+        """
+        Sends command and gets its output from console or server log, as one job in server's command queue.
+        So another command can't be sent (and its output mixed up with this one's) before the output is read.
+
+        Args:
+            command str: Command to send.
+            keywords str, list(None): Keyword or list of keywords to find output line, matched with Keyword_Matcher.
+            extra_lines int(0): Also get X lines after match, for multi-lined outputs.
+            all_lines bool(False): Get all matching lines instead of only the first.
+            priority int(None): Command_Queue priority, see send_command().
+
+        Returns:
+            list, bool: Output lines (empty if none found), or False if command couldn't be sent.
+        """
+
+        server_api = self.server_api
+        if config.get_config('check_before_command') and config.get_config('server_files_access'):
+            if not await server_api.check_console_reachable():
+                return False
+
+        if priority is None:
+            priority = Command_Queue.get_priority(command)
+        key = repr((command, keywords, extra_lines, all_lines)) if priority == Command_Queue.STATUS else None
+        output = await server_api.command_queue.submit(lambda: server_api.send_command_output(command, keywords, extra_lines, all_lines),
+                                                       priority, key=key)
+        if output is False:
+            server_api.reachability.record(False)
+            return False
+
+        server_api.last_command_sent = command
+        return output
 
     # ===== Server status
     # Checks if server is reachable. By sending a command or using ping, depending on configs.
@@ -211,49 +348,49 @@ class Backend:
         Returns boolean if server is active.
         Depending on configs, priority: ping_server(), server_console_reachable(), _get_status()
 
+        Args:
+            force_check bool(False): Send check command even if configs disable it, or there's a cached status.
+
         Returns:
             bool: If server is active (not always same as MC console is reachable).
         """
 
         # Can force check even if configs disable it.
         if config.get_config('check_before_command') or force_check:
-            return await self.server_api.server_console_reachable()
+            return await self.server_api.check_console_reachable(force=force_check)
 
         return await self.server_ping()
 
     async def server_ping(self, use_custom_address: bool = False) -> Union[str, bool]:
         """
-        Uses ping command to check if server reachable.
+        Gets latency to server's game port using Server List Ping, falls back to connecting to address if it fails.
+
+        Args:
+            use_custom_address bool(False): Connect to custom_ping_address config instead, if server address can't be used.
 
         Returns:
-            bool: If ping was successful.
+            str, bool: Latency in ms, e.g. '12.34', or False if unreachable.
         """
 
-        results = None
-        # Use a custom address for getting ping latency.
-        address = config.get_config('custom_ping_address') if use_custom_address else config.get_config('server_address')
-        if data := await utils.ping_address(address):
-            results = data
-        # Uses mctools ping query to get ping.
+        if use_custom_address:
+            results = await utils.ping_address(config.get_config('custom_ping_address'))
         elif data := await self.server_ping_query():
-            results = data['time']
+            results = data['latency']
+        else: results = await utils.ping_address(config.get_config('server_address'))
 
         try:
-            results = f"{float(results) * 100:.2f}"
-        except: pass
-
-        if results:
-            return results
-
-        return False
+            return f"{float(results):.2f}"
+        except (TypeError, ValueError):
+            return False
 
-    # Query ping server. Must have 'enable-query=true' in server.properties.
+    # Server List Ping, same as Minecraft's multiplayer server list. Doesn't need 'enable-query=true'.
     async def server_ping_query(self) -> Union[Dict, bool]:
         """
-        Gets server information using mctools.PINGClient()
+        Gets server information using Server List Ping, see server_ping.py.
 
         Returns:
-            dict: Dictionary containing 'version', and 'description' (motd).
+            dict: Dictionary containing 'version', 'players' (with 'sample'), 'description', 'motd' (description as plain text),
+                'latency' (median ms), etc.
         """
 
         if not config.get_config('server_address'):
@@ -265,54 +402,123 @@ class Backend:
             lprint("ERROR: Server port issue.")
             return False
 
-        return await asyncio.wait_for(self._ping_query(), timeout=1)
+        self.pinger.timeout = config.get_config('ping_timeout')
+        self.pinger.samples = max(1, config.get_config('ping_samples'))
+        return await self.pinger.query(config.get_config('server_address'), int(config.get_config('server_port')))
 
-    async def _ping_query(self):
-        try:
-            ping = mctools.PINGClient(config.get_config('server_address'), config.get_config('server_port'))
-            stats = ping.get_stats()
-            ping.stop()
-        except:
+    def get_query_client(self) -> Server_Query:
+        """Query client for selected server's address, made again if address or port changed."""
+
+        address, port = config.get_config('server_address'), int(config.get_config('server_query_port'))
+        if not self.query_client or (self.query_client.host, self.query_client.port) != (address, port):
+            if self.query_client:
+                self.query_client.close()
+            self.query_client = Server_Query(address, port)
+        self.query_client.timeout = config.get_config('ping_timeout')
+        self.query_client.cache_time = config.get_config('query_cache_time')
+        return self.query_client
+
+    # Must have 'enable-query=true' in server.properties, and server_use_query config.
+    async def server_query(self, full: bool = True, use_cache: bool = True) -> Union[Dict, bool]:
+        """
+        Gets server information using query protocol, see server_query.py.
+
+        Args:
+            full bool(True): Full stat, includes version, plugins, and player names. Else basic stat (MOTD, map, player count).
+            use_cache bool(True): Can use results from the last query_cache_time seconds.
+
+        Returns:
+            dict, bool: Server info, or False if query isn't enabled or server didn't respond.
+        """
+
+        if not config.get_config('server_use_query'):
+            return False
+        if not config.get_config('server_address'):
+            lprint("ERROR: Could not query server address.")
             return False
-        else:
-            return stats
+
+        client = self.get_query_client()
+        return await (client.full_stat(use_cache) if full else client.basic_stat(use_cache))
 
     # ===== Get data
-    async def get_players(self) -> Union[Tuple[List[str], str], bool]:
+    def get_roster(self, server_name: str) -> Player_Roster:
+        if server_name not in self.rosters:
+            self.rosters[server_name] = Player_Roster(server_name)
+        return self.rosters[server_name]
+
+    async def get_players(self, force_check: bool = False) -> Union[Tuple[List[str], str], bool, None]:
         """
-        Extracts wanted data from output of 'list' command.
+        Gets online players. Uses roster kept from join/leave events if it's been synced recently,
+        else server query if enabled (doesn't use console), else sends 'list'.
+
+        Args:
+            force_check bool(False): Check server even if roster is current.
 
         Returns:
-            Player data, bool: Returns player names and associating text, or False.
+            Player data, bool, None: Returns player names and associating text, None if no players online, or False.
         """
 
+        roster = self.get_roster(config.server_name)
+        if not force_check and roster.is_current(config.get_config('player_roster_sync_time')):
+            return roster.get_players()
+
+        if stats := await self.server_query(use_cache=not force_check):
+            names = stats['players']['names']
+            roster.sync(names, f"There are {stats['players']['online']} of a max of {stats['players']['max']} players online")
+            return roster.get_players()
+
         # Converts server version to usable int. Extracts number after initial '1.', e.g. '1.12.2' > 12
         version = await self.get_server_version()  # Needs version to know how to parse output.
-        response = await self.send_command("list")
+        output = await self.send_command_output("list", 'There are', 1, priority=Command_Queue.STATUS)
 
-        if not response:
+        if output is False:
             await self.send_msg("**Error:** No response from console.")
             lprint("ERROR: Unable to fetch player list, no response from console.")
             return False
         if not version:
-            await backend.send_msg("**Error:** Unable to get server version.")
+            await self.send_msg("**Error:** Unable to get server version.")
             lprint("ERROR: Unable to fetch player list, problem getting server version.")
             return False
 
-        output = await backend.get_command_output('There are', 1)
-        return utils.parse_players_output(output, version)
+        if players := utils.parse_players_output(output, version):
+            roster.sync(*players)
+        elif players is None:
+            roster.sync([], '')
+        return players
 
     async def get_coords(self, player: str = '') -> Union[str, bool]:
         """Gets player's location coordinates."""
 
-        if not await backend.send_command(f"data get entity {player} Pos"):
-            return False
-            #log_data = self.read_server_log('entity data', stopgap_str=response[1])
-        # ['', '14:38:26] ', 'Server thread/INFO]: R3diculous has the following entity data: ', '-64.0d, 65.0d, 16.0d]\n']
-        # Removes 'd' and newline character to get player coordinate. '-64.0 65.0 16.0d'
-        if log_data := await self.get_command_output('data get entity'):
-            location = log_data.split('[')[-1][:-3].replace('d', '')
-            return location
+        return (await self.get_coords_batch([player]))[player]
+
+    async def get_coords_batch(self, players: List[str]) -> Dict[str, Union[str, bool]]:
+        """
+        Gets location coordinates of multiple players at once.
+        Sends all 'data get entity' commands together and reads their outputs in one go (or pipelined over RCON),
+        instead of waiting for each player's output before sending the next command.
+
+        Args:
+            players list: Player names.
+
+        Returns:
+            dict: Player name: Coordinates, e.g. '-64.0 65.0 16.0', or False if not found.
+        """
+
+        players = list(dict.fromkeys(players))  # Removes duplicates, keeps order.
+        commands = [f"data get entity {i} Pos" for i in players]
+        # Each player's output line has their name in it, so outputs can be matched to players.
+        results = await self.send_commands(commands, [f"{i} has the following entity data" for i in players]) or []
+
+        coords = {}
+        for player, result in zip(players, results):
+            if not isinstance(result, str) or '[' not in (message := parse_log_line(result).message):
+                coords[player] = False
+                continue
+            # [14:38:26] [Server thread/INFO]: R3diculous has the following entity data: [-64.0d, 65.0d, 16.0d]
+            # Gets numbers from between the last brackets of the message, without the 'd' suffix. '-64.0 65.0 16.0'
+            coords[player] = ' '.join(i.strip().rstrip('d') for i in message[message.rfind('[') + 1:].rstrip(']').split(','))
+
+        return {i: coords.get(i, False) for i in players}
 
     async def get_motd(self) -> str:
         """
@@ -350,9 +556,8 @@ class Backend:
                 version = data[0].split('version')[-1].strip()
 
         # Get version info from server console.
-        elif await self.send_command('version'):
-            if data := await self.get_command_output('This server is running'):
-                version = utils.parse_version_output(data[0])
+        elif data := await self.send_command_output('version', 'This server is running'):
+            version = utils.parse_version_output(data[0])
 
         # Fallback to version from config file.
         version = version or from_config
@@ -369,6 +574,12 @@ class Backend:
 
         return await self.server_api.read_server_log(*args, **kwargs)
 
+    async def read_log_category(self, category: str, lines: int = 20) -> Union[List, bool]:
+        return await self.server_api.read_log_category(category, lines)
+
+    async def search_all_logs(self, search: Union[str, List], lines: int = 20, match_all: bool = False) -> Union[List, bool]:
+        return await self.server_api.search_all_logs(search, lines, match_all)
+
     async def update_property(self, property_name=None, value: str = '') -> Union[str, bool]:
         """
         Edits server.properties file if received target_property and value. Edits inplace with fileinput
@@ -414,15 +625,26 @@ class Backend:
             property_name str: Property name to get.
 
         Returns:
-            str: Value found.
+            str: Line found, e.g. 'motd=A Minecraft Server'.
             bool: If value not found or if not able to access file.
         """
 
-        if config.get_config('server_files_access'):
-            if data := await self.update_property(property_name):
-                return data
+        if not config.get_config('server_files_access'):
+            return False
 
-        return False
+        # Only reads file, update_property() rewrites it even when not changing anything.
+        file_path = config.get_config('server_properties_filepath')
+        if not file_utils.test_file(file_path):
+            return False
+
+        return_line = None
+        with open(file_path, 'r') as file:
+            for line in file:
+                split_line = line.split('=', 1)
+                if property_name in split_line[0] and len(split_line) > 1:
+                    return_line = line.strip()
+
+        return return_line if return_line else False
 
     # ===== Adding/Deleting servers
     async def server_new(self, server_name: str, server_data: Dict = None, new_folder=True) -> Union[Dict, bool]:
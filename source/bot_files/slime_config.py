@@ -64,12 +64,34 @@ class Config():
             # Can use ?setchannel command or set here, it's to send a startup message in Discord.
             'channel_id': 0,
             # Every X minutes, updates bot's custom status showing player's online and server ping. E.g. Playing - 3 | Ping - 10
-            # NOTE: Need to set 'enable-query=true' in server.properties for this to work. Tip: '?property enable-query true'
             'players_custom_status': True,
             'custom_status_interval': 1,
             # If unable to use server address to get ping latency.
             'use_custom_ping_address': False,
             'custom_ping_address': '1.1.1.1',
+            # Seconds to wait for server to answer a Server List Ping (?serverping, ?serverquery, custom status).
+            'ping_timeout': 2,
+            # Latency measurements per ping, median is shown. Each extra one is a new connection to the server.
+            'ping_samples': 3,
+            # Server status (online, ping, players, version, MOTD) is refreshed in the background every X seconds, commands use last result.
+            'status_refresh_interval': 60,
+            # Refreshes every X seconds instead, for status_fast_time seconds after server starts/stops or its status changes.
+            'status_refresh_fast_interval': 5,
+            'status_fast_time': 120,
+            # If ping fails, console is checked (sends a command) at most once every X seconds, even at the fast interval.
+            'status_console_check_interval': 60,
+            # Max bytes per file attachment, bigger logs are sent in multiple parts. Discord's limit is 10MB without server boosts.
+            'discord_upload_limit': 8 * 1024 * 1024,
+            # Max parts per file. If it'd need more, parts are gzip compressed, and anything still left over isn't sent.
+            'discord_upload_max_parts': 5,
+            # Two-way chat between a Discord channel and Minecraft. Use ?chatbridge in the channel to set it, 0 to disable.
+            'chat_bridge_channel_id': 0,
+            # Seconds between sending batched chat to Discord/Minecraft. Discord allows about 5 messages per 5 seconds per channel.
+            'chat_bridge_interval': 2,
+            # Max lines waiting to be sent each way, oldest are dropped if full (e.g. Discord rate limit, server unreachable).
+            'chat_bridge_queue_size': 200,
+            # Also send player joins, leaves, deaths, and advancements to Discord.
+            'chat_bridge_events': True,
 
             # Use Tmux to send commands to server.
             'bot_use_tmux': False,
@@ -87,6 +109,8 @@ class Config():
             'servers_path': f'{self.mc_path}//servers',
             'user_config_filepath': f'{self.bot_source_path}//user_config.json',
             'bot_log_filepath': f'{self.bot_source_path}//slime_bot.log',
+            # Delayed commands (?killdelay, ?gamemodetimed, ?optimed, etc) are saved here so they still run after bot restarts.
+            'timers_filepath': f'{self.bot_source_path}//timers.json',
 
             # Use cmd commands. E.g. 'start' command when starting a server only if platform.systems() == 'Windows'.
             'windows_compatibility': True if platform.system() == 'Windows' else False,
@@ -109,6 +133,12 @@ class Config():
                 # Server domain or IP address. Used for server_ping(), ping_address(), etc,.
                 'server_address': 'localhost',  # Leave '' for blank instead of None or False
                 'server_port': 25565,
+                # Minecraft query protocol (UDP), gets map, plugins, and player list without using the console.
+                # Needs 'enable-query=true' in server.properties (tip: '?property enable-query true'), query.port is server_query_port.
+                'server_use_query': False,
+                'server_query_port': 25565,
+                # Seconds to reuse query results for.
+                'query_cache_time': 10,
 
                 # Local file access allows for server files/folders manipulation,for features like backup/restore world saves, editing server.properties file, and read server log.
                 'server_files_access': False,
@@ -117,6 +147,12 @@ class Config():
                 'server_use_rcon': False,
                 'rcon_pass': 'pass',
                 'rcon_port': 25575,
+                # Number of RCON connections kept open and reused between commands.
+                'rcon_pool_size': 2,
+                # Seconds to wait for RCON to connect or respond before giving up.
+                'rcon_timeout': 5,
+                # Checks idle RCON connections every X seconds so dropped ones get replaced. Set to 0 to disable.
+                'rcon_keepalive_interval': 60,
 
                 # Use tmux to run/command Miencraft server.
                 'server_use_tmux': False,
@@ -127,10 +163,16 @@ class Config():
                 # Use screen to start and send commands to Minecraft server. Only Minecraft server, bot can be run alone or in tmux.
                 'server_use_screen': False,
                 'server_screen_name': 'minecraft_server',
+                # Screen writes server console output here, so the bot can read command outputs.
+                'server_screen_log_filepath': f'{self.mc_path}//servers//SELECTED_SERVER//logs//screen.log',
 
                 # Uses subprocess.Popen() to run Minecraft server and send commands. If this bot halts, server will halt also.
                 # Useful if you can't use Tmux. Prioritizes server_use_subprocess over Tmux option for commands like ?serverstart.
                 'server_use_subprocess': False,
+                # Restart server subprocess if it exits with an error, up to server_restart_limit times per hour. Waits server_restart_delay seconds before restarting.
+                'server_restart_on_crash': False,
+                'server_restart_limit': 3,
+                'server_restart_delay': 10,
 
                 # Launch command to start Minecraft java server.
                 'server_launch_command': 'java -server -Xmx4G -Xms1G -XX:+UseG1GC -XX:MaxGCPauseMillis=100 -XX:ParallelGCThreads=2 -jar server.jar nogui',
@@ -147,9 +189,20 @@ class Config():
                 # The command sent to server to check if responsive. send_command() will send something like 'xp 0.64356...'.
                 # If server_use_essentialsx is True, the bot will use /pong command instead.
                 'status_checker_command': 'xp',
+                # Seconds to trust a successful check, so back-to-back commands don't each send a check command first.
+                # Also stays trusted while server keeps printing to console or latest.log.
+                'reachable_cache_time': 30,
+                # After this many failed checks in a row, commands fail right away without checking for reachable_retry_time seconds.
+                'reachable_fail_threshold': 2,
+                'reachable_retry_time': 30,
+                # Online players are tracked from join/leave log lines, 'list' is only sent if it's been this many seconds since last one.
+                'player_roster_sync_time': 600,
                 # Wait time (in seconds) between sending command to MC server and reading server logs for output.
                 # Time between receiving command and logging output varies depending on PC specs, MC server type (papermc, vanilla, forge, etc), and how many mods.
+                # If bot can capture console output (Tmux, Screen, Subprocess), this is the max wait time, output is returned as soon as it shows up.
                 'command_buffer_time': 1,
+                # Max commands sent to server per second, extra commands wait in queue. 0 to disable.
+                'commands_per_second': 20,
 
                 # TODO Fix
                 # Send 'save-all' to MC server every X minutes.
@@ -158,6 +211,10 @@ class Config():
 
                 # Max number of log lines to read. Increase if server is really busy.
                 'log_lines_limit': 500,
+                # Number of recent latest.log lines kept in memory (needs server_files_access), so most log lookups don't need to read the file. 0 to disable.
+                'log_buffer_lines': 5000,
+                # Number of recent server console lines kept in memory, if server API can capture console output (e.g. Tmux).
+                'console_buffer_lines': 1000,
 
                 # SELECTED_SERVER will be substituted with server name.
                 'server_path': f'{self.mc_path}//servers//SELECTED_SERVER',
@@ -0,0 +1,208 @@
+"""
+Delayed actions (e.g. ?killdelay, ?gamemodetimed, ?optimed) that are saved to disk, so they still happen after a bot restart.
+Instead of each command sleeping until it's time, a timer is added to Timer_Store which runs the commands through Backend when due.
+
+Timer_Wheel is a hierarchical timing wheel with 1 second ticks, 4 levels of 64 slots:
+    level 0: next 64s, level 1: next ~68min, level 2: next ~3 days, level 3: next ~194 days, anything later goes in overflow.
+Adding or removing a timer doesn't depend on how many other timers there are, and each tick only looks at one slot.
+When the lower level wraps around, the next slot of the level above gets spread out into the lower levels (cascade).
+"""
+
+import os
+import time
+import asyncio
+from typing import Union, Dict, List, Callable, Awaitable
+
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint, file_utils
+
+
+class Timer_Wheel:
+    slot_bits = 6
+    slots = 1 << slot_bits  # Slots per level.
+    levels = 4
+
+    def __init__(self, current_tick: int):
+        self.current_tick = current_tick
+        self.wheels = [[set() for _ in range(self.slots)] for _ in range(self.levels)]
+        self.overflow = set()
+        self.ready = []  # Timers already due when added.
+
+    def add(self, timer_id: int, due_tick: int) -> None:
+        """
+        Adds timer to slot depending on how far away due_tick is.
+
+        Args:
+            timer_id int: Timer id.
+            due_tick int: Tick (time.time() seconds) timer is due.
+        """
+
+        if due_tick <= self.current_tick:
+            self.ready.append(timer_id)
+            return
+
+        for level in range(self.levels):
+            # Lowest level where due_tick and current_tick share all higher bits, so the slot comes up before wheel wraps around.
+            if due_tick >> (self.slot_bits * (level + 1)) == self.current_tick >> (self.slot_bits * (level + 1)):
+                self.wheels[level][(due_tick >> (self.slot_bits * level)) & (self.slots - 1)].add((due_tick, timer_id))
+                return
+
+        self.overflow.add((due_tick, timer_id))
+
+    def advance(self, to_tick: int) -> List[int]:
+        """
+        Moves wheel forward to to_tick, one tick at a time.
+
+        Args:
+            to_tick int: Tick to move to, usually int(time.time()).
+
+        Returns:
+            list: Timer ids that are due.
+        """
+
+        due, self.ready = self.ready, []
+        while self.current_tick < to_tick:
+            self.current_tick += 1
+            for level in range(1, self.levels + 1):
+                # Cascade when all bits below this level are 0, i.e. lower level just wrapped around.
+                if self.current_tick & ((1 << (self.slot_bits * level)) - 1):
+                    break
+                if level == self.levels:
+                    timers, self.overflow = self.overflow, set()
+                else:
+                    slot = (self.current_tick >> (self.slot_bits * level)) & (self.slots - 1)
+                    timers, self.wheels[level][slot] = self.wheels[level][slot], set()
+                for due_tick, timer_id in timers:
+                    self.add(timer_id, due_tick)
+
+            slot = self.wheels[0][self.current_tick & (self.slots - 1)]
+            due.extend(timer_id for _, timer_id in slot)
+            slot.clear()
+
+        due.extend(self.ready)
+        self.ready = []
+        return due
+
+
+class Timer_Store:
+    retry_delay = 60  # If server unreachable when timer is due, try again after this many seconds.
+
+    def __init__(self, file_path: str = None):
+        self.file_path = file_path  # Defaults to timers_filepath config, set in start() since user configs may not be loaded yet.
+        self.timers = {}  # Timer id: Timer dict, see add().
+        self.wheel = Timer_Wheel(int(time.time()))
+        self.run_action = None  # Async function that runs a due timer, returns bool if successful.
+        self._next_id = 1
+        self._task = None
+
+    def start(self, run_action: Callable[[Dict], Awaitable[bool]]) -> None:
+        """
+        Loads saved timers and starts running them when due. Needs a running event loop.
+
+        Args:
+            run_action: Async function that takes timer dict, returns True if ran, or False to try again later.
+        """
+
+        self.run_action = run_action
+        if self._task and not self._task.done():
+            return
+
+        self.file_path = self.file_path or config.get_config('timers_filepath')
+        self.load()
+        self._task = asyncio.create_task(self._run())
+
+    def load(self) -> None:
+        """Reads saved timers file, timers that became due while bot was off will run right away."""
+
+        self.timers = {}
+        self.wheel = Timer_Wheel(int(time.time()))
+        if not os.path.isfile(self.file_path):
+            return
+
+        for timer in file_utils.read_json(self.file_path) or []:
+            self.timers[timer['id']] = timer
+            self.wheel.add(timer['id'], int(timer['due']))
+        self._next_id = max(self.timers, default=0) + 1
+        if self.timers:
+            lprint(f"INFO: Loaded {len(self.timers)} timers")
+
+    def save(self) -> bool:
+        """Writes timers to file. Writes to temp file first, so file isn't left half written if bot stops."""
+
+        self.file_path = self.file_path or config.get_config('timers_filepath')
+        temp_path = self.file_path + '.tmp'
+        if not file_utils.write_json(temp_path, list(self.timers.values())):
+            return False
+        os.replace(temp_path, self.file_path)
+        return True
+
+    def add(self, delay: float, commands: List[str], message: str = '', description: str = '', server_name: str = None) -> Dict:
+        """
+        Schedules commands to be sent to server after delay.
+
+        Args:
+            delay float: Seconds to wait.
+            commands list: Server commands to send when due.
+            message str(''): Discord message to send after commands are sent.
+            description str(''): Shown in ?timers.
+            server_name str(None): Server to send commands to, defaults to selected server.
+
+        Returns:
+            dict: New timer.
+        """
+
+        timer = {'id': self._next_id, 'due': time.time() + delay, 'server': server_name or config.server_name,
+                 'commands': commands, 'message': message, 'description': description or ', '.join(commands)}
+        self._next_id += 1
+        self.timers[timer['id']] = timer
+        self.wheel.add(timer['id'], int(timer['due']))
+        self.save()
+        return timer
+
+    def cancel(self, timer_id: int) -> Union[Dict, bool]:
+        """
+        Removes timer, its commands won't be sent.
+
+        Returns:
+            dict, bool: Removed timer, or False if not found.
+        """
+
+        # Stays in wheel, but gets skipped when due since it's not in self.timers anymore.
+        if not (timer := self.timers.pop(timer_id, None)):
+            return False
+        self.save()
+        return timer
+
+    def get_timers(self) -> List[Dict]:
+        """Timers sorted by soonest due first."""
+
+        return sorted(self.timers.values(), key=lambda i: i['due'])
+
+    async def _run(self) -> None:
+        """Advances wheel every second and runs due timers."""
+
+        while True:
+            await asyncio.sleep(1 - time.time() % 1)  # Lines up with start of next second.
+            for timer_id in self.wheel.advance(int(time.time())):
+                if timer := self.timers.get(timer_id):
+                    asyncio.create_task(self._run_timer(timer))
+
+    async def _run_timer(self, timer: Dict) -> None:
+        try: success = await self.run_action(timer)
+        except Exception as e:
+            lprint(f"ERROR: Problem running timer {timer['id']}: {e}")
+            success = False
+
+        if timer['id'] not in self.timers:  # Canceled while running.
+            return
+        if success:
+            self.timers.pop(timer['id'])
+        else:
+            timer['due'] = time.time() + self.retry_delay
+            self.wheel.add(timer['id'], int(timer['due']))
+        self.save()
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
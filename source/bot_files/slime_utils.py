@@ -8,8 +8,8 @@ import os
 import csv
 import json
 import math
+import mmap
 import time
-import socket
 import shutil
 import random
 import asyncio
@@ -24,6 +24,7 @@ from os.path import isdir, isfile, join, exists
 from typing import Union, Any, Tuple, List, Dict, Generator
 
 from bot_files.slime_config import config
+from bot_files.server_log_record import parse_log_line
 
 if config.get_config('use_pyenv'):
     try:
@@ -63,6 +64,75 @@ def lprint(arg1: Union[Any, str], arg2:str = None) -> None:
     with open(config.get_config('bot_log_filepath'), 'a+') as file:
         file.write(output + '\n')
 
+class Keyword_Matcher:
+    """
+    Checks if a line contains any of a list of keywords (not case sensitive), with one regex search per line.
+    Keywords are put in a trie and turned into a single regex, e.g. ['whitelisted:', 'whitelisted player(s):']
+    becomes 'whitelisted(?:\\ player\\(s\\):|:)', so keywords sharing a start are only checked once,
+    and adding more keywords costs a lot less than another 'keyword in line' check per line.
+    Use Keyword_Matcher.get(), which reuses matchers for keyword lists it has seen before.
+    """
+
+    _cache = {}  # Keywords tuple: Keyword_Matcher.
+    _cache_size = 128
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        self.keywords = keywords
+        self.pattern = re.compile(self._trie_pattern(keywords)) if len(keywords) > 1 else None
+
+    @classmethod
+    def get(cls, search: Union[str, List, None]) -> 'Keyword_Matcher':
+        """
+        Gets matcher for keyword(s).
+
+        Args:
+            search str, list, None: Keyword or list of keywords. None (or empty list) matches every line.
+
+        Returns:
+            Keyword_Matcher: Cached matcher.
+        """
+
+        if not isinstance(search, (list, tuple)): search = [search]
+        keywords = tuple(sorted({str(i).lower() for i in search if i is not None and str(i)}))
+        if (matcher := cls._cache.get(keywords)) is None:
+            if len(cls._cache) >= cls._cache_size:
+                cls._cache.pop(next(iter(cls._cache)))  # Removes oldest.
+            matcher = cls._cache[keywords] = cls(keywords)
+        return matcher
+
+    @staticmethod
+    def _trie_pattern(keywords: Tuple[str, ...]) -> str:
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}  # End of keyword.
+
+        def build(node: dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+            if not branches:
+                return ''
+            pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # A keyword ends here, and a longer one continues. Shorter one is enough for a match.
+            return '' if '' in node else pattern
+
+        return build(trie)
+
+    def search(self, line: str) -> bool:
+        """
+        Args:
+            line str: Line to check.
+
+        Returns:
+            bool: Line contains any of the keywords, always True if there are no keywords.
+        """
+
+        if not self.keywords:
+            return True
+        if self.pattern is None:
+            return self.keywords[0] in line.lower()
+        return self.pattern.search(line.lower()) is not None
 
 class File_Utils:
     def test_file(self, file_path: str, check_writable: bool = False) -> bool:
@@ -131,50 +201,79 @@ class File_Utils:
                 if lines is not None and line_counter >= lines:
                     break
 
-    def read_file_reverse_generator(self, file_path: str, lines: int = None) -> Union[Generator[str, None, None], bool]:
+    def read_file_reverse_generator(self, file_path: str, lines: int = None, search: List[str] = None,
+                                    stopgap_str: str = None) -> Union[Generator[str, None, None], bool]:
         """
         A generator that returns the lines of a file in reverse order.
         Used for getting latest console log output.
+        File is memory-mapped and searched as bytes, lines are only decoded if they get yielded,
+        so multi-byte characters are never split between reads.
+        bytes.lower() only lowercases ASCII, so if a keyword has non-ASCII characters (e.g. a player name with accents),
+        blocks are decoded and matched with str.lower() instead, which is slower.
 
         Args:
             file_path (str): File path to yield lines.
             lines int(None): How many lines to return. None for all.
+            search list(None): Only yield lines containing any of these keywords (not case sensitive). None for all lines.
+            stopgap_str str(None): Also yield lines containing this (case sensitive), even if they don't match search.
 
         Yields:
-            str: File line.
+            str: File line, empty lines are skipped.
 
         Returns:
             bool: If file not readable.
         """
 
-        buf_size = 8192
-        line_counter = 0
-        with open(file_path, 'rb') as fh:
-            segment = None
-            offset = 0
-            fh.seek(0, os.SEEK_END)
-            file_size = remaining_size = fh.tell()
-            line_counter += 1
-            lines_yielded = 0  # Counter for the number of lines yielded
-            while remaining_size > 0:
-                if lines is not None and lines_yielded >= lines:
-                    break  # Stop generating lines if we have reached the desired number
-                offset = min(file_size, offset + buf_size)
-                fh.seek(file_size - offset)
-                buffer = fh.read(min(remaining_size, buf_size)).decode(encoding='utf-8')
-                remaining_size -= buf_size
-                _lines = buffer.split('\n')
-                if segment is not None:
-                    if buffer[-1] != '\n':
-                        _lines[-1] += segment
+        block_size = 1024 * 1024
+        str_keywords = [str(i).lower() for i in search if i is not None] if search else []
+        keywords = [i.encode('utf-8') for i in str_keywords]
+        decode_search = not all(i.isascii() for i in str_keywords)
+        stopgap = stopgap_str.encode('utf-8') if stopgap_str else None
+        lines_yielded = 0
+        with open(file_path, 'rb') as file:
+            if not (file_size := os.fstat(file.fileno()).st_size):
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = file_size
+                while end > 0:
+                    # Block of whole lines, going backwards from end of file.
+                    block_start = mm.rfind(b'\n', 0, max(0, end - block_size)) + 1 if end > block_size else 0
+                    block = mm[block_start:end]
+                    end = block_start
+
+                    if (keywords or stopgap) and not decode_search:
+                        # Finds keywords in the whole block with bytes.find(), instead of checking every line.
+                        line_starts = set()
+                        lower_block = block.lower() if keywords else None
+                        for data, keyword in [(lower_block, i) for i in keywords] + ([(block, stopgap)] if stopgap else []):
+                            index = data.find(keyword)
+                            while index != -1:
+                                line_starts.add(block.rfind(b'\n', 0, index) + 1)
+                                if (index := block.find(b'\n', index)) == -1:
+                                    break
+                                index = data.find(keyword, index)
+                        line_starts = sorted(line_starts, reverse=True)
                     else:
-                        yield segment
-                segment = _lines[0]
-                for index in range(len(_lines) - 1, 0, -1):
-                    if _lines[index]:
+                        # Block only has whole lines, so it can be decoded all at once without splitting a character.
+                        for line in reversed(block.decode('utf-8', errors='replace').split('\n')):
+                            if not (line := line.rstrip('\r')):
+                                continue
+                            if decode_search and not (any(i in line.lower() for i in str_keywords) or (stopgap_str and stopgap_str in line)):
+                                continue
+                            if lines is not None and lines_yielded >= lines:
+                                return
+                            yield line
+                            lines_yielded += 1
+                        continue
+
+                    for line_start in line_starts:
+                        line_end = block.find(b'\n', line_start)
+                        line = block[line_start:line_end if line_end != -1 else len(block)].rstrip(b'\r')
+                        if not line:
+                            continue
                         if lines is not None and lines_yielded >= lines:
-                            break  # Stop generating lines if we have reached the desired number
-                        yield _lines[index]
+                            return
+                        yield line.decode('utf-8', errors='replace')
                         lines_yielded += 1
 
     def read_json(self, file_path: str) -> Union[List[Dict[str, Any]], bool]:
@@ -510,48 +609,35 @@ class Utils:
             version = float(version.split('.')[1])
         except: version = 20
 
+        # Log prefix and ANSI codes removed, e.g. 'There are 2 of a max of 20 players online: R3diculous, MysticFrogo'
+        try: messages = [parse_log_line(i).message for i in output]
+        except: return False
+
         # In version 1.12 and lower, the /list command outputs usernames on a newline from the 'There are x players' line.
         if version <= 12:
             # Parses and returns info from log lines.
             try:
-                text = output[1].split(':')[-2].strip()
-                player_names = output[0].split(':')[-1].split(',')
+                text = messages[1].rstrip(': ').strip()
+                player_names = messages[0].split(',')
                 return player_names, text
             except:
                 return None
         else:
             if config.get_config('server_use_essentialsx'):
-                text = output[-1].split(':')[-1].strip()  # There are 2 of a max of 20 players online
+                text = messages[-1].split(':')[-1].strip()  # There are 2 of a max of 20 players online
                 player_names = []
-                for line in output[:-1]:
-                    names_section = line.split(':')[-1].strip()
+                for message in messages[:-1]:
+                    names_section = message.split(':')[-1].strip()
                     player_names += [i.strip() for i in names_section.split(',')]
-                    #print("LINE", player_names)
                     return player_names, text
 
-            # TODO make get_command_output be able to take command
             try:
-                reaesc = re.compile(r'\x1b[^m]*m')
-                # Use regular expression to extract player names
-                output = output[0].split(':')  # [23:08:55 INFO]: There are 2 of a max of 20 players online: R3diculous, MysticFrogo
-                text = output[-2]  # There are 2 of a max of 20 players online
-                text = reaesc.sub('', text)  # Remove unwanted escape characters
-                player_names = output[-1]  # R3diculous, MysticFrogo
-                # If there's no players active, player_names will still contain some anso escape characters.
-                if len(player_names.strip()) < 5:
+                text, _, player_names = messages[0].partition(':')  # There are 2 of a max of 20 players online, R3diculous, MysticFrogo
+                if not player_names.strip():
                     return None
-                else:
-                    player_names = [f"{i.strip()[:-4]}\n" if config.get_config('use_rcon') else f"{i.strip()}" for i in (output[-1]).split(',')]
-                    # Outputs player names in special discord format. If using RCON, need to clip off 4 trailing unreadable characters.
-                    # player_names_discord = [f"`{i.strip()[:-4]}`\n" if use_rcon else f"`{i.strip()}`\n" for i in (log_data[-1]).split(',')]
-                    new = []
-                    for i in player_names:
-                        x = reaesc.sub('', i).strip().replace('[3', '')
-                        x = x.split(' ')[-1]
-                        x = x.replace('\\x1b', '').strip()
-                        new.append(x)
-                    player_names = new
-                    return player_names, text
+                # Some servers add a rank prefix before the name, e.g. '[Admin] R3diculous'.
+                player_names = [i.strip().split(' ')[-1] for i in player_names.split(',')]
+                return player_names, text
             except:
                 return False
 
@@ -711,25 +797,27 @@ class Utils:
         except: return None
         return server_ip
 
-    async def ping_address(self, address: str) -> Union[str, bool]:
+    async def ping_address(self, address: str, port: int = 80, timeout: float = 2) -> Union[str, bool]:
         """
-        Checks if server_address address works by pinging it twice.
+        Checks if address works by timing a TCP connection to it. For the Minecraft server itself use backend.server_ping(),
+        which measures latency to the game port.
 
         Args:
             address (str): Address to ping.
+            port (int): Port to connect to.
+            timeout (float): Seconds to wait for connection.
 
         Returns:
-            bool: If successful.
+            str, bool: Connection time in ms, or False if unsuccessful.
         """
         try:
-            start_time = time.time()
-            reader, writer = await asyncio.open_connection(address, 80)
+            start_time = time.perf_counter()
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+            elapsed_time = (time.perf_counter() - start_time) * 1000
             writer.close()
-            await writer.wait_closed()
-            elapsed_time = (time.time() - start_time) * 10
             config.failed_pings = 0
             return str(elapsed_time)
-        except (socket.timeout, ConnectionError):
+        except (OSError, asyncio.TimeoutError):
             if config.failed_pings < config.failed_ping_limit:
                 lprint(f"ERROR: Failed to ping: {address}")
                 config.failed_pings += 1
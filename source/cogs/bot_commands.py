@@ -1,6 +1,5 @@
 import os
 import sys
-import gzip
 import asyncio
 
 import discord
@@ -10,6 +9,8 @@ from bot_files.slime_backend import backend
 from run_bot import __version__, __date__, __author__, config
 from bot_files.slime_utils import lprint, file_utils, utils
 from bot_files.discord_components import comps, buttons_dict
+from bot_files import discord_files
+from bot_files.server_log import close_search_pool
 
 
 class Slime_Bot_Commands(commands.Cog):
@@ -25,23 +26,15 @@ class Slime_Bot_Commands(commands.Cog):
     async def custom_status_task(self):
         """
         Updates bot's custom status text with online players and ping
-        NOTE: Need to set 'enable-query=true' in server.properties for this to work properly.
         """
 
         await self.bot.wait_until_ready()
-        if query_data := await backend.server_ping_query():
-            players_online = query_data['players']['online']
-        else:
-            players_online = 'N/A'
-
-        # Can use custom address to get ping latency if unable to use server's address.
-        if data := await backend.server_ping(True if config.get_config('use_custom_ping_address') else False):
-            ping = data
-        elif data := await backend.server_ping():
-            ping = data
-
-        if not data or not ping:
+        # Uses background refreshed status, so this doesn't ping the server itself.
+        snapshot = backend.status.get()
+        if snapshot.latency is None:
             return
+        players_online = 'N/A' if snapshot.players_online is None else snapshot.players_online
+        ping = f"{snapshot.latency:.2f}"
 
         # Will show: Playing - X | Ping - X
         # TODO fallback on using public website for ping?
@@ -72,9 +65,11 @@ class Slime_Bot_Commands(commands.Cog):
 
         # If using subprocess, makes sure server is off before restarting bot. Cus, if bot process dies, so does server.
         if config.get_config('server_use_subprocess'):
-            if await backend.server_status():
+            if (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online:
                 await backend.send_msg("Server is running. Stop server first with `?serverstop`.")
+                return
 
+        close_search_pool()  # execl() doesn't run cleanup, worker processes would be left behind.
         os.chdir(config.get_config('bot_source_path'))
         os.execl(sys.executable, sys.executable, *sys.argv)
 
@@ -99,11 +94,10 @@ class Slime_Bot_Commands(commands.Cog):
         """
 
         log_data = [*file_utils.read_file_reverse_generator(config.get_config('bot_log_filepath'), lines=lines)]
-        log_data = '\n'.join(reversed(log_data))
 
         await backend.send_msg(f"***Fetching {lines} Bot Log...*** :tools:")
         if log_data:
-            await backend.send_msg(file=discord.File(utils.convert_to_bytes(log_data), 'bot.log'))
+            await discord_files.send_lines(log_data[::-1], 'bot.log')
             lprint(ctx, f"Fetched Bot Log: {lines}")
         else:
             await backend.send_msg("**Error:** Problem fetching data. File may be empty or not exist")
@@ -189,8 +183,8 @@ class Slime_Bot_Commands(commands.Cog):
         """
 
         await backend.send_msg(f"Server Address: ||`{utils.get_public_ip()}:{config.get_config('server_port')}`||")
-        try: ping = f"({float(await backend.server_ping())}ms)"
-        except: ping = ''
+        snapshot = await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))
+        ping = f"({snapshot.latency:.2f}ms)" if snapshot.latency is not None else ''
         await backend.send_msg(f"Alternative Address: ||`{config.get_config('server_address')}`|| {ping}")
         lprint(ctx, 'Fetched server address')
 
@@ -453,19 +447,10 @@ class Discord_Components_Funcs(commands.Cog):
 
         log_selected = comps.get_data('second_selected')
         if not log_selected: return  # If not log is selected from Discord selection component
-        # Unzips file if it's a .gz file. Will delete file afterwards.
-        if log_selected.endswith('.gz'):
-            with gzip.open(f"{config.get_config('server_logs_path')}/{log_selected}", 'rb') as f_in:
-                # Writes it in the bot source folder, doesn't matter because it'll be deleted.
-                with open(log_selected[:-3], 'wb') as f_out: f_out.write(f_in.read())
-
-                try: await backend.send_msg('', file=discord.File(log_selected[:-3]))
-                except: await backend.send_msg("**ERROR:** Couldn't fetch file for download.")
-                else: os.remove(log_selected[:-3])
-
-        else:
-            await backend.send_msg('', file=discord.File(f"{config.get_config('server_logs_path')}/{log_selected}"))
+        # .gz files are decompressed while being uploaded, big files are sent in parts.
+        if await discord_files.send_file(f"{config.get_config('server_logs_path')}/{log_selected}"):
             lprint(ctx, f"Fetched log file: {log_selected}")
+        else: await backend.send_msg("**ERROR:** Couldn't fetch file for download.")
 
     @commands.command(hidden=True)
     async def _update_select_page(self, ctx, mode):
@@ -1,4 +1,5 @@
 import os
+import time
 import asyncio
 
 import discord
@@ -7,6 +8,7 @@ from discord.ext import commands
 from bot_files.slime_backend import backend
 from bot_files.slime_config import config
 from bot_files.slime_utils import lprint, file_utils, utils
+from bot_files.server_log_record import parse_log_lines
 from bot_files.discord_components import comps
 
 
@@ -42,10 +44,12 @@ class Player(commands.Cog):
             await backend.send_msg("**Error:** Unable to fetch player list.")
             return
 
+        # Get xyz coords for all players at once.
+        locations = await backend.get_coords_batch([i.strip() for i in player_list[0]]) if 'location' in args else {}
         _player_list = []
         for i in player_list[0]:
-            if 'location' in args:  # Get xyz coords for each player.
-                player_location = await backend.get_coords(i)
+            if 'location' in args:
+                player_location = locations.get(i.strip())
                 _player_list.append(f'{i.strip()} {player_location if player_location else "Location N/A"}\n')
             else: _player_list.append(f'{i.strip()}, ')
 
@@ -89,9 +93,8 @@ class Player(commands.Cog):
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
-        if await backend.send_command(f"say ---WARNING--- {target} will be EXTERMINATED! : {reason}") is False: return
-
-        await backend.send_command(f'kill {target}')
+        results = await backend.send_commands([f"say ---WARNING--- {target} will be EXTERMINATED! : {reason}", f'kill {target}'])
+        if not results or not results[-1]: return
 
         await backend.send_msg(f"`{target}` :gun: assassinated!")
         lprint(ctx, f"Killed: {target}")
@@ -119,11 +122,8 @@ class Player(commands.Cog):
 
         if await backend.send_command(f"say ---WARNING--- {target} will self-destruct in {delay}s : {reason}") is False: return
 
-        await backend.send_msg(f"Killing {target} in {delay}s :bomb:")
-        await asyncio.sleep(delay)
-        await backend.send_command(f'kill {target}')
-
-        await backend.send_msg(f"`{target}` soul has been freed.")
+        timer = backend.timers.add(delay, [f'kill {target}'], f"`{target}` soul has been freed.", f"Kill {target}")
+        await backend.send_msg(f"Killing {target} in {delay}s :bomb: (Timer: {timer['id']})")
         lprint(ctx, f"Delay killed: {target}")
 
     # ===== Teleportation and location
@@ -160,18 +160,20 @@ class Player(commands.Cog):
         if await backend.send_command(f"say ---INFO--- Teleporting {target} to {destination} in 5s") is False: return
         await backend.send_msg(f"***Teleporting in 5s...***")
 
+        # Gets coordinates for target and destination together. Don't try to get destination coords if using @r or it's xyz coords.
+        destination_is_player = ' ' not in destination and not destination.startswith('@')
+        coords = await backend.get_coords_batch([target, destination] if destination_is_player else [target])
+
         # Saves current coordinates of target player before teleporting them, so they may be returned.
-        targets_coords = await backend.get_coords(target)
+        targets_coords = coords[target]
         try: comps.get_data('teleport_return', targets_coords.replace(',', ''))
         except: comps.set_data('teleport_return', 0)
 
-        # Gets coordinates for target and destination.
         target_info = f'{target} ~ {targets_coords}'
-        # Don't try to get coords if using @r.
         if '@r' in destination:
             destination_info = 'Random player'
         else:
-            dest_coord = await backend.get_coords(destination)
+            dest_coord = coords.get(destination) if destination_is_player else False
             destination_info = f'{destination}{" ~ " + dest_coord if dest_coord else ""}'
 
         await asyncio.sleep(5)
@@ -207,9 +209,8 @@ class Player(commands.Cog):
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
-        if await backend.send_command(f"say {player} now in {mode} : {reason}") is False: return
-
-        await backend.send_command(f"gamemode {mode} {player}")
+        results = await backend.send_commands([f"say {player} now in {mode} : {reason}", f"gamemode {mode} {player}"])
+        if not results or not results[-1]: return
 
         await backend.send_msg(f"`{player}` is now in `{mode.upper()}` indefinitely.")
         lprint(ctx, f"Set {player} to: {mode}")
@@ -235,17 +236,15 @@ class Player(commands.Cog):
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
-        if await backend.send_command(f"say ---INFO--- {player.upper()} set to {mode} for {duration}s : {reason}") is False: return
+        results = await backend.send_commands([f"say ---INFO--- {player.upper()} set to {mode} for {duration}s : {reason}", f"gamemode {mode} {player}"])
+        if not results or not results[-1]: return
 
-        await backend.send_command(f"gamemode {mode} {player}")
-        await backend.send_msg(f"`{player}` set to `{mode}` for `{duration}s` :hourglass:")
+        # Saved to disk, so player still gets changed back if bot restarts.
+        timer = backend.timers.add(duration, [f"say ---INFO--- Times up! {player} is now back to SURVIVAL.", f"gamemode survival {player}"],
+                                   f"`{player}` is back to survival.", f"{player} back to survival")
+        await backend.send_msg(f"`{player}` set to `{mode}` for `{duration}s` :hourglass: (Timer: {timer['id']})")
         lprint(ctx, f"Set gamemode: {player} for {duration}s")
 
-        await asyncio.sleep(duration)
-        await backend.send_command(f"say ---INFO--- Times up! {player} is now back to SURVIVAL.")
-        await backend.send_command(f"gamemode survival {player}")
-        await backend.send_msg(f"`{player}` is back to survival.")
-
     # ===== Inventory
     @commands.command(aliases=['clearinv', 'invclear'])
     async def clearinventory(self, ctx, target):
@@ -263,9 +262,8 @@ class Player(commands.Cog):
             await backend.send_msg("Usage: `?clear <player>")
             return False
 
-        if await backend.send_command(f"say ---WARNING--- {target} will lose everything!") is False: return
-
-        await backend.send_command(f'clear {target}')
+        results = await backend.send_commands([f"say ---WARNING--- {target} will lose everything!", f'clear {target}'])
+        if not results or not results[-1]: return
 
         await backend.send_msg(f"`{target}` inventory cleared")
         lprint(ctx, f"Cleared: {target}")
@@ -289,6 +287,43 @@ class Player(commands.Cog):
 
         await backend.send_msg(f"**ERROR:** Could not get location.")
 
+    # ===== Timers
+    @commands.command(aliases=['timerlist', 'listtimers', 'scheduled'])
+    async def timers(self, ctx):
+        """Shows pending delayed actions, e.g. from ?gamemodetimed, ?optimed, ?killdelay."""
+
+        if not (timers := backend.timers.get_timers()):
+            await backend.send_msg("No pending timers.")
+            return
+
+        now = time.time()
+        lines = [f"`{i['id']}` {i['description']} - {max(0, int(i['due'] - now))}s ({i['server']})" for i in timers]
+        for group in utils.group_items(lines, 25)[0]:
+            await backend.send_msg(embed=discord.Embed(title='Timers :hourglass:', description='\n'.join(group)))
+        await backend.send_msg("Use `?timercancel <id>` to cancel.")
+        lprint(ctx, "Fetched timers")
+
+    @commands.command(aliases=['canceltimer', 'timerremove', 'tc'])
+    async def timercancel(self, ctx, timer_id=''):
+        """
+        Cancel a pending timer, its commands won't be sent.
+
+        Args:
+            timer_id: Timer ID from ?timers.
+
+        Usage:
+            ?timercancel 3
+        """
+
+        if not timer_id.isdigit():
+            await backend.send_msg("Usage: `?timercancel <id>`, get ID from `?timers`.")
+            return False
+
+        if timer := backend.timers.cancel(int(timer_id)):
+            await backend.send_msg(f"Canceled timer `{timer['id']}`: {timer['description']}")
+            lprint(ctx, f"Canceled timer: {timer['description']}")
+        else: await backend.send_msg("**ERROR:** Timer not found.")
+
 # ========== Permissions: Ban, whitelist, Kick, OP.
 class Permissions(commands.Cog):
     def __init__(self, bot): self.bot = bot
@@ -315,10 +350,7 @@ class Permissions(commands.Cog):
         reason = utils.format_args(reason, return_no_reason=True)
         if not await backend.send_command(f'say ---WARNING--- {player} will be ejected from server in 5s : {reason}'): return
 
-        await asyncio.sleep(5)
-        await backend.send_command(f"kick {player}")
-
-        await backend.send_msg(f"`{player}` is outta here :wave:")
+        backend.timers.add(5, [f"kick {player}"], f"`{player}` is outta here :wave:", f"Kick {player}")
         lprint(ctx, f"Kicked: {player}")
 
     @commands.command(aliases=['exile', 'banish'])
@@ -344,11 +376,7 @@ class Permissions(commands.Cog):
             await backend.send_msg("**ERROR:** Issue banning player.")
             return
 
-        await asyncio.sleep(5)
-
-        await backend.send_command(f"ban {player} {reason}")
-
-        await backend.send_msg(f"Dropkicked and exiled: `{player}` :no_entry_sign:")
+        backend.timers.add(5, [f"ban {player} {reason}"], f"Dropkicked and exiled: `{player}` :no_entry_sign:", f"Ban {player}")
         lprint(ctx, f"Banned {player} : {reason}")
 
     @commands.command(aliases=['unban'])
@@ -369,9 +397,8 @@ class Permissions(commands.Cog):
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
-        if await backend.send_command(f"say ---INFO--- {player} has been vindicated: {reason} :tada:") is False: return
-
-        await backend.send_command(f"pardon {player}")
+        results = await backend.send_commands([f"say ---INFO--- {player} has been vindicated: {reason} :tada:", f"pardon {player}"])
+        if not results or not results[-1]: return
 
         await backend.send_msg(f"Cleansed `{player}` :flag_white:")
         lprint(ctx, f"Pardoned {player} : {reason}")
@@ -381,8 +408,7 @@ class Permissions(commands.Cog):
         """Show list of current bans."""
 
         banned_players = ''
-        await backend.send_command("banlist")
-        log_data = await backend.get_command_output(extra_lines=20, all_lines=True)
+        log_data = await backend.send_command_output("banlist", extra_lines=20, all_lines=True)
         if not log_data:
             await backend.send_msg("Unable to get ban list.")
             return
@@ -394,17 +420,16 @@ class Permissions(commands.Cog):
                 banned_players = '\n'.join(i for i in utils.remove_ansi(log_data[0]).split('.'))
 
         else:
-            for line in log_data:
-                if 'was banned by' in line:  # finds log lines that shows banned players.
+            for record in parse_log_lines(log_data):
+                if 'was banned by' in record.message:  # finds log lines that shows banned players.
                     # Gets relevant data from current log line, and formats it for Discord output.
                     # E.g. [16:42:53] [Server thread/INFO] [minecraft/DedicatedServer]: Slime was banned by Server: No reason given
                     # Extracts Player name, who banned the player, and the reason.
-                    ban_log_line = line.split(':')[-2:]
-                    player = ban_log_line[0].split(' ')[1].strip()
-                    banner = ban_log_line[0].split(' ')[-1].strip()
-                    reason = ban_log_line[-1].strip()
-                    banned_players += f"**{player}** banned by `{banner}` : `{reason}`\n"
-                elif ']: There are no bans' in line:
+                    ban_info, _, reason = record.message.partition(':')
+                    player = ban_info.split(' ')[0].strip()
+                    banner = ban_info.split(' ')[-1].strip()
+                    banned_players += f"**{player}** banned by `{banner}` : `{reason.strip()}`\n"
+                elif record.message.startswith('There are no bans'):
                     banned_players = 'No exiled ones!'
                     break
 
@@ -417,19 +442,20 @@ class Permissions(commands.Cog):
         lprint(ctx, f"Fetched ban list")
 
     @commands.command(aliases=['wl', 'wlist'])
-    async def whitelist(self, ctx, arg='', arg2=''):
+    async def whitelist(self, ctx, arg='', arg2='', *players):
         """
         Whitelist commands. Turn on/off, add/remove, etc.
 
         Args:
             arg: User passed in arguments for whitelist command, see below for arguments and usage.
             arg2 optional: Specify player or to specify more options for other arguments, like enforce for example.
+            players optional: More players to add/remove at once.
 
         Discord Args:
             list: Show whitelist, same as if no arguments.
             on/off: Whitelist enable/disable
             reload: Reloads from whitelist.json file.
-            add/remove <player>: Player add/remove to whitelist.
+            add/remove <player> [players...]: Player(s) add/remove to whitelist.
             enforce <status/on/off>: Changes 'enforce-whitelist' in server properties file.
                 Kicks players that are not on the whitelist when using ?whitelist reload command.
                 Server reboot required for enforce-whitelist to take effect.
@@ -439,6 +465,7 @@ class Permissions(commands.Cog):
             ?whitelist on
             ?whitelist reload
             ?whitelist add MysticFrogo
+            ?whitelist add MysticFrogo R3diculous
             ?whitelist enforce on
         """
 
@@ -446,7 +473,7 @@ class Permissions(commands.Cog):
         if not arg: await backend.send_msg(f"\nUsage Examples: `?whitelist add MysticFrogo`, `?whitelist on`, `?whitelist enforce on`, use `?help whitelist` or `?help2` for more.")
 
         # Checks if server online.
-        if await backend.server_status() is False:
+        if (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online is False:
             await backend.send_msg("**ERROR:** Server offline.")
             return
 
@@ -460,15 +487,21 @@ class Permissions(commands.Cog):
             await backend.send_msg("**Whitelist INACTIVE**")
             lprint(ctx, f"Whitelist: Disabled")
 
-        # Add/remove user to whitelist (one at a time).
+        # Add/remove user(s) to whitelist.
         elif arg == 'add' and arg2:
-            await backend.send_command(f"whitelist {arg} {arg2}")
-            await backend.send_msg(f"Added `{arg2}` to whitelist  :page_with_curl::pen_fountain:")
-            lprint(ctx, f"Added to whitelist: {arg2}")
+            players = [arg2, *players]
+            if not all(await backend.send_commands([f"whitelist {arg} {i}" for i in players]) or [False]):
+                await backend.send_msg("**ERROR:** Problem adding players, check `?whitelist list`.")
+                return
+            await backend.send_msg(f"Added `{', '.join(players)}` to whitelist  :page_with_curl::pen_fountain:")
+            lprint(ctx, f"Added to whitelist: {', '.join(players)}")
         elif arg == 'remove' and arg2:
-            await backend.send_command(f"whitelist {arg} {arg2}")
-            await backend.send_msg(f"Removed `{arg2}` from whitelist.")
-            lprint(ctx, f"Removed from whitelist: {arg2}")
+            players = [arg2, *players]
+            if not all(await backend.send_commands([f"whitelist {arg} {i}" for i in players]) or [False]):
+                await backend.send_msg("**ERROR:** Problem removing players, check `?whitelist list`.")
+                return
+            await backend.send_msg(f"Removed `{', '.join(players)}` from whitelist.")
+            lprint(ctx, f"Removed from whitelist: {', '.join(players)}")
 
         # Reload server whitelisting feature.
         elif arg == 'reload':
@@ -488,15 +521,14 @@ class Permissions(commands.Cog):
         # List whitelisted.
         elif not arg or arg == 'list':
             if config.get_config('server_use_rcon'):
-                if await backend.send_command('whitelist list') is False:
+                if not (log_data := await backend.send_command_output('whitelist list')):
                     await backend.send_msg("**ERROR:** Unable to fetch whitelist.")
-                log_data = await backend.get_command_output()
+                    return
                 log_data = utils.remove_ansi(log_data[0]).split(':')
             else:
-                await backend.send_command('whitelist list')
                 # Parses log entry lines, separating 'There are x whitelisted players:' from the list of players.
                 match_list = ['whitelisted:', 'whitelisted player(s):']  # Varies depending on server version/type.
-                log_data = await backend.get_command_output(keywords=match_list)
+                log_data = await backend.send_command_output('whitelist list', keywords=match_list)
                 if isinstance(log_data, list):
                     log_data = '\n'.join(log_data)
                 if not log_data:
@@ -542,12 +574,12 @@ class Permissions(commands.Cog):
             await backend.send_msg("Usage: `?op <player> [reason]`\nExample: `?op R3diculous Need to be a God!`")
             return False
 
-        if not await backend.send_command(f"op {player}"):
+        if (output := await backend.send_command_output(f"op {player}")) is False:
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
 
-        response = utils.parse_opadd_output('\n'.join(await backend.get_command_output()), player)
+        response = utils.parse_opadd_output('\n'.join(output), player)
         if response is False:
             await backend.send_msg("**ERROR:** Problem setting OP status.")
             lprint(ctx, f"ERROR: Couldn't OP: {player}")
@@ -559,6 +591,7 @@ class Permissions(commands.Cog):
         await backend.send_command(f"say ---INFO--- {player} is now OP : {reason}")
         await backend.send_msg(f"**New OP Player:** `{player}`")
         lprint(ctx, f"New server OP: {player}")
+        return True
 
     @commands.command(aliases=['oprm', 'rmop', 'deop', 'removeop'])
     async def opremove(self, ctx, player='', *reason):
@@ -578,12 +611,12 @@ class Permissions(commands.Cog):
             await backend.send_msg("Usage: `?deop <player> [reason]`\nExample: `?op MysticFrogo Was abusing God powers!`")
             return False
 
-        if not await backend.send_command(f"deop {player}"):
+        if (output := await backend.send_command_output(f"deop {player}")) is False:
             return False
 
         reason = utils.format_args(reason, return_no_reason=True)
 
-        response = utils.parse_deop_output('\n'.join(await backend.get_command_output()), player)
+        response = utils.parse_deop_output('\n'.join(output), player)
         if response is False:
             await backend.send_msg("**ERROR:** Problem removing OP status.")
             lprint(ctx, f"ERROR: Removing server OP: {player}")
@@ -608,20 +641,24 @@ class Permissions(commands.Cog):
 
         Usage:
             ?optimed Steve 30 Need to check something real quick.
-            ?top jesse 300 - 5min being OP
-            ?top Steve - 60s
+            ?opt jesse 300 - 5min being OP
+            ?opt Steve - 60s
         """
 
         if not player:
-            await backend.send_msg("Usage: `?optimed <player> <minutes> [reason]`\nExample: `?optimed R3diculous Testing purposes`")
+            await backend.send_msg("Usage: `?optimed <player> [seconds] [reason]`\nExample: `?optimed R3diculous 300 Testing purposes`")
+            return False
+
+        # Not scheduling deop if OP failed, or player was already OP before.
+        if await ctx.invoke(self.bot.get_command('opadd'), player, *reason) is not True:
             return False
 
-        await backend.send_command(f"say ---INFO--- {player} granted OP for {time_limit}m : {reason}")
-        await backend.send_msg(f"***Temporary OP:*** `{player}` for {time_limit}m :hourglass:")
-        lprint(ctx, f"Temporary OP: {player} for {time_limit}m")
-        await ctx.invoke(self.bot.get_command('opadd'), player, *reason)
-        await asyncio.sleep(time_limit)
-        await ctx.invoke(self.bot.get_command('opremove'), player, *reason)
+        await backend.send_command(f"say ---INFO--- {player} granted OP for {time_limit}s : {utils.format_args(reason, return_no_reason=True)}")
+        # Saved to disk, so OP still gets removed if bot restarts.
+        timer = backend.timers.add(time_limit, [f"say ---INFO--- {player} OP time is up.", f"deop {player}"],
+                                   f"**Player OP Removed:** `{player}`", f"Remove OP {player}")
+        await backend.send_msg(f"***Temporary OP:*** `{player}` for {time_limit}s :hourglass: (Timer: {timer['id']})")
+        lprint(ctx, f"Temporary OP: {player} for {time_limit}s")
 
 async def setup(bot):
     await bot.add_cog(Player(bot))
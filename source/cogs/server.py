@@ -9,6 +9,8 @@ from bot_files.slime_backend import backend
 from bot_files.slime_config import config
 from bot_files.slime_utils import lprint, utils, file_utils
 from bot_files.discord_components import comps
+from bot_files import discord_files
+from bot_files.server_log_record import parse_log_lines, filter_records
 
 
 # ========== Server: autosave, Start/stop, Status, edit property, backup/restore.
@@ -251,7 +253,7 @@ class Server_Admin(commands.Cog):
         await backend.send_msg(f"***Updating {config.get_config('server_name')}...*** :arrows_counterclockwise:")
 
         # Halts server if running.
-        if await backend.server_status() is not False:
+        if (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online is not False:
             await ctx.invoke(self.bot.get_command('serverstop'), now=now)
         await asyncio.sleep(5)
 
@@ -316,11 +318,11 @@ class Server_Admin(commands.Cog):
             lprint(ctx, 'Autosave: Disabled')
 
         status_msg = ':red_circle: **DISABLED** '
-        if await backend.server_status() is False: status_msg = ":pause_button: **PAUSED**"
+        if backend.status.get().online is False: status_msg = ":pause_button: **PAUSED**"
         elif config.get_config('enable_autosave'): status_msg = ':green_circle: **ENABLED**'
 
         fields = [['Status', f"{status_msg} | **{config.get_config('autosave_interval')}**min"],
-                  ['Note', 'Auto save pauses if server unreachable (not same as disabled). Update server status with `?check` or `?stats`.']]
+                  ['Note', 'Auto save pauses if server unreachable (not same as disabled). Server status is checked in the background, or use `?check`.']]
         await backend.send_msg(embed=comps.new_embed(fields, 'Autosave :repeat::floppy_disk:'))
         lprint(ctx, 'Fetched autosave information')
 
@@ -329,7 +331,9 @@ class Server_Admin(commands.Cog):
         """Automatically sends save-all command to server at interval of x minutes."""
 
         await self.bot.wait_until_ready()
-        # Will only send command if server is active. use ?check or ?stats to update server_active boolean so this can work.
+        # Paused while server is offline, uses background refreshed status so it doesn't have to check console first.
+        if backend.status.get().online is False:
+            return
         if await backend.send_command('save-all'):
             lprint(f"Autosaved (interval: {config.get_config('autosave_interval')}m)")
 
@@ -468,27 +472,64 @@ class Server_Admin(commands.Cog):
 
     # ===== Start/Stop
     @commands.command(aliases=['startserver', 'start'])
-    async def serverstart(self, ctx):
+    async def serverstart(self, ctx, *name):
         """
         Start Minecraft server.
 
+        Args:
+            name optional: Start a different server than the selected one, needs server_use_subprocess enabled for it.
+
+        Usage:
+            ?start
+            ?start papermc
+
         Note: Depending on your system, server may take 15 to 40+ seconds to fully boot.
         """
 
+        # Can have multiple subprocess servers running at once, without having to select them.
+        if (name := utils.format_args(name)) and name != config.get_config('server_name'):
+            if not config.servers.get(name, {}).get('server_use_subprocess'):
+                await backend.send_msg("**ERROR:** Server not found, or doesn't have `server_use_subprocess` enabled.")
+                return False
+            if not await backend.supervisor.start(name):
+                await backend.send_msg("**Error:** Could not start Minecraft server.")
+                return False
+            await backend.send_msg(f"***Launching Minecraft Server...*** :rocket:\nServer: **{name}**")
+            lprint(ctx, f"Starting Minecraft Server: {name}")
+            return
+
         # Exits function if server already online.
-        lprint("INFO: Fetching server status.")
-        if await backend.server_status():
+        if (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online:
             await backend.send_msg("**Server ACTIVE** :green_circle:")
             return False
 
         if not await backend.server_api.server_start():
             await backend.send_msg("**Error:** Could not start Minecraft server.")
             return False
+        backend.status.expect_change()
         await backend.send_msg(f"***Launching Minecraft Server...*** :rocket:\nServer Selected: **{config.get_config('server_name')}**\nStartup time: {config.get_config('startup_wait_time')}s.")
         await backend.send_msg("Use `?check` or `?status` to get more server info.")
 
         lprint(ctx, "Starting Minecraft Server")
 
+    @commands.command(aliases=['running', 'procs', 'serverprocs', 'subprocesses'])
+    async def serversrunning(self, ctx):
+        """Shows servers running as subprocesses of bot, with their CPU and memory usage."""
+
+        if not (stats := backend.supervisor.get_stats()):
+            await backend.send_msg("No subprocess servers.")
+            return
+
+        embed = discord.Embed(title='Subprocess Servers :desktop:')
+        for i in stats:
+            if i['running']:
+                usage = f"CPU: {i['cpu']}%, Memory: {i['memory']}MB" if i['cpu'] is not None else 'CPU/Memory: N/A'
+                value = f":green_circle: PID: {i['pid']}, Uptime: {i['uptime'] // 60}min\n{usage}"
+            else: value = f":red_circle: Last exit code: {i['exit_code']}"
+            embed.add_field(name=i['name'], value=f"{value}\nRestarts: {i['restarts']}", inline=False)
+        await backend.send_msg(embed=embed)
+        lprint(ctx, "Fetched subprocess servers")
+
     @commands.command(aliases=['stopserver', 'stop'])
     async def serverstop(self, ctx, now=''):
         """
@@ -502,7 +543,7 @@ class Server_Admin(commands.Cog):
             ?stop now
         """
 
-        if await backend.server_status() is False:
+        if (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online is False:
             await backend.send_msg("Already Offline")
             return
 
@@ -522,6 +563,7 @@ class Server_Admin(commands.Cog):
 
             await backend.server_api.server_stop()
 
+        backend.status.expect_change()
         await asyncio.sleep(1)
         await backend.send_msg("**Halted Minecraft Server** :stop_sign:")
         lprint(ctx, "Stopping Server")
@@ -575,36 +617,61 @@ class Server(commands.Cog):
     # ===== Status/Info
     @commands.command(aliases=['pingserver', 'ping'])
     async def serverping(self, ctx):
-        """Uses ping command to see if server_address is reachable."""
+        """Gets latency to server's game port to see if server_address is reachable."""
 
         await backend.send_msg('***Pinging Server...***')
-        try: ping = f"{await backend.server_ping()}ms"
-        except: ping = ''
-        if ping:
-            await backend.send_msg(ping)
+        # Refreshes shared status instead of pinging separately, so status panel and others get the new latency too.
+        snapshot = await backend.status.refresh()
+        if snapshot.latency is not None:
+            await backend.send_msg(f"{snapshot.latency:.2f}ms")
         else: await backend.send_msg("Unable to get ping.")
 
     @commands.command(aliases=['queryserver', 'pingquery', 'queryping', 'query', 'sq'])
     async def serverquery(self, ctx):
         """
-        Uses mctools library to get basic server info from server query.
-        NOTE: Must have enable-query=true in server.properties for this to work.
+        Gets basic server info (version, MOTD, players, latency) using Server List Ping, same as the multiplayer server list.
         """
 
         await backend.send_msg("***Attempting Server Query...***")
-        if response := await backend.server_ping_query():
-            if 'favicon' in response: response['favicon'] = 'N/A'
+        snapshot = await backend.status.refresh()
+        if snapshot.source == 'ping':
+            response = {'version': snapshot.version, 'motd': snapshot.motd, 'latency': snapshot.latency,
+                        'players': {'online': snapshot.players_online, 'max': snapshot.players_max}}
             # Formats data to look nicer with indents, and also removes any unwanted escape characters.
             await backend.send_msg(f'```json\n{utils.remove_ansi(utils.print_dict_data(response)).strip()}```')
         else:
             await backend.send_msg("**ERROR:** Query ping failed.")
 
+    @commands.command(aliases=['fullquery', 'queryfull', 'plugins', 'serverplugins', 'fq'])
+    async def serverfullquery(self, ctx):
+        """
+        Gets version, map, plugins, and all online players using query protocol. Doesn't use server console.
+        NOTE: Must have enable-query=true in server.properties and server_use_query config.
+        """
+
+        if not config.get_config('server_use_query'):
+            await backend.send_msg("**ERROR:** Query disabled. Set `enable-query=true` in server.properties and `server_use_query` config.")
+            return
+
+        if stats := await backend.server_query(use_cache=False):
+            fields = [
+                ['Version', f"{stats['version']} ({stats['server_mod'] or stats['gametype']})"],
+                ['MOTD', stats['motd'] or 'N/A'],
+                ['Map', stats['map'] or 'N/A'],
+                [f"Players ({stats['players']['online']}/{stats['players']['max']})", ', '.join(stats['players']['names'])[:1024] or 'None'],
+                [f"Plugins ({len(stats['plugins'])})", ', '.join(stats['plugins'])[:1024] or 'None'],
+            ]
+            await backend.send_msg(embed=comps.new_embed(fields, 'Server Query'))
+            lprint(ctx, "Fetched server full query")
+        else:
+            await backend.send_msg("**ERROR:** Server query failed.")
+
     @commands.command(aliases=['check', 'checkstatus', 'statuscheck', 'active', 'refresh'])
     async def servercheck(self, ctx):
         """Checks if server is online."""
 
         await backend.send_msg('***Checking Server Status...***')
-        response = await backend.server_status()
+        response = (await backend.status.get_fresh(config.get_config('status_refresh_fast_interval'))).online
         if response:
             await backend.send_msg("**Server ACTIVE** :green_circle:")
         elif response is None:
@@ -615,20 +682,22 @@ class Server(commands.Cog):
     async def serverstatus(self, ctx):
         """Shows server active status, version, motd, and online players"""
 
-        sstatus = await backend.server_status()
-        if sstatus: status = '**ACTIVE** :green_circle:'
-        elif sstatus is False: status = '**INACTIVE** :red_circle:'
+        # Background refreshed status, so page shows right away instead of waiting on ping, console, and version checks.
+        snapshot = backend.status.get()
+        if snapshot.online: status = '**ACTIVE** :green_circle:'
+        elif snapshot.online is False: status = '**INACTIVE** :red_circle:'
         else: status = 'N/A'
+        players = f"{snapshot.players_online}/{snapshot.players_max}" if snapshot.players_online is not None else 'N/A'
         fields = [
-            ['Current Server', f"Status: {status}\nServer: {config.get_config('server_name')}\nDescription: {config.get_config('server_description')}\nVersion: {await backend.get_server_version(force_check=True)}\nMOTD: {await backend.get_motd()}"],
+            ['Current Server', f"Status: {status} (Checked {snapshot.age_text()})\nServer: {config.get_config('server_name')}\nDescription: {config.get_config('server_description')}\nVersion: {snapshot.version or config.get_config('server_version')}\nMOTD: {snapshot.motd or 'N/A'}\nPlayers: {players}"],
             ['Autosave', f"{'Enabled' if config.get_config('enable_autosave') else 'Disabled'} ({config.get_config('autosave_interval')}min)"],
-            ['Address', f"Address: ||`{config.get_config('server_address')}:{config.get_config('server_part')}`|| ({'Working' if await backend.server_ping() else 'Broken'})\nIP: ||`{utils.get_public_ip()}`|| (Use if Address broken)"],
+            ['Address', f"Address: ||`{config.get_config('server_address')}:{config.get_config('server_port')}`|| ({f'Working, {snapshot.latency:.2f}ms' if snapshot.latency is not None else 'Broken'})\nIP: ||`{utils.get_public_ip()}`|| (Use if Address broken)"],
             ['Location', f"`{config.get_config('server_path')}`"],
             ['Launch Command', f"`{config.get_config('server_launch_command')}`"]
         ]
         await backend.send_msg(embed=comps.new_embed(fields, 'Server Status'))
 
-        if status is not False:  # Only fetches players list if server online.
+        if snapshot.online is not False:  # Only fetches players list if server online.
             await ctx.invoke(self.bot.get_command('players'))
         await ctx.invoke(self.bot.get_command('bannermsg'))
         lprint(ctx, "Fetched server status")
@@ -654,12 +723,73 @@ class Server(commands.Cog):
         await backend.send_msg(f"***Fetching {lines} Minecraft Log...*** :tools:")
         log_data = await backend.read_server_log(search=match, lines=lines, find_all=True)
         if log_data:
-            await backend.send_msg(file=discord.File(utils.convert_to_bytes('\n'.join(log_data)), 'server.log'))
+            await discord_files.send_lines(log_data, 'server.log')
             lprint(ctx, f"Fetched Minecraft Log: {lines}")
         else:
             await backend.send_msg("**Error:** Problem fetching data.")
             lprint(ctx, "ERROR: Issue getting minecraft log data")
 
+    @commands.command(aliases=['logfilter', 'filterlog', 'logf', 'loglevel'])
+    async def serverlogfilter(self, ctx, lines=20, levels='', after=None, before=None):
+        """
+        Show latest.log lines of certain log level(s), and/or from a time range.
+
+        Args:
+            lines optional default(20): How many matching lines to show.
+            levels: Log level(s) separated by commas (info, warn, error), or 'all'.
+            after optional: Only lines at or after this time, e.g. 13:05 or 13:05:30.
+            before optional: Only lines at or before this time.
+
+        Usage:
+            ?logfilter 20 warn,error
+            ?logf 50 all 13:00 14:30 - Everything between 1PM and 2:30PM.
+
+        Note: Only checks the last log_lines_limit lines of latest.log.
+        """
+
+        if not levels:
+            await backend.send_msg("Usage: `?logfilter <lines> <levels> [after] [before]`\nExample: `?logfilter 20 warn,error`, `?logf 50 all 13:00 14:30`")
+            return False
+
+        levels = None if levels.lower() == 'all' else levels.split(',')
+        await backend.send_msg(f"***Filtering Minecraft Log...*** :tools:")
+        if (log_data := await backend.read_server_log(lines=config.get_config('log_lines_limit'), find_all=True)) is False:
+            await backend.send_msg("**Error:** Problem fetching data.")
+            lprint(ctx, "ERROR: Issue getting minecraft log data")
+            return False
+
+        # Lines without time or level (e.g. stack traces) are left out, since it's unknown if they match.
+        records = filter_records(parse_log_lines(log_data), levels, after, before)[-lines:]
+        if records:
+            await discord_files.send_lines([i.line for i in records], 'server_filtered.log')
+        else: await backend.send_msg("No matching lines.")
+        lprint(ctx, f"Filtered Minecraft Log: {lines} {levels} {after}-{before}")
+
+    @commands.command(aliases=['logsearch', 'searchlogs', 'logall', 'alllogs'])
+    async def serverlogsearch(self, ctx, lines=20, *match):
+        """
+        Search latest.log and all older server logs (logs/*.log.gz), newest first.
+
+        Args:
+            lines optional default(20): How many matching lines to show.
+            match: Only show lines containing this.
+
+        Usage:
+            ?logsearch 10 my coordinates - Gets 10 most recent lines containing 'my coordinates', from any log.
+        """
+
+        if not (match := utils.format_args(match)):
+            await backend.send_msg("Usage: `?logsearch <lines> <match>`\nExample: `?logsearch 10 joined the game`")
+            return False
+
+        await backend.send_msg(f"***Searching All Minecraft Logs...*** :mag:")
+        if log_data := await backend.search_all_logs(match, lines):
+            await discord_files.send_lines(log_data, 'server_search.log')
+            lprint(ctx, f"Searched all Minecraft logs: {lines} {match}")
+        else:
+            await backend.send_msg("**Error:** No matches, or problem reading logs.")
+            lprint(ctx, "ERROR: Issue searching minecraft logs")
+
     @commands.command(aliases=['sclog', 'connectionlog', 'connectionslog', 'conlog', 'joinlog', 'loginlog'])
     async def serverconnectionslog(self, ctx, lines=20):
         """
@@ -675,17 +805,41 @@ class Server(commands.Cog):
 
         await backend.send_msg(f"***Fetching {lines} Connection Log...*** :satellite:")
 
-        match_list = ['joined the game', 'logged in with entity id', 'left the game', 'lost connection:', 'Kicked by an operator', ]
-        # Get only log lines that are connection related.
-        log_data = await backend.read_server_log(search=match_list, lines=lines, find_all=True)
+        # Get only log lines that are connection related (joined the game, left the game, lost connection, etc), see Log_Index.
+        log_data = await backend.read_log_category('connections', lines)
         if not log_data:
             await backend.send_msg("**ERROR:** Could not get chat log.")
             lprint(ctx, "ERROR: Problem fetching connections log.")
             return
 
-        await backend.send_msg(file=discord.File(utils.convert_to_bytes('\n'.join(log_data)), 'connections_log.log'))
+        await discord_files.send_lines(log_data, 'connections_log.log')
         lprint(ctx, f"Fetched Connection Log: {lines}")
 
+    @commands.command(aliases=['cmdlog', 'commandlog', 'commandslog', 'outputlog'])
+    async def servercommandslog(self, ctx, lines=20):
+        """
+        Shows log lines from command output (bans, whitelist, OP, gamemode, teleports, etc), including commands sent by the bot.
+
+        Args:
+            lines optional default(20): Number of lines to show.
+
+        Usage:
+            ?cmdlog
+            ?cmdlog 50
+        """
+
+        await backend.send_msg(f"***Fetching {lines} Command Log...*** :scroll:")
+
+        # Only command output lines, see Log_Index.
+        log_data = await backend.read_log_category('commands', lines)
+        if not log_data:
+            await backend.send_msg("**ERROR:** Could not get command log.")
+            lprint(ctx, "ERROR: Problem fetching command log.")
+            return
+
+        await discord_files.send_lines(log_data, 'commands_log.log')
+        lprint(ctx, f"Fetched Command Log: {lines}")
+
     @commands.command(aliases=['minecraftversion', 'mversion', 'version'])
     async def serverversion(self, ctx, version=None):
         """Get and set Minecraft server version.
@@ -703,7 +857,8 @@ class Server(commands.Cog):
                 await backend.send_msg("Server version set.")
             else: await backend.send_msg("**ERROR** Problem setting server version.")
 
-        response = await backend.get_server_version(force_check=True)
+        # Refreshing status gets version from server (falls back to server_version config), and updates config if it changed.
+        response = (await backend.status.refresh()).version or False
         if response is False:
             await backend.send_msg("**ERROR:** Could not get server version")
             lprint("ERROR: Couldn't get server version.")
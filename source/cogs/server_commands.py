@@ -3,7 +3,9 @@ import discord
 from discord.ext import commands, tasks
 
 from bot_files.slime_backend import backend
-from bot_files.slime_utils import lprint, utils
+from bot_files.slime_config import config
+from bot_files.slime_utils import lprint, utils, Keyword_Matcher
+from bot_files import discord_files
 
 
 # ========== Basics: Say, whisper, online players, server command pass through.
@@ -22,15 +24,44 @@ class Basics(commands.Cog):
             ?mcommand broadcast Hello Everyone!
             ?m/ toggledownfall
 
-        Note: You will get the latest 2 lines from server output, if you need more use ?log.
+        Note: You will get the latest few lines from server output, if you need more use ?log.
         """
 
         command = utils.format_args(command)
-        if await backend.send_command(command) is False:
+        # Output is read in the same queued job as the send, so it can't be another command's output.
+        if (output := await backend.send_command_output(command, all_lines=True)) is False:
             return False
 
         lprint(ctx, "Sent command: " + command)
-        await ctx.invoke(self.bot.get_command('serverlog'), lines=3)
+        if output:
+            text = utils.remove_ansi('\n'.join(output[-10:]))[-1900:]
+            await backend.send_msg(f"```\n{text}\n```")
+        else: await ctx.invoke(self.bot.get_command('serverlog'), lines=3)
+
+    @commands.command(aliases=['commandto', 'sendto', 'mcommandto'])
+    async def servercommandto(self, ctx, server='', *command):
+        """
+        Pass command to a running subprocess server, doesn't have to be the selected server.
+
+        Args:
+            server: Name of server, see ?serversrunning.
+            command: Server command, do not include the slash /.
+
+        Usage:
+            ?sendto papermc say Hello Everyone!
+        """
+
+        command = utils.format_args(command)
+        if not server or not command:
+            await backend.send_msg("Usage: `?sendto <server> <command>`")
+            return False
+
+        if not await backend.supervisor.send_command(server, command):
+            await backend.send_msg(f"**ERROR:** Server `{server}` not running.")
+            return False
+
+        await backend.send_msg(f"Sent to **{server}**: `{command}`")
+        lprint(ctx, f"Sent command to {server}: {command}")
 
     @commands.command(aliases=['broadcast', 's'])
     async def say(self, ctx, *msg):
@@ -83,15 +114,20 @@ class Basics(commands.Cog):
         Shows chat log. Does not include whispers.
 
         Args:
+            all optional: Also search older logs (logs/*.log.gz), not just latest.log.
             lines optional default(5): How many log lines to look through. This is not how many chat lines to show.
 
         Usage:
             ?chat - Shows latest 5 lines of chat from log file.
             ?chat 50 - May take a while to load all 50 lines.
             ?c Hello - Only get chat lines containing 'Hello'
+            ?c all 20 diamonds - Latest 20 chat lines containing 'diamonds' from any log.
             NOTE: ?c 5 hello does not work.
         """
 
+        search_all = bool(args) and args[0].lower() == 'all'
+        if search_all: args = args[1:]
+
         # Parse line number parameter from input.
         try:
             lines = int(args[0])
@@ -104,18 +140,53 @@ class Basics(commands.Cog):
         await backend.send_msg(f"***Loading {lines} Chat Log...*** :speech_left:")
 
         # Get only log lines that are user chats.
-        if log_data := await backend.read_server_log(']: <', lines=lines, find_all=True):
+        if search_all:
+            log_data = await backend.search_all_logs([']: <', keyword] if keyword else ']: <', lines, match_all=True)
+        else: log_data = await backend.read_log_category('chat', lines)
+        if log_data:
 
             # optionally filter out chat lines only with certain keywords.
-            log_data = '\n'.join([i for i in log_data if keyword.lower() in i.lower()])
+            matcher = Keyword_Matcher.get(keyword)
+            log_data = [i for i in log_data if matcher.search(i) or i.startswith('=== ')]
             if log_data:
-                await backend.send_msg(file=discord.File(utils.convert_to_bytes(log_data), 'chat_log.log'))
+                await discord_files.send_lines(log_data, 'chat_log.log')
                 lprint(ctx, f"Fetched Chat Log: {lines} {keyword}")
                 return
 
         await backend.send_msg("**ERROR:** Problem fetching chat logs, there may be nothing to fetch.")
         lprint(ctx, "ERROR: Problem fetching chat log.")
 
+    @commands.command(aliases=['bridge', 'chatrelay', 'livechat'])
+    async def chatbridge(self, ctx, arg=''):
+        """
+        Two-way chat between this Discord channel and Minecraft.
+
+        Args:
+            arg optional: on/off, shows status if not given.
+
+        Usage:
+            ?chatbridge on - Minecraft chat shows up in this channel, and messages sent here show up in game.
+            ?chatbridge off
+        """
+
+        if arg.lower() in utils.enable_inputs:
+            config.set_config('chat_bridge_channel_id', ctx.channel.id)
+            await backend.send_msg("Chat bridge **ENABLED** for this channel :bridge_at_night:")
+            lprint(ctx, f"Chat bridge enabled: {ctx.channel.id}")
+        elif arg.lower() in utils.disable_inputs:
+            config.set_config('chat_bridge_channel_id', 0)
+            await backend.send_msg("Chat bridge **DISABLED**")
+            lprint(ctx, "Chat bridge disabled")
+        elif channel_id := config.get_config('chat_bridge_channel_id'):
+            await backend.send_msg(f"Chat bridge **ENABLED** in <#{channel_id}>. Use `?chatbridge off` to disable.")
+        else: await backend.send_msg("Chat bridge **DISABLED**. Use `?chatbridge on` in the channel to use.")
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Sends messages in chat bridge channel to Minecraft."""
+
+        backend.chat_bridge.relay_from_discord(message)
+
 
 async def setup(bot):
     await bot.add_cog(Basics(bot))
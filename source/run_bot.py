@@ -206,7 +206,9 @@ class Slime_Bot:
             sys.exit()
 
         from bot_files.slime_bot import bot
-        bot.run(TOKEN, reconnect=True)
+        from bot_files.server_log import close_search_pool
+        try: bot.run(TOKEN, reconnect=True)
+        finally: close_search_pool()
 
     def start_bot_tmux(self) -> bool:
         """Start bot in tmux session."""
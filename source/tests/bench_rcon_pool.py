@@ -0,0 +1,137 @@
+"""
+Benchmarks RCON commands/sec and latency (mean, p50, p99), old path vs new.
+
+    mctools (old)   What Server_API_Rcon did before: blocking mctools client made for each command (connect, login, command,
+                    disconnect), run right on the event loop, so other callers wait until it's done.
+    pool            Rcon_Pool.command(), reuses logged in asyncio connections.
+    pool batch      Rcon_Pool.commands(), each caller's commands are pipelined on one connection.
+
+Fake RCON server runs in its own thread and event loop, so the blocking mctools client can reach it.
+Latency is from when a caller is ready to send a command (its last one finished) until it gets the response, with
+`concurrency` callers sending at once, so time spent waiting for a blocked event loop counts too.
+Loop lag is how late a 1ms heartbeat task wakes up, i.e. how long the rest of the bot would be frozen.
+
+Usage (from source/):
+    python tests/bench_rcon_pool.py [commands] [concurrency] [server delay seconds]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_rcon import Fake_Rcon_Server
+from bot_files.server_rcon import Rcon_Pool
+
+try: import mctools
+except ImportError: mctools = None
+
+
+class Server_Thread:
+    def __init__(self, delay: float):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(Fake_Rcon_Server(delay=delay).start(), self.loop).result()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+async def mctools_command(port: int, command: str) -> None:
+    client = mctools.RCONClient('127.0.0.1', port=port)
+    try:
+        client.login('pass')
+        client.command(command)
+    finally: client.stop()
+
+
+async def run_callers(commands: int, concurrency: int, send) -> list:
+    """Splits commands between callers, returns latency in ms for each command."""
+
+    latencies = []
+    ready = time.perf_counter()
+
+    async def caller(index: int) -> None:
+        start = ready
+        for i in range(index, commands, concurrency):
+            await send(f"say {i}")
+            latencies.append(((end := time.perf_counter()) - start) * 1000)
+            start = end
+
+    await asyncio.gather(*[caller(i) for i in range(concurrency)])
+    return latencies
+
+
+async def bench_mctools(port: int, commands: int, concurrency: int) -> list:
+    return await run_callers(commands, concurrency, lambda command: mctools_command(port, command))
+
+
+async def bench_pool(port: int, commands: int, concurrency: int) -> list:
+    pool = Rcon_Pool('127.0.0.1', port, 'pass', size=2, keepalive_interval=0)
+    try: return await run_callers(commands, concurrency, pool.command)
+    finally: await pool.close()
+
+
+async def bench_pool_batch(port: int, commands: int, concurrency: int) -> list:
+    """Each caller sends its share as one batch, every command in it gets the batch's latency."""
+
+    pool = Rcon_Pool('127.0.0.1', port, 'pass', size=2, keepalive_interval=0)
+    latencies = []
+    start = time.perf_counter()
+
+    async def caller(index: int) -> None:
+        batch = [f"say {i}" for i in range(index, commands, concurrency)]
+        await pool.commands(batch)
+        latencies.extend([(time.perf_counter() - start) * 1000] * len(batch))
+
+    try:
+        await asyncio.gather(*[caller(i) for i in range(concurrency)])
+        return latencies
+    finally: await pool.close()
+
+
+async def heartbeat(lags: list) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+def percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def main(commands: int, concurrency: int, delay: float) -> None:
+    benches = [('pool', bench_pool), ('pool batch', bench_pool_batch)]
+    if mctools: benches.insert(0, ('mctools (old)', bench_mctools))
+    else: print("mctools not installed, skipping old path. pip install mctools to compare.")
+
+    print(f"{commands} commands, {concurrency} callers, {delay * 1000:.0f}ms server delay")
+    print(f"{'':<15} {'cmd/s':>10} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'max lag ms':>11} {'logins':>8}")
+    for name, bench in benches:
+        server_thread = Server_Thread(delay)
+        lags = []
+        heartbeat_task = asyncio.create_task(heartbeat(lags))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        latencies = await bench(server_thread.server.port, commands, concurrency)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.005)  # Lets heartbeat wake up and record lag, if bench never let it run.
+        heartbeat_task.cancel()
+        server_thread.stop()
+        print(f"{name:<15} {commands / elapsed:>10.0f} {statistics.mean(latencies):>10.2f} {percentile(latencies, 50):>10.2f} "
+              f"{percentile(latencies, 99):>10.2f} {max(lags, default=0):>11.2f} {server_thread.server.connections:>8}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    asyncio.run(main(int(args[0]) if len(args) > 0 else 500, int(args[1]) if len(args) > 1 else 10,
+                     float(args[2]) if len(args) > 2 else 0))
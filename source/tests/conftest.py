@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Bot imports modules as 'bot_files.x', with source/ as working directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
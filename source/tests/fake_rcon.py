@@ -0,0 +1,69 @@
+"""Minimal Minecraft RCON server for tests and benchmarks, records commands it runs."""
+
+import struct
+import asyncio
+
+
+class Fake_Rcon_Server:
+    def __init__(self, password: str = 'pass', delay: float = 0):
+        """
+        Args:
+            password str: RCON password.
+            delay float(0): Seconds to wait before answering each command, after running it.
+        """
+
+        self.password = password
+        self.delay = delay
+        self.executed = []  # Commands run, in order.
+        self.connections = 0  # Logged in connections opened.
+        self.port = None
+        self._server = None
+        self._writers = set()
+
+    async def start(self) -> 'Fake_Rcon_Server':
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        """Closes all client connections, like a server restart."""
+
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, request_id: int, packet_type: int, payload: str) -> None:
+        data = struct.pack('<ii', request_id, packet_type) + payload.encode('utf-8') + b'\x00\x00'
+        writer.write(struct.pack('<i', len(data)) + data)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                length, = struct.unpack('<i', await reader.readexactly(4))
+                data = await reader.readexactly(length)
+                request_id, packet_type = struct.unpack('<ii', data[:8])
+                payload = data[8:-2].decode('utf-8')
+                if packet_type == 3:  # Auth.
+                    ok = payload == self.password
+                    self.connections += ok
+                    self._write(writer, request_id if ok else -1, 2, '')
+                elif packet_type == 2:  # Command.
+                    self.executed.append(payload)
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self._write(writer, request_id, 0, f"Ran: {payload}")
+                else:  # Invalid type, Minecraft answers 'Unknown request'.
+                    self._write(writer, request_id, 0, f"Unknown request {packet_type:x}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
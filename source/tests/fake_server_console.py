@@ -0,0 +1,7 @@
+"""Stand-in for a Minecraft server console, replies to every input line like an unknown command in the server log format."""
+
+import sys
+import time
+
+for line in sys.stdin:
+    print(f"[{time.strftime('%H:%M:%S')}] [Server thread/INFO]: {line.strip()}<--[HERE]", flush=True)
@@ -0,0 +1,83 @@
+import os
+import sys
+import uuid
+import shutil
+import asyncio
+import subprocess
+
+import pytest
+
+from bot_files.slime_config import config
+from bot_files.server_api import Server_API_Tmux, Server_API_Screen
+
+fake_server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_server_console.py')
+
+
+@pytest.fixture
+def api_configs(monkeypatch, tmp_path):
+    monkeypatch.setitem(config.server_configs, 'command_buffer_time', 1)
+    monkeypatch.setitem(config.server_configs, 'status_checker_command', 'xp')
+    monkeypatch.setitem(config.server_configs, 'server_use_essentialsx', False)
+    monkeypatch.setitem(config.server_configs, 'server_files_access', False)
+    monkeypatch.setitem(config.server_configs, 'server_screen_log_filepath', str(tmp_path / 'screen.log'))
+    return tmp_path
+
+
+@pytest.fixture
+def tmux_session(monkeypatch, api_configs):
+    session = f"slime_test_{uuid.uuid4().hex[:8]}"
+    subprocess.run(['tmux', 'new-session', '-d', '-s', session, '-x', '200', '-y', '50', 'bash', '--norc', '--noprofile'], check=True)
+    monkeypatch.setitem(config.server_configs, 'server_tmux_name', session)
+    monkeypatch.setitem(config.server_configs, 'server_tmux_pane', '0.0')
+    yield session
+    subprocess.run(['tmux', 'kill-session', '-t', session])
+
+
+@pytest.fixture
+def screen_session(monkeypatch, api_configs):
+    session = f"slime_test_{uuid.uuid4().hex[:8]}"
+    subprocess.run(['screen', '-dmS', session, 'bash', '--norc', '--noprofile'], check=True)
+    monkeypatch.setitem(config.server_configs, 'server_screen_name', session)
+    yield session
+    subprocess.run(['screen', '-S', session, '-X', 'quit'])
+
+
+async def check_reachable(api, start_command: str = None) -> bool:
+    if start_command:
+        await api.send_command(start_command)
+        await asyncio.sleep(0.5)
+    try: return await api.server_console_reachable()
+    finally: await api.close()
+
+
+@pytest.mark.skipif(not shutil.which('tmux'), reason="tmux not installed")
+def test_tmux_no_server_not_reachable(tmux_session):
+    # Pane is at a bash prompt, typed 'xp <number>' gets echoed but nothing answers it.
+    assert asyncio.run(check_reachable(Server_API_Tmux())) is False
+
+
+@pytest.mark.skipif(not shutil.which('tmux'), reason="tmux not installed")
+def test_tmux_server_reachable(tmux_session):
+    assert asyncio.run(check_reachable(Server_API_Tmux(), f"{sys.executable} {fake_server}")) is True
+
+
+@pytest.mark.skipif(not shutil.which('screen'), reason="screen not installed")
+def test_screen_no_server_not_reachable(screen_session):
+    assert asyncio.run(check_reachable(Server_API_Screen())) is False
+
+
+@pytest.mark.skipif(not shutil.which('screen'), reason="screen not installed")
+def test_screen_server_reachable(screen_session):
+    assert asyncio.run(check_reachable(Server_API_Screen(), f"{sys.executable} {fake_server}")) is True
+
+
+@pytest.mark.skipif(not shutil.which('tmux'), reason="tmux not installed")
+def test_tmux_line_break_not_sent(tmux_session):
+    # '\nkill-server' would run as its own tmux command in control mode.
+    async def main():
+        api = Server_API_Tmux()
+        try: return await api.send_command('say hi\nkill-server'), await api.send_command('say hi\rkill-server')
+        finally: await api.close()
+
+    assert asyncio.run(main()) == (False, False)
+    assert subprocess.run(['tmux', 'has-session', '-t', tmux_session]).returncode == 0
@@ -0,0 +1,11 @@
+from bot_files.server_log import Log_Index
+
+
+def test_commands_category(tmp_path):
+    log_file = tmp_path / 'latest.log'
+    log_file.write_text("[12:00:00] [Server thread/INFO]: <Steve> hi\n"
+                        "[12:00:01] [Server thread/INFO]: Banned Alex: Griefing\n"
+                        "[12:00:02] [Server thread/INFO]: Steve joined the game\n"
+                        "[12:00:03] [Server thread/INFO]: Added Steve to the whitelist\n")
+    assert Log_Index(str(log_file)).get_lines('commands') == ["[12:00:01] [Server thread/INFO]: Banned Alex: Griefing",
+                                                              "[12:00:03] [Server thread/INFO]: Added Steve to the whitelist"]
@@ -0,0 +1,18 @@
+from bot_files.server_log_record import parse_log_lines, filter_records
+
+lines = [
+    "[12:59:59] [Server thread/INFO]: Steve joined the game",
+    "[13:00:00] [Server thread/WARN]: Can't keep up!",
+    "java.lang.NullPointerException",
+    "[13:30:00 ERROR]: Could not pass event",
+    "[14:00:01] [Server thread/INFO]: Steve left the game",
+]
+
+
+def test_filter_levels():
+    assert [i.message for i in filter_records(parse_log_lines(lines), ['warn', 'error'])] == ["Can't keep up!", "Could not pass event"]
+
+
+def test_filter_time_range():
+    records = filter_records(parse_log_lines(lines), after='13:00', before='14:00')
+    assert [i.time_str for i in records] == ['13:00:00', '13:30:00']
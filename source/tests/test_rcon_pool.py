@@ -0,0 +1,66 @@
+import asyncio
+
+from fake_rcon import Fake_Rcon_Server
+from bot_files.server_rcon import Rcon_Pool
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_pool_reuses_connection():
+    async def main():
+        server = await Fake_Rcon_Server().start()
+        pool = Rcon_Pool('127.0.0.1', server.port, 'pass', size=1, keepalive_interval=0)
+        results = [await pool.command(f"say {i}") for i in range(5)]
+        await pool.close()
+        await server.stop()
+        return server, results
+
+    server, results = run(main())
+    assert results == [f"Ran: say {i}" for i in range(5)]
+    assert server.connections == 1
+
+
+def test_pool_reconnects_after_server_restart():
+    async def main():
+        server = await Fake_Rcon_Server().start()
+        pool = Rcon_Pool('127.0.0.1', server.port, 'pass', size=1, keepalive_interval=0)
+        await pool.command('say before')
+        server.drop_connections()
+        await asyncio.sleep(0.1)
+        result = await pool.command('give Steve diamond')
+        await pool.close()
+        await server.stop()
+        return server, result
+
+    server, result = run(main())
+    assert result == 'Ran: give Steve diamond'
+    assert server.executed.count('give Steve diamond') == 1
+
+
+def test_pool_does_not_resend_after_timeout():
+    async def main():
+        server = await Fake_Rcon_Server(delay=0.5).start()
+        pool = Rcon_Pool('127.0.0.1', server.port, 'pass', size=1, timeout=0.2, keepalive_interval=0)
+        result = await pool.command('give Steve diamond')
+        await asyncio.sleep(0.6)  # Long enough for a resent command to run too.
+        await pool.close()
+        await server.stop()
+        return server, result
+
+    server, result = run(main())
+    assert result is False
+    assert server.executed == ['give Steve diamond']
+
+
+def test_pool_pipelines_batch():
+    async def main():
+        server = await Fake_Rcon_Server().start()
+        pool = Rcon_Pool('127.0.0.1', server.port, 'pass', size=1, keepalive_interval=0)
+        results = await pool.commands(['say a', 'say b', 'say c'])
+        await pool.close()
+        await server.stop()
+        return results
+
+    assert run(main()) == ['Ran: say a', 'Ran: say b', 'Ran: say c']
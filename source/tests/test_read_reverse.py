@@ -0,0 +1,14 @@
+from bot_files.slime_utils import file_utils
+
+
+def test_reverse_search_non_ascii_case_insensitive(tmp_path):
+    log_file = tmp_path / 'latest.log'
+    log_file.write_text("[12:00:00] [Server thread/INFO]: Ærøskøbing joined the game\n"
+                        "[12:00:01] [Server thread/INFO]: <Steve> hello\n"
+                        "[12:00:02] [Server thread/INFO]: ÆRØSKØBING left the game\n", encoding='utf-8')
+
+    assert list(file_utils.read_file_reverse_generator(str(log_file), search=['ærøskøbing'])) == [
+        "[12:00:02] [Server thread/INFO]: ÆRØSKØBING left the game",
+        "[12:00:00] [Server thread/INFO]: Ærøskøbing joined the game"]
+    assert list(file_utils.read_file_reverse_generator(str(log_file), search=['HELLO'])) == [
+        "[12:00:01] [Server thread/INFO]: <Steve> hello"]
@@ -0,0 +1,26 @@
+import gzip
+import asyncio
+
+from bot_files.server_log import search_logs, search_log_file, close_search_pool
+
+
+def test_search_logs_newest_first(tmp_path):
+    (tmp_path / 'latest.log').write_text("[12:00:00] [Server thread/INFO]: Steve joined the game\n[12:00:01] [Server thread/INFO]: hello\n")
+    with gzip.open(tmp_path / '2023-01-31-1.log.gz', 'wt') as file:
+        file.write("[11:00:00] [Server thread/INFO]: Alex joined the game\n")
+
+    async def main():
+        try: return [i async for i in search_logs(str(tmp_path), ['joined the game'], workers=2)]
+        finally: close_search_pool()
+
+    assert asyncio.run(main()) == [('latest.log', ['[12:00:00] [Server thread/INFO]: Steve joined the game']),
+                                   ('2023-01-31-1.log.gz', ['[11:00:00] [Server thread/INFO]: Alex joined the game'])]
+
+
+def test_search_log_file_non_ascii(tmp_path):
+    (tmp_path / 'latest.log').write_text("[12:00:00] [Server thread/INFO]: Ærøskøbing joined the game\n"
+                                         "[12:00:01] [Server thread/INFO]: <Steve> hello\n"
+                                         "[12:00:02] [Server thread/INFO]: ÆRØSKØBING left the game", encoding='utf-8')
+    assert search_log_file(str(tmp_path / 'latest.log'), ['ærøskøbing'], 5) == [
+        "[12:00:00] [Server thread/INFO]: Ærøskøbing joined the game",
+        "[12:00:02] [Server thread/INFO]: ÆRØSKØBING left the game"]
@@ -0,0 +1,61 @@
+import struct
+import socket
+import asyncio
+
+from bot_files.server_ping import Server_Ping
+
+
+def encode_name(name: str) -> bytes:
+    return b''.join(bytes([len(i)]) + i.encode() for i in name.split('.')) + b'\x00'
+
+
+def srv_answer(query: bytes, truncated: bool) -> bytes:
+    query_id = query[:2]
+    question = query[12:]
+    if truncated:  # No answers, TC set.
+        return query_id + struct.pack('>HHHHH', 0x8380, 1, 0, 0, 0) + question
+    target = encode_name('mc.example.com')
+    record = (b'\xC0\x0C' + struct.pack('>HHIH', 33, 1, 600, 6 + len(target)) +
+              struct.pack('>HHH', 0, 5, 25566) + target)
+    return query_id + struct.pack('>HHHHH', 0x8180, 1, 1, 0, 0) + question + record
+
+
+class Truncating_Dns(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(srv_answer(data, truncated=True), addr)
+
+
+async def handle_tcp(reader, writer):
+    length, = struct.unpack('>H', await reader.readexactly(2))
+    answer = srv_answer(await reader.readexactly(length), truncated=False)
+    writer.write(struct.pack('>H', len(answer)) + answer)
+    await writer.drain()
+    writer.close()
+
+
+def test_srv_truncated_answer_retried_over_tcp(monkeypatch):
+    async def main():
+        tcp_server = await asyncio.start_server(handle_tcp, '127.0.0.1', 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            Truncating_Dns, local_addr=('127.0.0.1', port), family=socket.AF_INET)
+
+        pinger = Server_Ping(timeout=2)
+        pinger.dns_port = port
+        monkeypatch.setattr(Server_Ping, '_get_nameserver', staticmethod(lambda: '127.0.0.1'))
+        try: return await pinger.resolve_srv('example.com')
+        finally:
+            transport.close()
+            tcp_server.close()
+
+    assert asyncio.run(main()) == ('mc.example.com', 25566)
+
+
+def test_srv_skipped_without_nameserver(monkeypatch):
+    monkeypatch.setattr(Server_Ping, '_get_nameserver', staticmethod(lambda: None))
+    pinger = Server_Ping()
+    assert asyncio.run(pinger.resolve_srv('example.com')) is None
+    assert pinger.srv_cache['example.com'][1] is None
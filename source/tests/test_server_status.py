@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from bot_files.slime_config import config
+from bot_files.server_status import Server_Status
+
+
+class Fake_Server_API:
+    def __init__(self):
+        self.checks = 0
+
+    async def check_console_reachable(self):
+        self.checks += 1
+        await asyncio.sleep(0)
+        return True
+
+
+class Fake_Backend:
+    def __init__(self):
+        self.server_apis = {}
+
+    def get_server_api(self, server_name):
+        return self.server_apis.setdefault(server_name, Fake_Server_API())
+
+    async def get_property(self, property_name):
+        return 'motd=A Minecraft=Server' if property_name == 'motd' else False
+
+
+@pytest.fixture
+def status_configs(monkeypatch):
+    # No address, so ping is skipped and status comes from console check.
+    monkeypatch.setitem(config.server_configs, 'server_address', '')
+    monkeypatch.setitem(config.server_configs, 'server_files_access', False)
+    monkeypatch.setitem(config.bot_configs, 'use_custom_ping_address', False)
+    monkeypatch.setitem(config.bot_configs, 'status_console_check_interval', 60)
+    monkeypatch.setattr(config, 'server_name', 'first')
+
+
+def test_console_fallback_rate_limited(status_configs):
+    backend = Fake_Backend()
+    status = Server_Status(backend)
+
+    async def main():
+        return [await status.refresh() for _ in range(5)]
+
+    snapshots = asyncio.run(main())
+    assert backend.get_server_api('first').checks == 1
+    assert all(i.online is True and i.source == 'console' for i in snapshots)
+
+
+def test_refresh_not_shared_across_servers(status_configs, monkeypatch):
+    backend = Fake_Backend()
+    status = Server_Status(backend)
+
+    async def main():
+        first = asyncio.ensure_future(status.refresh())
+        await asyncio.sleep(0)  # First refresh is running.
+        monkeypatch.setattr(config, 'server_name', 'second')
+        second = asyncio.ensure_future(status.refresh())
+        return await first, await second
+
+    first, second = asyncio.run(main())
+    assert (first.server, second.server) == ('first', 'second')
+    assert backend.get_server_api('second').checks == 1
+
+
+def test_motd_from_properties(status_configs):
+    snapshot = asyncio.run(Server_Status(Fake_Backend()).refresh())
+    assert snapshot.motd == 'A Minecraft=Server'
+
+
+def test_get_property_doesnt_rewrite_file(monkeypatch, tmp_path):
+    from bot_files.slime_backend import backend
+
+    properties = tmp_path / 'server.properties'
+    properties.write_text("#Minecraft server properties\nmotd=A Minecraft Server\n")
+    monkeypatch.setitem(config.server_configs, 'server_files_access', True)
+    monkeypatch.setitem(config.server_configs, 'server_properties_filepath', str(properties))
+    modified = properties.stat().st_mtime_ns
+
+    assert asyncio.run(backend.get_property('motd')) == 'motd=A Minecraft Server'
+    assert properties.stat().st_mtime_ns == modified
+    assert not (tmp_path / 'server.properties.bak').exists()